@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+        from .authentication import user_deleted, user_saved, user_saving
+        from .instrumentation import instrument_connection
+        from .models import User, release_favourites
+
+        pre_save.connect(user_saving, sender=User, dispatch_uid='app.user_saving')
+        post_save.connect(user_saved, sender=User, dispatch_uid='app.user_saved')
+        post_delete.connect(user_deleted, sender=User, dispatch_uid='app.user_deleted')
+        pre_delete.connect(release_favourites, sender=User, dispatch_uid='app.release_favourites')
+        connection_created.connect(instrument_connection, dispatch_uid='app.instrument_connection')
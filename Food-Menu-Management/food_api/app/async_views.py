@@ -0,0 +1,196 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .authentication import ClaimsJWTAuthentication
+from .cache import cached_catalog_response
+from .fast_serializers import FastFoodProductSerializer, aserializer_data
+from .fieldsets import FIELDSET_PARAMS, parse_fieldset
+from .filters import filter_products
+from .instrumentation import InstrumentedViewMixin
+from .models import Favourite, FoodProduct
+from .pagination import QuerysetPaginationMixin
+from .snapshots import aget_snapshot_response, serves_snapshots
+from .views import CASE_INSENSITIVE_PARAMS, PRODUCT_LIST_PARAMS, AddFvrtFood, GetFvrtFood, ProductDetailView, ProductView
+
+
+class AsyncAPIView(View):
+    """
+    Small async counterpart of DRF's ``APIView``, which cannot run async
+    handlers. Requests are authenticated from the JWT claims, checked with
+    the usual DRF permission and throttle classes, and handlers return DRF
+    ``Response`` objects rendered with the negotiated renderer, so the
+    bodies match the sync views.
+
+    Methods without an async handler are delegated to ``sync_view_class``,
+    which lets one URL serve async reads and the existing sync writes. So
+    are requests negotiated to the browsable API, which needs a full
+    ``APIView`` to render.
+    """
+    authentication_class = ClaimsJWTAuthentication
+    permission_classes = [IsAuthenticated]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = None
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    content_negotiation_class = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS
+    sync_view_class = None
+    sync_view = None
+    settings = api_settings
+
+    get_renderers = APIView.get_renderers
+    get_content_negotiator = APIView.get_content_negotiator
+    get_format_suffix = APIView.get_format_suffix
+    perform_content_negotiation = APIView.perform_content_negotiation
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if cls.sync_view_class is not None:
+            initkwargs.setdefault('sync_view', sync_to_async(cls.sync_view_class.as_view()))
+        # Authentication is by bearer token, never by session cookie.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None and self.sync_view is not None and hasattr(self.sync_view_class, method):
+            return await self.sync_view(request, *args, **kwargs)
+
+        self.request = Request(request)
+        try:
+            self.format_kwarg = self.get_format_suffix(**kwargs)
+            neg = self.perform_content_negotiation(self.request)
+            self.request.accepted_renderer, self.request.accepted_media_type = neg
+            if isinstance(self.request.accepted_renderer, BrowsableAPIRenderer) and self.sync_view is not None:
+                return await self.sync_view(request, *args, **kwargs)
+            await self.initial(self.request)
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(self.request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(self.request, response, *args, **kwargs)
+
+    async def initial(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        request.user, request.auth = result if result is not None else (AnonymousUser(), None)
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if result is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+        for throttle in [throttle() for throttle in self.throttle_classes]:
+            if hasattr(throttle, 'aallow_request'):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = throttle.allow_request(request, self)
+            if not allowed:
+                raise exceptions.Throttled(throttle.wait())
+
+    def get_renderer_context(self):
+        return {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': self.request}
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = self.authentication_class().authenticate_header(self.request)
+        response = api_settings.EXCEPTION_HANDLER(exc, self.get_renderer_context())
+        if response is None:
+            raise exc
+        response.exception = True
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if isinstance(response, Response) and not response.is_rendered:
+            if not getattr(request, 'accepted_renderer', None):
+                # Negotiation itself failed (406): answer with the default renderer.
+                request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request, force=True)
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+        if len(self.renderer_classes) > 1:
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class AsyncProductView(InstrumentedViewMixin, QuerysetPaginationMixin, AsyncAPIView):
+    permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
+    sync_view_class = ProductView
+    read_serializer_class = FastFoodProductSerializer
+
+    @cached_catalog_response(params=PRODUCT_LIST_PARAMS, case_insensitive=CASE_INSENSITIVE_PARAMS)
+    async def get(self, request):
+        fieldset = parse_fieldset(request.query_params)
+        try:
+            if serves_snapshots(request, fieldset):
+                return await aget_snapshot_response(self, request.query_params)
+            foods = filter_products(FoodProduct.objects.all(), request.query_params).order_by('id')
+            foods = self.read_serializer_class.read_queryset(foods, **fieldset)
+            response = await self.aget_paginated_data(foods, self.read_serializer_class, **fieldset)
+            if response is not None:
+                return response
+
+            serializer = self.read_serializer_class([food async for food in foods], many=True, **fieldset)
+            return Response(await aserializer_data(serializer), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncProductDetailView(InstrumentedViewMixin, AsyncAPIView):
+    permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
+    sync_view_class = ProductDetailView
+    read_serializer_class = FastFoodProductSerializer
+
+    @cached_catalog_response(params=FIELDSET_PARAMS)
+    async def get(self, request, pk):
+        fieldset = parse_fieldset(request.query_params)
+        try:
+            food = await self.read_serializer_class.read_queryset(FoodProduct.objects.all(), **fieldset).aget(pk=pk)
+            serializer = self.read_serializer_class(food, **fieldset)
+            return Response(await aserializer_data(serializer), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncAddFvrtFood(InstrumentedViewMixin, AsyncAPIView):
+    sync_view_class = AddFvrtFood
+
+    async def post(self, request, food_id):
+        try:
+            name = await FoodProduct.objects.values_list('name', flat=True).aget(pk=food_id)
+            # A single INSERT plus the count update in one transaction, which
+            # the async ORM cannot open, so it runs in the sync thread.
+            if not await sync_to_async(Favourite.objects.add)(request.user, [food_id]):
+                return Response({'msg': f"{name} is already in favourite list"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'msg': f"{name} added to favourite"})
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncGetFvrtFood(InstrumentedViewMixin, QuerysetPaginationMixin, AsyncAPIView):
+    sync_view_class = GetFvrtFood
+    read_serializer_class = FastFoodProductSerializer
+
+    async def get(self, request):
+        fieldset = parse_fieldset(request.query_params)
+        favorite_foods = FoodProduct.objects.filter(fvrt_by=request.user.pk).order_by('id')
+        favorite_foods = self.read_serializer_class.read_queryset(favorite_foods, **fieldset)
+        response = await self.aget_paginated_data(favorite_foods, self.read_serializer_class, **fieldset)
+        if response is not None:
+            return response
+
+        data = await aserializer_data(self.read_serializer_class([food async for food in favorite_foods], many=True, **fieldset))
+        if data:
+            return Response(data, status=status.HTTP_200_OK)
+        else:
+            return Response({'msg': 'You dont have any fvrt food'}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+ADMIN_CLAIM = 'is_admin'
+REVOCATION_CLAIM = 'revocation'
+
+
+class UserCache:
+    """
+    Small thread-safe LRU of ``User`` rows with a short TTL. Claims-only
+    requests check the user's revocation stamp against it, and read the
+    full user from it when they need it after all.
+    """
+
+    def __init__(self, max_size=1000, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._users.move_to_end(user_id)
+                return entry[1]
+        return None
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+        return user
+
+    def get(self, user_id, fresh=False):
+        """
+        The user row, cached for ``ttl`` seconds; ``fresh`` reads it from the
+        database regardless. Raises ``DoesNotExist`` for deleted users.
+        """
+        user = None if fresh else self.lookup(user_id)
+        if user is None:
+            user = self.set(user_id, get_user_model().objects.get(pk=user_id))
+        return user
+
+    async def aget(self, user_id, fresh=False):
+        user = None if fresh else self.lookup(user_id)
+        if user is None:
+            user = self.set(user_id, await get_user_model().objects.aget(pk=user_id))
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(**{
+    key.lower(): value for key, value in getattr(settings, 'AUTH_USER_CACHE', {}).items()
+})
+
+
+def claims_admin(token):
+    # Tokens issued before the claim existed may be admin too.
+    return bool(token.get(ADMIN_CLAIM, True))
+
+
+def revoke_user_tokens(user_id):
+    """
+    Reject every token of ``user_id`` issued before now and drop the cached
+    user; returns the new stamp. Tokens carry the ``User.token_revocation``
+    stamp that was current when they were issued, so a new stamp
+    invalidates all of them. It is stored on the user row, so every worker
+    sees it once its cached copy of the user expires (``AUTH_USER_CACHE``).
+    """
+    stamp = time.time_ns()
+    get_user_model().objects.filter(pk=user_id).update(token_revocation=stamp)
+    user_cache.invalidate(user_id)
+    return stamp
+
+
+def is_revoked(user, token_revocation):
+    # Tokens issued before the stamp existed carry none.
+    return (token_revocation or 0) != user.token_revocation
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the access token claims. ``id`` comes from the
+    token; any other ``User`` attribute is read from the full user, fetched
+    through the user cache.
+
+    A token without the admin claim is never admin. For one with it the
+    user was read fresh while authenticating (see ``claims_admin``), so a
+    demotion takes effect at once in every worker, as it did when
+    ``is_admin`` was always read from the database.
+    """
+
+    @cached_property
+    def is_admin(self):
+        if not claims_admin(self.token):
+            return False
+        return self.get_user().is_admin
+
+    def get_user(self):
+        return user_cache.get(self.id)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'token':
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that reads the user through the user cache instead
+    of the database on every request, while honouring ``revoke_user_tokens``.
+    Only tokens claiming admin read the user fresh, so only admin requests
+    pay a query each.
+    """
+
+    def get_claims_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return ClaimsUser(validated_token)
+
+    def check_revocation(self, user, validated_token):
+        if user is None or is_revoked(user, validated_token.get(REVOCATION_CLAIM)):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+
+    def get_user(self, validated_token):
+        user = self.get_claims_user(validated_token)
+        try:
+            self.check_revocation(user_cache.get(user.id, fresh=claims_admin(validated_token)), validated_token)
+        except get_user_model().DoesNotExist:
+            self.check_revocation(None, validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate()`` for async views: only the user lookup does I/O
+        and it goes through the async ORM.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_claims_user(validated_token)
+        try:
+            self.check_revocation(await user_cache.aget(user.id, fresh=claims_admin(validated_token)), validated_token)
+        except get_user_model().DoesNotExist:
+            self.check_revocation(None, validated_token)
+        return user, validated_token
+
+
+def add_user_claims(token, user):
+    token[ADMIN_CLAIM] = user.is_admin
+    token[REVOCATION_CLAIM] = user.token_revocation
+    return token
+
+
+# Changing one of these invalidates the tokens issued before.
+TOKEN_FIELDS = ('is_admin', 'password')
+
+
+def user_saving(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    # Compare with the stored row, so re-saving unchanged values keeps tokens.
+    instance._revokes_tokens = False
+    fields = [field for field in TOKEN_FIELDS if update_fields is None or field in update_fields]
+    if raw or instance.pk is None or not fields:
+        return
+    stored = sender._default_manager.using(using).filter(pk=instance.pk).values(*fields).first()
+    instance._revokes_tokens = stored is not None and any(stored[field] != getattr(instance, field) for field in fields)
+
+
+def user_saved(sender, instance, created, **kwargs):
+    user_cache.invalidate(instance.pk)
+    if not created and getattr(instance, '_revokes_tokens', False):
+        # Keep the instance current, so tokens issued from it stay valid.
+        instance.token_revocation = revoke_user_tokens(instance.pk)
+
+
+def user_deleted(sender, instance, **kwargs):
+    # Tokens of a deleted user fail the user lookup.
+    user_cache.invalidate(instance.pk)
@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import threading
+from contextlib import nullcontext
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+
+from .instrumentation import render_timed
+from .models import CatalogVersion
+from .routers import REPLICA_DATABASE, primary_reads, reading_from_replica
+
+CATALOG_VERSION_PK = 1
+
+
+def get_cache():
+    return caches[getattr(settings, 'MENU_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_version():
+    # Always the primary's, so a write is never answered with entries or
+    # ETags of the version before it.
+    versions = CatalogVersion.objects.using('default')
+    version = versions.filter(pk=CATALOG_VERSION_PK).values_list('version', flat=True).first()
+    if version is None:
+        version = versions.get_or_create(pk=CATALOG_VERSION_PK)[0].version
+    return version
+
+
+async def aget_catalog_version():
+    versions = CatalogVersion.objects.using('default')
+    version = await versions.filter(pk=CATALOG_VERSION_PK).values_list('version', flat=True).afirst()
+    if version is None:
+        version = (await versions.aget_or_create(pk=CATALOG_VERSION_PK))[0].version
+    return version
+
+
+def replica_version():
+    return CatalogVersion.objects.using(REPLICA_DATABASE).filter(pk=CATALOG_VERSION_PK).values_list('version', flat=True)
+
+
+def catalog_reads(replica_current):
+    """
+    Read a cache miss from the primary when the replica has not caught up
+    with the catalog version yet, so a lagging replica never fills the
+    entry of a newer version.
+    """
+    return nullcontext() if replica_current else primary_reads()
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog response and return the new version.
+    Runs in the caller's transaction, so the bump is visible exactly when
+    the write is. The version row stays locked until that transaction ends,
+    so catalog writes commit in version order, which the change feed
+    (``app.changes``) relies on.
+    """
+    versions = CatalogVersion.objects.using('default')
+    if not versions.filter(pk=CATALOG_VERSION_PK).update(version=F('version') + 1):
+        return versions.get_or_create(pk=CATALOG_VERSION_PK, defaults={'version': 2})[0].version
+    return versions.values_list('version', flat=True).get(pk=CATALOG_VERSION_PK)
+
+
+def normalize_params(query_params, params, case_insensitive=()):
+    """
+    Canonical form of the query parameters a view reacts to: unknown
+    parameters are dropped, values are sorted and case-folded where the
+    view ignores case, so equivalent URLs share one cache entry.
+    """
+    normalized = []
+    for param in sorted(params):
+        if param not in query_params:
+            continue
+        values = query_params.getlist(param)
+        if param in case_insensitive:
+            values = sorted({value.strip().lower() for value in values})
+        normalized.append((param, tuple(values)))
+    return normalized
+
+
+def catalog_cache_key(view, request, version, kwargs, params, case_insensitive):
+    """
+    Return ``(etag, cache_key)`` of a catalog response. Paginated bodies
+    embed absolute ``next``/``previous`` links, so the scheme, host and path
+    the request came in on are part of the key.
+    """
+    key_source = repr((
+        type(view).__name__,
+        request.scheme,
+        request.get_host(),
+        request.path,
+        sorted(kwargs.items()),
+        normalize_params(request.query_params, params, case_insensitive),
+        request.accepted_renderer.format,
+    ))
+    digest = hashlib.sha1(key_source.encode()).hexdigest()
+    return f'"{version}-{digest}"', f'catalog:{version}:{digest}'
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing a key: the first caller runs the
+    computation and the others wait for its result rather than repeating
+    it. Waiters that time out, or whose leader failed or produced nothing
+    (``None``), run the computation themselves. Calls coalesce within a
+    process, with threads and with asyncio tasks kept apart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def timeout(self):
+        return getattr(settings, 'CATALOG_COALESCE_TIMEOUT', 10)
+
+    def do(self, key, func):
+        """
+        Return ``(result, shared)``, ``shared`` telling whether the result
+        came from another caller's ``func()``.
+        """
+        timeout = self.timeout()
+        if not timeout:
+            return func(), False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None]
+        if not leader:
+            if call[0].wait(timeout) and call[1] is not None:
+                return call[1], True
+            return func(), False
+        try:
+            call[1] = func()
+            return call[1], False
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+
+    async def ado(self, key, func):
+        """
+        Async ``do()``: ``func`` is a coroutine function.
+        """
+        timeout = self.timeout()
+        if not timeout:
+            return await func(), False
+        key = (asyncio.get_running_loop(), key)
+        future = self._async_calls.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                result = None
+            if result is not None:
+                return result, True
+            return await func(), False
+        future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await func()
+            return result, False
+        finally:
+            del self._async_calls[key]
+            future.set_result(result)
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
+        self._async_calls.clear()
+
+
+catalog_flights = SingleFlight()
+
+
+def not_modified(request, etag):
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def cached_hit(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def finalize_cached(response, etag):
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def coalesced_response(computed, entry, shared, etag):
+    """
+    Response of a cache miss: the one this request computed, or the entry
+    shared by the request it waited for.
+    """
+    if shared:
+        response = cached_hit(entry)
+        response['X-Cache'] = 'COALESCED'
+    elif entry is None:
+        return computed
+    else:
+        response = computed
+        response['X-Cache'] = 'MISS'
+    return finalize_cached(response, etag)
+
+
+def cached_catalog_response(params=(), case_insensitive=()):
+    """
+    Cache successful responses of a read-only catalog view handler.
+
+    Entries are keyed on the catalog version, the view, its URL kwargs, the
+    scheme, host and path, the normalized query parameters and the negotiated
+    renderer. The same key
+    doubles as a strong ETag, so ``If-None-Match`` is answered with a 304
+    without touching the catalog tables. Concurrent misses of one key are
+    computed once (``catalog_flights``); the requests that waited are
+    answered with ``X-Cache: COALESCED``. Async handlers (see
+    ``app.async_views``) are cached through the async cache API. A handler
+    opts a response out of the cache by setting ``cacheable = False`` on it.
+    """
+    def decorator(view_method):
+        if iscoroutinefunction(view_method):
+            @wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                version = await aget_catalog_version()
+                etag, cache_key = catalog_cache_key(self, request, version, kwargs, params, case_insensitive)
+                response = not_modified(request, etag)
+                if response is not None:
+                    return response
+
+                cache = get_cache()
+                cached = await cache.aget(cache_key)
+                if cached is not None:
+                    return finalize_cached(cached_hit(cached), etag)
+
+                computed = None
+
+                async def compute():
+                    nonlocal computed
+                    replica_current = not reading_from_replica() or await replica_version().afirst() == version
+                    with catalog_reads(replica_current):
+                        result = await view_method(self, request, *args, **kwargs)
+                        computed = render_timed(self.finalize_response(request, result, *args, **kwargs))
+                    if computed.status_code != status.HTTP_200_OK or not getattr(result, 'cacheable', True):
+                        return None
+                    entry = (computed.content, computed['Content-Type'])
+                    await cache.aset(cache_key, entry)
+                    return entry
+
+                entry, shared = await catalog_flights.ado(cache_key, compute)
+                return coalesced_response(computed, entry, shared, etag)
+            return async_wrapper
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            version = get_catalog_version()
+            etag, cache_key = catalog_cache_key(self, request, version, kwargs, params, case_insensitive)
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            cache = get_cache()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return finalize_cached(cached_hit(cached), etag)
+
+            computed = None
+
+            def compute():
+                nonlocal computed
+                replica_current = not reading_from_replica() or replica_version().first() == version
+                with catalog_reads(replica_current):
+                    computed = view_method(self, request, *args, **kwargs)
+                    if computed.status_code != status.HTTP_200_OK or not getattr(computed, 'cacheable', True):
+                        return None
+                    # Rendered here rather than after the handler returns, so
+                    # waiting requests can share the body.
+                    computed = render_timed(self.finalize_response(request, computed, *args, **kwargs))
+                entry = (computed.content, computed['Content-Type'])
+                cache.set(cache_key, entry)
+                return entry
+
+            entry, shared = catalog_flights.do(cache_key, compute)
+            return coalesced_response(computed, entry, shared, etag)
+        return wrapper
+    return decorator
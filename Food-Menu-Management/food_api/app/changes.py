@@ -0,0 +1,69 @@
+import base64
+import json
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+
+from .exporters import ExportFoodProductSerializer
+from .models import FoodProduct, FoodProductTombstone
+from .pagination import KeysetPagination
+
+ACTION_UPSERT = 'upsert'
+ACTION_DELETE = 'delete'
+
+
+def encode_change_cursor(version, food_id):
+    payload = json.dumps([version, food_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_change_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        version, food_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return int(version), int(food_id)
+    except (TypeError, ValueError):
+        raise ValidationError({'since': 'Invalid cursor'})
+
+
+def get_changes(since=None, limit=100):
+    """
+    Return ``(changes, cursor, has_more)`` for catalog changes after the
+    ``since`` cursor, oldest first.
+
+    Every write stamps the products it changes, or the tombstones of those
+    it deletes, with the catalog version it bumps (``change_version``).
+    Writes hold the version row from that bump until they commit, so
+    versions are handed out in commit order: once a version is visible,
+    every lower one is too, however long its transaction ran, and the
+    cursor never skips over a write. Changed products and tombstones are
+    read in ``(version, food id)`` order from their indexes and merged. A
+    product deleted since the cursor only shows up as its deletion.
+    """
+    position = decode_change_cursor(since)
+    after = KeysetPagination().position_filter
+
+    products = FoodProduct.objects.with_menu_relations('updated_at', 'change_version')
+    tombstones = FoodProductTombstone.objects.all()
+    if position is not None:
+        products = products.filter(after(('change_version', 'id'), position))
+        tombstones = tombstones.filter(after(('change_version', 'food_id'), position))
+    products = list(products.order_by('change_version', 'id')[:limit + 1])
+    tombstones = list(tombstones.order_by('change_version', 'food_id')[:limit + 1])
+
+    merged = sorted(
+        [(food.change_version, food.pk, food) for food in products]
+        + [(tombstone.change_version, tombstone.food_id, tombstone) for tombstone in tombstones],
+        key=lambda change: change[:2],
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    upserts = iter(ExportFoodProductSerializer([row for _, _, row in merged if isinstance(row, FoodProduct)], many=True).data)
+    changes = [
+        {'action': ACTION_UPSERT, 'id': food_id, 'product': next(upserts)} if isinstance(row, FoodProduct)
+        else {'action': ACTION_DELETE, 'id': food_id, 'deleted_at': DateTimeField().to_representation(row.deleted_at)}
+        for _, food_id, row in merged
+    ]
+    cursor = encode_change_cursor(*merged[-1][:2]) if merged else since
+    return changes, cursor, has_more
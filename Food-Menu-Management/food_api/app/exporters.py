@@ -0,0 +1,102 @@
+from itertools import islice
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import FoodProduct
+from .serializers import FoodProductSerializer
+
+FORMAT_JSON = 'json'
+FORMAT_NDJSON = 'ndjson'
+
+FORMAT_CONTENT_TYPES = {
+    FORMAT_NDJSON: 'application/x-ndjson',
+    FORMAT_JSON: 'application/json',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header allows gzip, named or through
+    ``*``, with a non-zero q-value: ``gzip;q=0`` refuses it.
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+class ExportFoodProductSerializer(FoodProductSerializer):
+
+    class Meta(FoodProductSerializer.Meta):
+        fields = FoodProductSerializer.Meta.fields + ['updated_at']
+
+
+def parse_updated_since(value):
+    """
+    Parse an ISO 8601 ``updated_since`` value; naive values are taken in the
+    current time zone.
+    """
+    if not value:
+        return None
+    try:
+        updated_since = parse_datetime(value)
+    except ValueError:
+        updated_since = None
+    if updated_since is None:
+        raise ExportError('updated_since must be an ISO 8601 datetime')
+    if timezone.is_naive(updated_since):
+        updated_since = timezone.make_aware(updated_since)
+    return updated_since
+
+
+def export_queryset(updated_since=None):
+    foods = FoodProduct.objects.with_menu_relations('updated_at').order_by('id')
+    if updated_since is not None:
+        foods = foods.filter(updated_at__gte=updated_since)
+    return foods
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_export(queryset, export_format=FORMAT_NDJSON, chunk_size=500):
+    """
+    Yield the products of ``queryset`` with their customizations as NDJSON
+    lines or as one JSON array, one string per chunk. Rows are read with
+    ``iterator()``, prefetching customizations chunk by chunk, so memory
+    stays flat whatever the catalog size.
+    """
+    if export_format not in FORMAT_CONTENT_TYPES:
+        raise ExportError(f'Unsupported format: {export_format}')
+
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    first = True
+    if export_format == FORMAT_JSON:
+        yield '['
+    for batch in iter_batches(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        items = [encoder.encode(item) for item in ExportFoodProductSerializer(batch, many=True).data]
+        if export_format == FORMAT_NDJSON:
+            yield ''.join(f'{item}\n' for item in items)
+        else:
+            yield ('' if first else ',') + ','.join(items)
+        first = False
+    if export_format == FORMAT_JSON:
+        yield ']'
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import BooleanField, Case, CharField, Count, Q, Value, When
+
+from .filters import TOPPINGS_MATCH_ALL, TOPPINGS_MATCH_ANY, build_product_filters, filter_toppings, parse_toppings
+from .models import FoodProduct
+
+# (label, lower bound inclusive, upper bound exclusive); None is open-ended.
+PRICE_BUCKETS = [
+    ('0-100', None, 100),
+    ('100-200', 100, 200),
+    ('200-300', 200, 300),
+    ('300-500', 300, 500),
+    ('500+', 500, None),
+]
+
+RATING_BUCKETS = [
+    ('0-2', None, 2),
+    ('2-3', 2, 3),
+    ('3-4', 3, 4),
+    ('4+', 4, None),
+]
+
+# Facet dimension -> (grouped column, the product filter lookups it owns).
+FACET_DIMENSIONS = {
+    'category': ('category', ['category__in']),
+    'type': ('product_type', ['product_type']),
+    'price': ('price_bucket', ['price__gte', 'price__lte']),
+    'rating': ('rating_bucket', ['average_rating__gte']),
+}
+
+
+def bucket_case(field, buckets):
+    whens = []
+    for label, low, high in buckets:
+        lookups = {}
+        if low is not None:
+            lookups[f'{field}__gte'] = low
+        if high is not None:
+            lookups[f'{field}__lt'] = high
+        whens.append(When(then=Value(label), **lookups))
+    return Case(*whens, output_field=CharField())
+
+
+def bucket_ranges(buckets):
+    return [{'value': label, 'min': low, 'max': high} for label, low, high in buckets]
+
+
+def get_facets(query_params):
+    """
+    Count the products per category, type, price bucket and rating bucket
+    under the filters in ``query_params``. Each dimension is counted with
+    every filter but its own, so the numbers say how many products picking
+    that value would give.
+
+    One grouped query does it all: the shared filters (toppings) and "fails
+    at most one facet filter" go into WHERE, each facet filter becomes a
+    matches/doesn't flag in the GROUP BY, and the few hundred groups are
+    folded per dimension here.
+    """
+    filters = build_product_filters(query_params)
+    match = TOPPINGS_MATCH_ALL if query_params.get('toppings_match') == TOPPINGS_MATCH_ALL else TOPPINGS_MATCH_ANY
+    foods = filter_toppings(FoodProduct.objects.all(), parse_toppings(query_params), match)
+
+    conditions = {}
+    for dimension, (_, lookups) in FACET_DIMENSIONS.items():
+        active = {lookup: filters[lookup] for lookup in lookups if lookup in filters}
+        if active:
+            conditions[dimension] = Q(**active)
+    if len(conditions) > 1:
+        # A product failing two facet filters counts nowhere; skip it before grouping.
+        foods = foods.filter(reduce(or_, (
+            Q(*(condition for other, condition in conditions.items() if other != dimension))
+            for dimension in conditions
+        )))
+    flags = {
+        f'{dimension}_match': Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+        for dimension, condition in conditions.items()
+    }
+
+    groups = foods.annotate(
+        price_bucket=bucket_case('price', PRICE_BUCKETS),
+        rating_bucket=bucket_case('average_rating', RATING_BUCKETS),
+        **flags,
+    ).values(
+        *(column for column, _ in FACET_DIMENSIONS.values()), *flags,
+    ).annotate(count=Count('id')).order_by()
+
+    counts = {dimension: defaultdict(int) for dimension in FACET_DIMENSIONS}
+    total = 0
+    for group in groups:
+        matched = {dimension: group.get(f'{dimension}_match', True) for dimension in FACET_DIMENSIONS}
+        if all(matched.values()):
+            total += group['count']
+        for dimension, (column, _) in FACET_DIMENSIONS.items():
+            if all(ok for other, ok in matched.items() if other != dimension):
+                counts[dimension][group[column]] += group['count']
+
+    return {
+        'count': total,
+        'facets': {
+            'category': [
+                {'value': value, 'count': count}
+                for value, count in sorted(counts['category'].items(), key=lambda item: (-item[1], item[0]))
+            ],
+            'type': [
+                {'value': value, 'count': counts['type'].get(value, 0)}
+                for value, _ in FoodProduct._meta.get_field('product_type').choices
+            ],
+            'price': [
+                {**bucket, 'count': counts['price'].get(bucket['value'], 0)} for bucket in bucket_ranges(PRICE_BUCKETS)
+            ],
+            'rating': [
+                {**bucket, 'count': counts['rating'].get(bucket['value'], 0)} for bucket in bucket_ranges(RATING_BUCKETS)
+            ],
+        },
+    }
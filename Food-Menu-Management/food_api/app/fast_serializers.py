@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+
+from .instrumentation import serializer_timer
+from .models import Customization, FoodProductQuerySet
+
+CENTS = Decimal('0.01')
+
+
+class SerializedProductCache:
+    """
+    Thread-safe LRU of serialized products. Each entry remembers the
+    ``updated_at`` it was built from, and every write to a product or its
+    customizations moves ``updated_at``, so stale entries are never served.
+    """
+
+    def __init__(self, max_size=5000):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, food_id, version):
+        with self._lock:
+            entry = self._items.get(food_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._items.move_to_end(food_id)
+            return entry[1]
+
+    def set(self, food_id, version, data):
+        with self._lock:
+            self._items[food_id] = (version, data)
+            self._items.move_to_end(food_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+product_cache = SerializedProductCache(**{
+    key.lower(): value for key, value in getattr(settings, 'SERIALIZED_PRODUCT_CACHE', {}).items()
+})
+
+
+def format_price(value):
+    # What serializers.DecimalField(max_digits=8, decimal_places=2) renders.
+    if value is None:
+        return None
+    value = Decimal(value).quantize(CENTS)
+    return '{:f}'.format(value) if api_settings.COERCE_DECIMAL_TO_STRING else value
+
+
+class FastFoodProductSerializer:
+    """
+    Read-only stand-in for ``FoodProductSerializer`` with the same output.
+
+    Views select it with ``read_serializer_class`` and load products through
+    ``read_queryset()``, which yields plain ``.values()`` rows. Products are
+    built as dicts without the field machinery and memoized per
+    ``(id, updated_at)``, so only products not seen in their current version
+    need their customizations loaded: one ``.values()`` query for all of them.
+    The returned dicts are shared, treat them as read-only.
+
+    ``fields`` and ``include_customizations`` select a sparse fieldset (see
+    ``app.fieldsets``): only those columns are read, customizations are not
+    queried unless included, and memoized full products are cut down to it.
+    """
+    product_fields = FoodProductQuerySet.menu_fields
+    customization_fields = ['id', 'name', 'group', 'toppings']
+
+    def __init__(self, instance=None, many=False, cache=product_cache, fields=None, include_customizations=True):
+        self.instance = instance
+        self.many = many
+        self.cache = cache
+        self.fields = fields
+        self.include_customizations = include_customizations
+        # Only complete products are memoized.
+        self.complete = fields is None and include_customizations
+
+    @classmethod
+    def read_queryset(cls, queryset, fields=None, include_customizations=True):
+        return queryset.values(*dict.fromkeys(['id', *(fields or cls.product_fields), 'updated_at']))
+
+    def customizations_queryset(self, food_ids):
+        return Customization.objects.filter(food_product_id__in=food_ids).values(
+            'food_product_id', *self.customization_fields,
+        ).order_by('food_product_id', 'id')
+
+    def lookup(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        cached = [self.cache.get(row['id'], row['updated_at']) for row in rows]
+        missing = [row['id'] for row, data in zip(rows, cached) if data is None] if self.include_customizations else []
+        return rows, cached, missing
+
+    def to_representation(self, row, customizations):
+        data = {field: row[field] for field in self.fields or self.product_fields}
+        if 'price' in data:
+            data['price'] = format_price(data['price'])
+        if self.include_customizations:
+            data['customizations'] = customizations
+        return data
+
+    def project(self, data):
+        if self.complete:
+            return data
+        projected = {field: data[field] for field in self.fields or self.product_fields}
+        if self.include_customizations:
+            projected['customizations'] = data['customizations']
+        return projected
+
+    def build(self, rows, cached, customizations):
+        by_food = defaultdict(list)
+        for customization in customizations:
+            food_id = customization.pop('food_product_id')
+            by_food[food_id].append(customization)
+
+        results = []
+        for row, data in zip(rows, cached):
+            if data is None:
+                data = self.to_representation(row, by_food.get(row['id'], []))
+                if self.complete:
+                    self.cache.set(row['id'], row['updated_at'], data)
+            else:
+                data = self.project(data)
+            results.append(data)
+        return results if self.many else results[0]
+
+    @property
+    def data(self):
+        with serializer_timer():
+            rows, cached, missing = self.lookup()
+            customizations = list(self.customizations_queryset(missing)) if missing else []
+            return self.build(rows, cached, customizations)
+
+    async def adata(self):
+        with serializer_timer():
+            rows, cached, missing = self.lookup()
+            customizations = [item async for item in self.customizations_queryset(missing)] if missing else []
+            return self.build(rows, cached, customizations)
+
+
+async def aserializer_data(serializer):
+    """
+    ``serializer.data`` from async code. DRF serializers only get prefetched
+    instances here, so only the fast serializer has queries left to run.
+    """
+    if hasattr(serializer, 'adata'):
+        return await serializer.adata()
+    return serializer.data
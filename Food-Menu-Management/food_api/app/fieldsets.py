@@ -0,0 +1,42 @@
+from rest_framework.exceptions import ValidationError
+
+from .models import FoodProductQuerySet
+
+FIELDS_PARAM = 'fields'
+INCLUDE_PARAM = 'include'
+FIELDSET_PARAMS = [FIELDS_PARAM, INCLUDE_PARAM]
+
+PRODUCT_FIELDS = FoodProductQuerySet.menu_fields
+INCLUDABLE = ['customizations']
+
+
+def split_values(query_params, param):
+    values = []
+    for value in query_params.getlist(param):
+        values.extend(item.strip() for item in value.split(',') if item.strip())
+    return values
+
+
+def parse_fieldset(query_params):
+    """
+    Read ``?fields=id,name,price`` and ``?include=customizations`` into the
+    ``fields`` and ``include_customizations`` arguments of the product read
+    serializers. Without ``fields`` every column and the customizations are
+    returned, as before; with it only the listed columns (``id`` always) and
+    customizations only when included.
+    """
+    fields = split_values(query_params, FIELDS_PARAM)
+    include = split_values(query_params, INCLUDE_PARAM)
+    unknown = [field for field in fields if field not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(PRODUCT_FIELDS)}"})
+    unknown = [name for name in include if name not in INCLUDABLE]
+    if unknown:
+        raise ValidationError({INCLUDE_PARAM: f"Unknown includes: {', '.join(unknown)}. Choose from {', '.join(INCLUDABLE)}"})
+
+    if not fields:
+        return {'fields': None, 'include_customizations': True}
+    return {
+        'fields': [field for field in PRODUCT_FIELDS if field == 'id' or field in fields],
+        'include_customizations': 'customizations' in include,
+    }
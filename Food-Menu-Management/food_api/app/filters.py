@@ -0,0 +1,68 @@
+from django.db.models import Exists, OuterRef
+
+from .models import CustomizationTopping, split_toppings
+
+PRODUCT_FILTER_MAPPING = {
+    'min_price': 'price__gte',
+    'max_price': 'price__lte',
+    'average_rating': 'average_rating__gte',
+    'category': 'category__in',
+    'type': 'product_type',
+}
+
+MULTI_VALUE_PARAMS = {'category'}
+
+PRODUCT_FILTER_PARAMS = [*PRODUCT_FILTER_MAPPING, 'toppings']
+
+TOPPINGS_MATCH_ANY = 'any'
+TOPPINGS_MATCH_ALL = 'all'
+
+
+def build_product_filters(query_params):
+    """
+    Translate the product list query parameters into ``FoodProduct`` lookups.
+    """
+    filters = {}
+    for param, field in PRODUCT_FILTER_MAPPING.items():
+        values = query_params.getlist(param) if param in MULTI_VALUE_PARAMS else query_params.get(param)
+        if values:
+            values = values.capitalize() if isinstance(values, str) else [value.capitalize() for value in values]
+            filters[field] = values
+    return filters
+
+
+def parse_toppings(query_params):
+    """
+    ``?toppings=cheese,olives`` and ``?toppings=cheese&toppings=olives`` are equivalent.
+    """
+    names = []
+    for value in query_params.getlist('toppings'):
+        names.extend(split_toppings(value))
+    return list(dict.fromkeys(names))
+
+
+def has_toppings(names):
+    return Exists(CustomizationTopping.objects.filter(
+        customization__food_product=OuterRef('pk'),
+        topping__name__in=names,
+    ))
+
+
+def filter_toppings(queryset, names, match=TOPPINGS_MATCH_ANY):
+    """
+    Semi-join on the normalized topping rows: ``any`` keeps products with at
+    least one of ``names``, ``all`` keeps products offering every one of them.
+    """
+    if not names:
+        return queryset
+    if match == TOPPINGS_MATCH_ALL:
+        for name in names:
+            queryset = queryset.filter(has_toppings([name]))
+        return queryset
+    return queryset.filter(has_toppings(names))
+
+
+def filter_products(queryset, query_params):
+    queryset = queryset.filter(**build_product_filters(query_params))
+    match = TOPPINGS_MATCH_ALL if query_params.get('toppings_match') == TOPPINGS_MATCH_ALL else TOPPINGS_MATCH_ANY
+    return filter_toppings(queryset, parse_toppings(query_params), match)
@@ -0,0 +1,105 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    check_password,
+    make_password,
+)
+from rest_framework.exceptions import Throttled
+
+
+class TunableHasherMixin:
+    """
+    Read the cost parameters of a hasher from ``PASSWORD_HASHER_OPTIONS``.
+    Hashes made with other parameters are upgraded on the next login.
+    """
+    options_key = None
+
+    def __init__(self):
+        options = getattr(settings, 'PASSWORD_HASHER_OPTIONS', {}).get(self.options_key, {})
+        for name, value in options.items():
+            setattr(self, name, value)
+
+
+class TunablePBKDF2PasswordHasher(TunableHasherMixin, PBKDF2PasswordHasher):
+    options_key = 'pbkdf2'
+
+
+class TunableScryptPasswordHasher(TunableHasherMixin, ScryptPasswordHasher):
+    options_key = 'scrypt'
+
+
+class TunableArgon2PasswordHasher(TunableHasherMixin, Argon2PasswordHasher):
+    # Needs the argon2-cffi package.
+    options_key = 'argon2'
+
+
+class HashingBusy(Throttled):
+    default_detail = 'Too many sign-ins are being processed, try again shortly.'
+
+
+class HashingLimiter:
+    """
+    Bound how many password hashes run at once. Hashing runs on the calling
+    request thread; the hashers release the GIL, so a few run in parallel,
+    but never more than ``max_concurrent``: a burst of logins waits at most
+    ``queue_timeout`` seconds for a slot and is then rejected with 429
+    instead of starving every worker.
+    """
+
+    def __init__(self, max_concurrent=4, queue_timeout=2):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def run(self, func, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy(wait=self.queue_timeout)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+
+hashing_limiter = HashingLimiter(**{
+    key.lower(): value for key, value in getattr(settings, 'PASSWORD_HASHING_LIMIT', {}).items()
+})
+
+
+def hash_password(raw_password):
+    return hashing_limiter.run(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    Check ``raw_password`` against ``user`` within the hashing limit
+    and rehash it with the preferred hasher when it is outdated. The rehash
+    is written with ``update()``: the password did not change, so unlike a
+    ``save()`` it must not revoke the user's tokens.
+    """
+    outdated = []
+    valid = hashing_limiter.run(check_password, raw_password, user.password, setter=outdated.append)
+    if valid and outdated:
+        user.password = hash_password(raw_password)
+        type(user).objects.filter(pk=user.pk).update(password=user.password)
+    return valid
+
+
+def authenticate_user(email, password):
+    """
+    ``authenticate()`` for the sign-in endpoint with the hashing bounded by
+    ``hashing_limiter``. Unknown emails still pay for one hash, like ``ModelBackend``,
+    so response times do not reveal which accounts exist.
+    """
+    User = get_user_model()
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        hash_password(password)
+        return None
+    if verify_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,217 @@
+import codecs
+import csv
+import io
+import json
+
+from django.db import DatabaseError, transaction
+
+from .cache import bump_catalog_version
+from .models import Customization, FoodProduct, Topping
+from .search import update_search_vectors
+from .snapshots import refresh_snapshots
+from .serializers import FoodProductSerializer, without_id
+
+FORMAT_JSON = 'json'
+FORMAT_NDJSON = 'ndjson'
+FORMAT_CSV = 'csv'
+
+CONTENT_TYPE_FORMATS = {
+    'application/json': FORMAT_JSON,
+    'application/x-ndjson': FORMAT_NDJSON,
+    'application/jsonlines': FORMAT_NDJSON,
+    'text/csv': FORMAT_CSV,
+}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_json_array(stream, buffer_size=64 * 1024):
+    """
+    Yield the items of a top-level JSON array one at a time without loading
+    the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer and not eof:
+                chunk = stream.read(buffer_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if not buffer.startswith('['):
+                raise ImportFormatError('Expected a JSON array of products')
+            buffer = buffer[1:]
+            started = True
+            continue
+
+        if buffer.startswith(']'):
+            return
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ImportFormatError('Truncated or invalid JSON array')
+            chunk = stream.read(buffer_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        # A number at the end of the buffer may continue in the next chunk.
+        if end == len(buffer) and not eof:
+            chunk = stream.read(buffer_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ImportFormatError(f'Invalid JSON: {e}')
+
+
+def iter_csv(stream):
+    """
+    One product per line; the optional ``customizations`` column holds a JSON
+    list of ``{"name", "group", "toppings"}`` objects.
+    """
+    for row in csv.DictReader(stream):
+        customizations = row.get('customizations') or '[]'
+        try:
+            row['customizations'] = json.loads(customizations)
+        except json.JSONDecodeError as e:
+            yield ImportFormatError(f'Invalid customizations JSON: {e}')
+            continue
+        yield row
+
+
+def iter_rows(stream, file_format):
+    if file_format == FORMAT_JSON:
+        return iter_json_array(stream)
+    if file_format == FORMAT_NDJSON:
+        return iter_ndjson(stream)
+    if file_format == FORMAT_CSV:
+        return iter_csv(stream)
+    raise ImportFormatError(f'Unsupported format: {file_format}')
+
+
+def until_format_error(rows):
+    """
+    Yield ``rows`` until reading them fails, then the error as a last row so
+    it is reported at its position and the rows before it are still imported.
+    """
+    try:
+        yield from rows
+    except ImportFormatError as e:
+        yield e
+
+
+def text_stream(stream, encoding='utf-8'):
+    """
+    Decode a binary file-like object (including a Django request) lazily.
+    """
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader(encoding)(stream)
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+
+class MenuImporter:
+    """
+    Validate products in chunks and insert every valid chunk with one
+    ``bulk_create`` for products and one for customizations. Invalid rows are
+    reported by their 1-based position and never abort the import; neither
+    does a stream that breaks off, which ends it with an error at that row.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+
+    def run(self, rows):
+        result = ImportResult()
+        chunk = []
+        for number, row in enumerate(until_format_error(rows), start=1):
+            chunk.append((number, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk, result)
+        return result
+
+    def import_chunk(self, chunk, result):
+        valid = []
+        for number, row in chunk:
+            if isinstance(row, Exception):
+                result.add_error(number, {'non_field_errors': [str(row)]})
+                continue
+            if not isinstance(row, dict):
+                result.add_error(number, {'non_field_errors': ['Expected an object']})
+                continue
+            serializer = FoodProductSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                result.add_error(number, serializer.errors)
+        if not valid:
+            return
+
+        try:
+            with transaction.atomic():
+                self.insert([data for _, data in valid])
+            result.created += len(valid)
+        except DatabaseError:
+            # Isolate the offending rows instead of failing the whole chunk.
+            for number, data in valid:
+                try:
+                    with transaction.atomic():
+                        self.insert([data])
+                    result.created += 1
+                except DatabaseError as e:
+                    result.add_error(number, {'non_field_errors': [str(e)]})
+
+    def insert(self, validated_rows):
+        version = bump_catalog_version()
+        products = []
+        customization_rows = []
+        for data in validated_rows:
+            data = dict(data)
+            customization_rows.append(data.pop('customizations', []))
+            products.append(FoodProduct(change_version=version, **data))
+        products = FoodProduct.objects.bulk_create(products)
+
+        customizations = Customization.objects.bulk_create([
+            Customization(food_product=product, **without_id(customization))
+            for product, items in zip(products, customization_rows)
+            for customization in items
+        ])
+        Topping.objects.link(customizations)
+        update_search_vectors([product.pk for product in products])
+        refresh_snapshots([product.pk for product in products])
+        return products
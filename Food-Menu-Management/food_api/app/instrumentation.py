@@ -0,0 +1,282 @@
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.response import SimpleTemplateResponse
+
+logger = logging.getLogger('app.performance')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# The method label comes from the client: anything else is recorded as
+# 'other' so made-up verbs cannot create new series.
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+
+_request_metrics = ContextVar('request_metrics', default=None)
+
+
+def get_options():
+    return {
+        'ENABLED': True,
+        'SERVER_TIMING': False,
+        'SLOW_QUERY_MS': 100,
+        'SLOW_QUERY_SAMPLE_RATE': 0.1,
+        **getattr(settings, 'PERFORMANCE_INSTRUMENTATION', {}),
+    }
+
+
+class RequestMetrics:
+    """
+    Time and query breakdown of the request being served.
+    """
+    __slots__ = (
+        'start', 'queries', 'db_time', 'serialize_time', 'render_time', 'depth',
+        'slow_query_seconds', 'slow_query_sample_rate',
+    )
+
+    def __init__(self, options):
+        self.slow_query_seconds = options['SLOW_QUERY_MS'] / 1000
+        self.slow_query_sample_rate = options['SLOW_QUERY_SAMPLE_RATE']
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.depth = 0
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one series per label set. Observations
+    take one bisect and a few additions under a lock.
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            label_text = ','.join(f'{key}="{escape_label(value)}"' for key, value in labels)
+            cumulative = 0
+            for bound, bucket_count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.duration = Histogram('http_request_duration_seconds', 'Wall time of the request.', DURATION_BUCKETS)
+        self.db_duration = Histogram('http_request_db_duration_seconds', 'Time spent in database queries.', DURATION_BUCKETS)
+        self.db_queries = Histogram('http_request_db_queries', 'Database queries per request.', QUERY_COUNT_BUCKETS)
+        self.serialize_duration = Histogram('http_request_serialize_duration_seconds', 'Time spent serializing, without queries.', DURATION_BUCKETS)
+        self.render_duration = Histogram('http_request_render_duration_seconds', 'Time spent rendering the response body.', DURATION_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', 'Size of non-streaming response bodies.', SIZE_BUCKETS)
+
+    @property
+    def histograms(self):
+        return [
+            self.duration, self.db_duration, self.db_queries,
+            self.serialize_duration, self.render_duration, self.response_size,
+        ]
+
+    def record(self, labels, metrics, total, size):
+        self.duration.observe(labels, total)
+        self.db_duration.observe(labels, metrics.db_time)
+        self.db_queries.observe(labels, metrics.queries)
+        self.serialize_duration.observe(labels, metrics.serialize_time)
+        self.render_duration.observe(labels, metrics.render_time)
+        if size is not None:
+            self.response_size.observe(labels, size)
+
+    def expose(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.expose())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for histogram in self.histograms:
+            histogram.clear()
+
+
+registry = MetricsRegistry()
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting the queries and DB time of the current
+    request; slow queries are logged for a sample of them.
+    """
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.db_time += elapsed
+        if elapsed >= metrics.slow_query_seconds and random.random() < metrics.slow_query_sample_rate:
+            logger.warning('Slow query (%.1f ms) on %s: %s', elapsed * 1000, context['connection'].alias, sql)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver installing ``query_timer`` once per
+    connection, innermost so it times the query alone.
+    """
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Add the time of the block, minus its queries, to the serializer time of
+    the request. Nested blocks are counted once.
+    """
+    metrics = _request_metrics.get()
+    if metrics is None or metrics.depth:
+        yield
+        return
+    metrics.depth += 1
+    start = time.perf_counter()
+    db_time = metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.depth -= 1
+        metrics.serialize_time += time.perf_counter() - start - (metrics.db_time - db_time)
+
+
+def render_timed(response):
+    """
+    Render a DRF response now, adding the time to the request's render time.
+    """
+    if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        metrics = _request_metrics.get()
+        start = time.perf_counter()
+        response.render()
+        if metrics is not None:
+            metrics.render_time += time.perf_counter() - start
+    return response
+
+
+class InstrumentedSerializerMixin:
+    """
+    Serializer (and list serializer) mixin timing ``.data``.
+    """
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class InstrumentedViewMixin:
+    """
+    ``APIView`` mixin rendering the response inside the view, so its render
+    time is recorded apart from the rest of the request.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return render_timed(response)
+
+
+def server_timing(metrics, total):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+        f'render;dur={metrics.render_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+class PerformanceMiddleware:
+    """
+    Record wall time, DB queries and time, serializer and render time and
+    response size per endpoint (method and URL pattern) in ``registry``,
+    and report them in a ``Server-Timing`` header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        options = get_options()
+        if not options['ENABLED']:
+            return self.get_response(request)
+        metrics = RequestMetrics(options)
+        token = _request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.finish(request, response, metrics, options)
+
+    async def __acall__(self, request):
+        options = get_options()
+        if not options['ENABLED']:
+            return await self.get_response(request)
+        metrics = RequestMetrics(options)
+        token = _request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.finish(request, response, metrics, options)
+
+    def finish(self, request, response, metrics, options):
+        total = time.perf_counter() - metrics.start
+        match = request.resolver_match
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        labels = (('method', method), ('route', match.route if match is not None else 'unmatched'))
+        size = None if response.streaming else len(response.content)
+        registry.record(labels, metrics, total, size)
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(metrics, total)
+        return response
@@ -0,0 +1,82 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from app.filters import PRODUCT_FILTER_PARAMS, filter_products
+from app.models import FoodProduct
+
+SAMPLE_VALUES = {
+    'min_price': '100',
+    'max_price': '300',
+    'average_rating': '4',
+    'category': 'Pizza',
+    'toppings': 'Cheese',
+    'type': 'Veg',
+}
+
+SEQ_SCAN_MARKERS = {
+    'postgresql': ('Seq Scan on app_foodproduct',),
+    'sqlite': ('SCAN app_foodproduct',),
+}
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN for every combination of the product list filters and report sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--params', nargs='+', choices=PRODUCT_FILTER_PARAMS, default=PRODUCT_FILTER_PARAMS,
+            help="Filter parameters to combine (default: all).",
+        )
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help="Postgres only: disable seq scans while planning, so a remaining seq scan means no usable index.",
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not only the failing ones.")
+        parser.add_argument('--fail', action='store_true', help="Exit with an error if any plan uses a seq scan.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        markers = SEQ_SCAN_MARKERS.get(vendor)
+        if markers is None:
+            raise CommandError(f"Seq scan detection is not supported for the {vendor} backend.")
+        if options['force_index'] and vendor != 'postgresql':
+            raise CommandError("--force-index is only supported on PostgreSQL.")
+
+        failures = []
+        params = options['params']
+        for size in range(1, len(params) + 1):
+            for combination in combinations(params, size):
+                query_params = QueryDict(mutable=True)
+                for param in combination:
+                    query_params[param] = SAMPLE_VALUES[param]
+                label = '&'.join(f'{param}={query_params[param]}' for param in combination)
+                try:
+                    plan = self.explain(query_params, options['force_index'])
+                except Exception as e:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'ERROR     {label}: {e}'))
+                    continue
+
+                seq_scan = any(marker in plan for marker in markers)
+                if seq_scan:
+                    failures.append(label)
+                    self.stdout.write(self.style.WARNING(f'SEQ SCAN  {label}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'INDEXED   {label}'))
+                if seq_scan or options['verbose_plans']:
+                    self.stdout.write(plan + '\n')
+
+        self.stdout.write(f'{len(failures)} of the checked filter combinations fall back to a seq scan or failed.')
+        if failures and options['fail']:
+            raise CommandError(f"Seq scans or errors found for: {', '.join(failures)}")
+
+    def explain(self, query_params, force_index):
+        queryset = filter_products(FoodProduct.objects.all(), query_params).order_by('id')
+        with transaction.atomic():
+            if force_index:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
@@ -0,0 +1,49 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.exporters import FORMAT_CONTENT_TYPES, FORMAT_NDJSON, ExportError, export_queryset, iter_export, parse_updated_since
+
+
+class Command(BaseCommand):
+    help = "Stream the whole menu with customizations as NDJSON or a JSON array ('-' writes stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-')
+        parser.add_argument('--format', choices=list(FORMAT_CONTENT_TYPES), default=FORMAT_NDJSON)
+        parser.add_argument('--gzip', action='store_true', help="Compress the output.")
+        parser.add_argument('--updated-since', help="Only products updated at or after this ISO 8601 time.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            updated_since = parse_updated_since(options['updated_since'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        path = options['path']
+        start = time.perf_counter()
+        chunks = (chunk.encode() for chunk in iter_export(export_queryset(updated_since), options['format'], options['chunk_size']))
+        try:
+            if path == '-':
+                self.write(chunks, sys.stdout.buffer, options['gzip'])
+                sys.stdout.buffer.flush()
+            else:
+                with open(path, 'wb') as output:
+                    self.write(chunks, output, options['gzip'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(f"Menu exported to {path} in {time.perf_counter() - start:.2f}s"))
+
+    def write(self, chunks, output, compress):
+        if compress:
+            output = gzip.GzipFile(fileobj=output, mode='wb')
+        for chunk in chunks:
+            output.write(chunk)
+        if compress:
+            # Writes the gzip trailer; the underlying stream stays open.
+            output.close()
@@ -0,0 +1,48 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.importers import FORMAT_CSV, FORMAT_JSON, FORMAT_NDJSON, ImportFormatError, MenuImporter, iter_rows
+
+EXTENSION_FORMATS = {
+    '.json': FORMAT_JSON,
+    '.ndjson': FORMAT_NDJSON,
+    '.jsonl': FORMAT_NDJSON,
+    '.csv': FORMAT_CSV,
+}
+
+
+class Command(BaseCommand):
+    help = "Bulk import a menu from a JSON array, NDJSON or CSV file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=[FORMAT_JSON, FORMAT_NDJSON, FORMAT_CSV])
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--max-errors', type=int, default=20, help="Number of row errors to print.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or EXTENSION_FORMATS.get(Path(path).suffix.lower())
+        if file_format is None:
+            raise CommandError("Cannot infer the format from the file name, pass --format.")
+
+        start = time.perf_counter()
+        try:
+            if path == '-':
+                result = MenuImporter(options['chunk_size']).run(iter_rows(sys.stdin, file_format))
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    result = MenuImporter(options['chunk_size']).run(iter_rows(stream, file_format))
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for error in result.errors[:options['max_errors']]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        rate = result.created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} products imported, {len(result.errors)} failed in {elapsed:.2f}s ({rate:.0f} rows/sec)"
+        ))
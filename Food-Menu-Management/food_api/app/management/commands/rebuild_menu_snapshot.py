@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pre-rendered menu snapshot of every product from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_snapshots(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} menu snapshots in {time.perf_counter() - start:.2f}s"))
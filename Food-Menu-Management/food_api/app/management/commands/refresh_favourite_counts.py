@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.models import FoodProduct
+
+
+class Command(BaseCommand):
+    help = "Recompute every product's favourite count from the favourites table."
+
+    def handle(self, *args, **options):
+        updated = FoodProduct.objects.refresh_favourite_counts()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the favourite counts of {updated} products"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_alter_foodproduct_fvrt_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['category', 'product_type', 'price'], name='food_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['product_type', 'price'], name='food_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['price', 'id'], name='food_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['average_rating'], name='food_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_foodproduct_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Topping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomizationTopping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.customization')),
+                ('topping', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.topping')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customization',
+            name='topping_items',
+            field=models.ManyToManyField(blank=True, related_name='customizations', through='app.CustomizationTopping', to='app.topping'),
+        ),
+        migrations.AddIndex(
+            model_name='customizationtopping',
+            index=models.Index(fields=['topping', 'customization'], name='topping_customization_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customizationtopping',
+            constraint=models.UniqueConstraint(fields=('customization', 'topping'), name='unique_customization_topping'),
+        ),
+    ]
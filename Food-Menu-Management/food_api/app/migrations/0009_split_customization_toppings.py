@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def split_toppings(text):
+    names = (name.strip().lower() for name in (text or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def forwards(apps, schema_editor):
+    Customization = apps.get_model('app', 'Customization')
+    Topping = apps.get_model('app', 'Topping')
+    CustomizationTopping = apps.get_model('app', 'CustomizationTopping')
+
+    batch = []
+    topping_ids = {}
+    for customization_id, toppings in Customization.objects.values_list('id', 'toppings').iterator(chunk_size=2000):
+        for name in split_toppings(toppings):
+            if name not in topping_ids:
+                topping_ids[name] = Topping.objects.get_or_create(name=name)[0].id
+            batch.append(CustomizationTopping(customization_id=customization_id, topping_id=topping_ids[name]))
+        if len(batch) >= 2000:
+            CustomizationTopping.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    CustomizationTopping.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backwards(apps, schema_editor):
+    apps.get_model('app', 'CustomizationTopping').objects.all().delete()
+    apps.get_model('app', 'Topping').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_topping'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,55 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the auto-created ``fvrt_by`` join table into the explicit Favourite
+    model without copying rows: the model adopts the existing table and
+    columns, then gains ``created_at`` and a user-first index.
+    """
+
+    dependencies = [
+        ('app', '0010_catalogversion'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Favourite',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('food_product', models.ForeignKey(db_column='foodproduct_id', on_delete=django.db.models.deletion.CASCADE, to='app.foodproduct')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'app_foodproduct_fvrt_by',
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='foodproduct',
+                    name='fvrt_by',
+                    field=models.ManyToManyField(blank=True, through='app.Favourite', to=settings.AUTH_USER_MODEL),
+                ),
+                # The auto-created table already has a unique (foodproduct_id, user_id)
+                # constraint, under a generated name; 0017 renames it to this one.
+                migrations.AddConstraint(
+                    model_name='favourite',
+                    constraint=models.UniqueConstraint(fields=('food_product', 'user'), name='unique_favourite'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='favourite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='favourite',
+            index=models.Index(fields=['user', 'created_at'], name='favourite_user_idx'),
+        ),
+    ]
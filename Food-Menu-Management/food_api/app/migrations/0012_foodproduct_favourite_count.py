@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_favourite_counts(apps, schema_editor):
+    FoodProduct = apps.get_model('app', 'FoodProduct')
+    Favourite = apps.get_model('app', 'Favourite')
+    counts = Favourite.objects.filter(food_product=OuterRef('pk')).order_by().values('food_product')
+    counts = counts.annotate(total=Count('pk')).values('total')
+    FoodProduct.objects.update(favourite_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_favourite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodproduct',
+            name='favourite_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_favourite_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['-favourite_count', 'id'], name='food_favourites_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['category', 'product_type', '-favourite_count'], name='food_catalog_favourites_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_foodproduct_favourite_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodproduct',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['updated_at', 'id'], name='food_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_foodproduct_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customization',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='FoodProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at', 'food_id'], name='tombstone_deleted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Postgres only: other databases keep the column empty and search through the
+# in-process index in app.search. The indexes and the backfill are vendor-gated
+# SQL rather than GinIndex/TrigramExtension operations, which would run on
+# SQLite too. SearchVectorField itself is a plain field that imports without
+# psycopg.
+CREATE_SEARCH_INDEXES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS food_search_idx ON app_foodproduct USING gin (search_vector)',
+    'CREATE INDEX IF NOT EXISTS food_name_trgm_idx ON app_foodproduct USING gin (name gin_trgm_ops)',
+]
+
+DROP_SEARCH_INDEXES = [
+    'DROP INDEX IF EXISTS food_name_trgm_idx',
+    'DROP INDEX IF EXISTS food_search_idx',
+]
+
+BACKFILL_SEARCH_VECTORS = """
+    UPDATE app_foodproduct AS food SET search_vector =
+        setweight(to_tsvector('english', coalesce(food.name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(food.category, '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(customization.toppings, ' ')
+            FROM app_customization AS customization
+            WHERE customization.food_product_id = food.id
+        ), '')), 'B')
+        || setweight(to_tsvector('english', coalesce(food.description, '')), 'C')
+"""
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in CREATE_SEARCH_INDEXES:
+        schema_editor.execute(statement)
+    schema_editor.execute(BACKFILL_SEARCH_VECTORS)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_SEARCH_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodproduct',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_foodproduct_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSnapshot',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('average_rating', models.FloatField()),
+                ('category', models.CharField(max_length=50)),
+                ('product_type', models.CharField(max_length=10)),
+                ('updated_at', models.DateTimeField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'product_type', 'price'], name='snapshot_catalog_idx'), models.Index(fields=['product_type', 'price'], name='snapshot_type_price_idx'), models.Index(fields=['price', 'id'], name='snapshot_price_id_idx'), models.Index(fields=['average_rating'], name='snapshot_rating_idx')],
+            },
+        ),
+    ]
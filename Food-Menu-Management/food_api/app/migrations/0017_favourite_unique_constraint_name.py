@@ -0,0 +1,39 @@
+from django.db import migrations
+
+CONSTRAINT_NAME = 'unique_favourite'
+
+
+def name_unique_constraint(apps, schema_editor):
+    """
+    Migration 0011 declared ``unique_favourite`` in the state only, while the
+    adopted join table kept the unique constraint Django generated for it.
+    Replace that one with ``unique_favourite`` so later constraint
+    operations find it. SQLite already rebuilt the table from the state
+    when 0011 added ``created_at``, so it usually has nothing to do.
+    """
+    Favourite = apps.get_model('app', 'Favourite')
+    constraint = next(item for item in Favourite._meta.constraints if item.name == CONSTRAINT_NAME)
+    columns = [Favourite._meta.get_field(field).column for field in constraint.fields]
+    names = schema_editor._constraint_names(Favourite, columns, unique=True, primary_key=False)
+    generated = [name for name in names if name != CONSTRAINT_NAME]
+    if not generated:
+        return
+    if schema_editor.connection.vendor == 'sqlite':
+        # SQLite cannot drop a table constraint; rebuild the table from the state.
+        schema_editor._remake_table(Favourite)
+        return
+    if CONSTRAINT_NAME not in names:
+        schema_editor.add_constraint(Favourite, constraint)
+    for name in generated:
+        schema_editor.execute(schema_editor._delete_unique_sql(Favourite, name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_menusnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(name_unique_constraint, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_favourite_unique_constraint_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_revocation',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_user_token_revocation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='foodproducttombstone',
+            name='tombstone_deleted_idx',
+        ),
+        migrations.AddField(
+            model_name='foodproduct',
+            name='change_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='foodproducttombstone',
+            name='change_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='foodproduct',
+            index=models.Index(fields=['change_version', 'id'], name='food_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodproducttombstone',
+            index=models.Index(fields=['change_version', 'food_id'], name='tombstone_change_idx'),
+        ),
+    ]
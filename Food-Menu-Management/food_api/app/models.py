@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser,BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import EmailValidator
+from django.utils import timezone
 
 class UserManager(BaseUserManager):
 
@@ -30,6 +33,8 @@ class User(AbstractBaseUser):
     city = models.CharField(max_length = 100)
     is_admin = models.BooleanField(default = False)
     created_at = models.DateTimeField(auto_now_add = True)
+    # Set by app.authentication.revoke_user_tokens; tokens issued before it changed are rejected.
+    token_revocation = models.BigIntegerField(default=0, editable=False)
     username = None
     is_staff = None
 
@@ -38,6 +43,37 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["full_name",'age','city']
 
+class FoodProductQuerySet(models.QuerySet):
+    menu_fields = ['id', 'name', 'description', 'price', 'average_rating', 'category', 'product_type']
+    customization_fields = ['id', 'name', 'group', 'toppings', 'food_product_id']
+
+    def with_menu_relations(self, *extra_fields, fields=None, customizations=True):
+        """
+        Load exactly what FoodProductSerializer renders: the menu columns (or
+        just ``fields``) plus, unless ``customizations`` is off, all
+        customizations in a single extra query for the whole result set.
+        """
+        queryset = self.only(*(fields or self.menu_fields), *extra_fields)
+        if not customizations:
+            return queryset
+        return queryset.prefetch_related(
+            models.Prefetch('customizations', queryset=Customization.objects.only(*self.customization_fields))
+        )
+
+    def adjust_favourite_counts(self, food_ids, delta):
+        if food_ids:
+            self.filter(pk__in=food_ids).update(favourite_count=models.F('favourite_count') + delta)
+
+    def refresh_favourite_counts(self):
+        """
+        Recompute every favourite count from the join table, e.g. after rows
+        were deleted with raw SQL (``manage.py refresh_favourite_counts``).
+        """
+        counts = Favourite.objects.filter(food_product=models.OuterRef('pk')).order_by().values('food_product')
+        counts = counts.annotate(total=models.Count('pk')).values('total')
+        return self.update(favourite_count=Coalesce(models.Subquery(counts), 0))
+
+
 class FoodProduct(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -45,13 +81,230 @@ class FoodProduct(models.Model):
     average_rating = models.FloatField()
     category = models.CharField(max_length=50)
     product_type = models.CharField(max_length=10, choices=[('Veg', 'Vegetarian'), ('NonVeg', 'Non-Vegetarian')])
-    fvrt_by = models.ManyToManyField('User',blank=True)
+    fvrt_by = models.ManyToManyField('User',blank=True,through='Favourite')
+    # Maintained by Favourite.objects.add/remove, so rankings never count the join table.
+    favourite_count = models.PositiveIntegerField(default=0)
+    # Bumped by FoodProductSerializer when the product or its customizations change.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Catalog version of the last write, in commit order; app.changes reads it.
+    change_version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Postgres only, kept up to date by app.search.update_search_vectors. Its GIN
+    # index and the trigram index on name are created in migration 0015.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = FoodProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Matches the products filter API: category__in + product_type + price range.
+            models.Index(fields=['category', 'product_type', 'price'], name='food_catalog_idx'),
+            models.Index(fields=['product_type', 'price'], name='food_type_price_idx'),
+            # Price range filters and keyset pagination ordered by (price, id).
+            models.Index(fields=['price', 'id'], name='food_price_id_idx'),
+            models.Index(fields=['average_rating'], name='food_rating_idx'),
+            # Top-N "most favourited" lists, overall and per category/type.
+            models.Index(fields=['-favourite_count', 'id'], name='food_favourites_idx'),
+            models.Index(fields=['category', 'product_type', '-favourite_count'], name='food_catalog_favourites_idx'),
+            # Exports of what changed since a point in time.
+            models.Index(fields=['updated_at', 'id'], name='food_updated_idx'),
+            # Change feed order.
+            models.Index(fields=['change_version', 'id'], name='food_change_idx'),
+        ]
     
     def __str__(self):
         return f'{self.name} : {self.price}'
 
+def split_toppings(text):
+    """
+    Split a free-text toppings value ("Salmon, Tuna, Shrimp") into unique,
+    lower-cased topping names in their original order.
+    """
+    names = (name.strip().lower() for name in (text or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class FavouriteManager(models.Manager):
+
+    def add(self, user, food_ids):
+        """
+        Favourite ``food_ids`` for ``user`` with a single
+        ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` and bump the
+        favourite counts of the newly favourited foods. Unknown foods and
+        existing favourites are skipped; returns the ids of the new favourites.
+        """
+        food_ids = list(dict.fromkeys(food_ids))
+        if not food_ids:
+            return []
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        food_table = quote(FoodProduct._meta.db_table)
+        user_column = quote(self.model._meta.get_field('user').column)
+        food_column = quote(self.model._meta.get_field('food_product').column)
+        placeholders = ', '.join(['%s'] * len(food_ids))
+        sql = (
+            f'INSERT INTO {table} ({user_column}, {food_column}, {quote("created_at")}) '
+            f'SELECT %s, {quote("id")}, %s FROM {food_table} WHERE {quote("id")} IN ({placeholders}) '
+            f'ON CONFLICT DO NOTHING RETURNING {food_column}'
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, timezone.now(), *food_ids])
+                added = [row[0] for row in cursor.fetchall()]
+            FoodProduct.objects.adjust_favourite_counts(added, 1)
+        return added
+
+    def remove(self, user, food_ids):
+        """
+        Unfavourite ``food_ids`` for ``user`` with a single ``DELETE`` and
+        decrement the affected favourite counts. Returns the removed food ids.
+        """
+        food_ids = list(dict.fromkeys(food_ids))
+        if not food_ids:
+            return []
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        user_column = quote(self.model._meta.get_field('user').column)
+        food_column = quote(self.model._meta.get_field('food_product').column)
+        placeholders = ', '.join(['%s'] * len(food_ids))
+        sql = (
+            f'DELETE FROM {table} WHERE {user_column} = %s AND {food_column} IN ({placeholders}) '
+            f'RETURNING {food_column}'
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, *food_ids])
+                removed = [row[0] for row in cursor.fetchall()]
+            FoodProduct.objects.adjust_favourite_counts(removed, -1)
+        return removed
+
+
+class Favourite(models.Model):
+    user = models.ForeignKey('User', on_delete=models.CASCADE)
+    food_product = models.ForeignKey(FoodProduct, on_delete=models.CASCADE, db_column='foodproduct_id')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = FavouriteManager()
+
+    class Meta:
+        # Keeps the table of the former auto-created fvrt_by through model.
+        db_table = 'app_foodproduct_fvrt_by'
+        constraints = [
+            models.UniqueConstraint(fields=['food_product', 'user'], name='unique_favourite'),
+        ]
+        indexes = [
+            # User-first for "my favourites" lookups.
+            models.Index(fields=['user', 'created_at'], name='favourite_user_idx'),
+        ]
+
+
+def release_favourites(sender, instance, **kwargs):
+    """
+    ``pre_delete`` receiver for ``User``: the cascade deletes the user's
+    favourites without ``Favourite.objects.remove``, so their counts are
+    decremented here, in the delete's transaction.
+    """
+    food_ids = list(Favourite.objects.filter(user=instance).values_list('food_product_id', flat=True))
+    FoodProduct.objects.adjust_favourite_counts(food_ids, -1)
+
+
+class ToppingManager(models.Manager):
+
+    def link(self, customizations):
+        """
+        Rebuild the normalized topping rows of ``customizations`` from their
+        ``toppings`` text in a fixed number of queries.
+        """
+        names_by_customization = {customization.pk: split_toppings(customization.toppings) for customization in customizations}
+        if not names_by_customization:
+            return
+        all_names = set().union(*names_by_customization.values())
+        self.bulk_create([self.model(name=name) for name in all_names], ignore_conflicts=True)
+        topping_ids = dict(self.filter(name__in=all_names).values_list('name', 'id'))
+
+        CustomizationTopping.objects.filter(customization_id__in=names_by_customization).delete()
+        CustomizationTopping.objects.bulk_create([
+            CustomizationTopping(customization_id=customization_id, topping_id=topping_ids[name])
+            for customization_id, names in names_by_customization.items()
+            for name in names
+        ])
+
+
+class Topping(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+
+    objects = ToppingManager()
+
+    def __str__(self):
+        return self.name
+
 class Customization(models.Model):
     name = models.CharField(max_length=255)
     group = models.CharField(max_length=50)
+    # Display value as entered; the normalized copy in topping_items is what filters use.
     toppings = models.TextField()
-    food_product = models.ForeignKey(FoodProduct, on_delete=models.CASCADE, related_name='customizations')
\ No newline at end of file
+    topping_items = models.ManyToManyField(Topping, through='CustomizationTopping', related_name='customizations', blank=True)
+    food_product = models.ForeignKey(FoodProduct, on_delete=models.CASCADE, related_name='customizations')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+class CustomizationTopping(models.Model):
+    customization = models.ForeignKey(Customization, on_delete=models.CASCADE)
+    topping = models.ForeignKey(Topping, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customization', 'topping'], name='unique_customization_topping'),
+        ]
+        indexes = [
+            # Topping-first for the products topping filter semi-join.
+            models.Index(fields=['topping', 'customization'], name='topping_customization_idx'),
+        ]
+
+
+class FoodProductTombstone(models.Model):
+    """
+    Marks a deleted product so the change feed can report the deletion.
+    """
+    food_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    change_version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Change feed order, same as food_change_idx.
+            models.Index(fields=['change_version', 'food_id'], name='tombstone_change_idx'),
+        ]
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped on every catalog write. Cached catalog
+    responses are keyed on it, so a bump invalidates them immediately, and
+    the change feed orders writes by it.
+    """
+    version = models.PositiveBigIntegerField(default=1)
+
+
+class MenuSnapshot(models.Model):
+    """
+    One row per product holding its full menu JSON as rendered by the list
+    endpoints, next to copies of the columns they filter on, so listings
+    can be answered from this table alone. ``id`` is the product's id.
+    Kept up to date by app.snapshots.refresh_snapshots on every write path;
+    ``manage.py rebuild_menu_snapshot`` rebuilds it from scratch.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    average_rating = models.FloatField()
+    category = models.CharField(max_length=50)
+    product_type = models.CharField(max_length=10)
+    # The product's updated_at the body was rendered from.
+    updated_at = models.DateTimeField()
+    body = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'product_type', 'price'], name='snapshot_catalog_idx'),
+            models.Index(fields=['product_type', 'price'], name='snapshot_type_price_idx'),
+            models.Index(fields=['price', 'id'], name='snapshot_price_id_idx'),
+            models.Index(fields=['average_rating'], name='snapshot_rating_idx'),
+        ]
@@ -0,0 +1,73 @@
+import hashlib
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .cache import get_cache, get_catalog_version
+from .models import FoodProduct
+
+OFFER_COUNT = 3
+MIN_DISCOUNT = 10
+MAX_DISCOUNT = 30
+CENT = Decimal('0.01')
+
+
+def offer_seed(user_id, day):
+    return int.from_bytes(hashlib.sha256(f'{user_id}:{day.isoformat()}'.encode()).digest()[:8], 'big')
+
+
+def sample_food_ids(rng, count, max_attempts=10):
+    """
+    Pick up to ``count`` distinct product ids without reading the table:
+    draw a random point in the id range and take the first id at or after
+    it, which is a single primary key index probe per pick.
+    """
+    bounds = FoodProduct.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+
+    picked = []
+    for _ in range(count * max_attempts):
+        if len(picked) == count:
+            break
+        point = rng.randint(bounds['low'], bounds['high'])
+        food_id = (
+            FoodProduct.objects.filter(id__gte=point).exclude(id__in=picked)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if food_id is None:
+            # Past the last free id: wrap around to the start of the range.
+            food_id = FoodProduct.objects.exclude(id__in=picked).order_by('id').values_list('id', flat=True).first()
+        if food_id is None:
+            break
+        picked.append(food_id)
+    return picked
+
+
+def get_daily_offers(user, day=None):
+    """
+    Return ``[(food_id, discount_percent), ...]`` for ``user`` on ``day``.
+
+    The choice is seeded by user and day, so repeated calls agree, and it is
+    cached until the day or the catalog changes.
+    """
+    day = day or timezone.localdate()
+    cache = get_cache()
+    cache_key = f'offers:{get_catalog_version()}:{user.pk}:{day.isoformat()}'
+    offers = cache.get(cache_key)
+    if offers is None:
+        rng = random.Random(offer_seed(user.pk, day))
+        offers = [(food_id, rng.randint(MIN_DISCOUNT, MAX_DISCOUNT)) for food_id in sample_food_ids(rng, OFFER_COUNT)]
+        cache.set(cache_key, offers, timeout=24 * 60 * 60)
+    return offers
+
+
+def apply_discount(price, percent):
+    """
+    Return ``(discounted_price, amount_off)`` rounded to cents.
+    """
+    price = Decimal(price)
+    off = (price * percent / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    return price - off, off
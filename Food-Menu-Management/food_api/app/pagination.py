@@ -0,0 +1,171 @@
+import base64
+import json
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .fast_serializers import aserializer_data
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset ("seek") pagination.
+
+    Pages are selected with a ``WHERE (price, id) > (last_price, last_id)``
+    predicate instead of an OFFSET, so fetching page 1000 costs the same as
+    fetching page 1. Pass ``cursor=`` (empty) to request the first page and
+    follow the ``next`` link afterwards.
+    """
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    limit_query_param = 'limit'
+    default_limit = 20
+    max_limit = 100
+    default_ordering = 'id'
+    orderings = {
+        'id': ('id',),
+        'price': ('price', 'id'),
+    }
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if self.ordering not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Must be one of {', '.join(self.orderings)}"})
+
+        self.fields = self.orderings[self.ordering]
+        queryset = queryset.order_by(*self.fields)
+        if queryset.query.values_select:
+            # Sparse .values() rows still need the ordering columns for the cursor.
+            queryset = queryset.values(*dict.fromkeys([*queryset.query.values_select, *self.fields]))
+        position = self.decode_cursor(request, self.fields)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(self.fields, position))
+        return queryset[:self.limit + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([obj async for obj in self.page_queryset(queryset, request)])
+
+    def get_page(self, results):
+        self.has_next = len(results) > self.limit
+        results = results[:self.limit]
+        last = results[-1] if results else None
+        if last is None:
+            self.next_position = None
+        elif isinstance(last, dict):
+            # .values() rows of the fast read serializer.
+            self.next_position = [last[field] for field in self.fields]
+        else:
+            self.next_position = [getattr(last, field) for field in self.fields]
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit,
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def position_filter(self, fields, position):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index in reversed(range(len(fields))):
+            equal = {field: value for field, value in zip(fields[:index], position[:index])}
+            step = Q(**equal, **{f'{fields[index]}__gt': position[index]})
+            condition = step | condition if condition else step
+        return condition
+
+    def encode_cursor(self, position):
+        payload = json.dumps([str(value) for value in position]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if len(values) != len(fields):
+                raise ValueError
+            return [int(value) if field == 'id' else Decimal(value) for field, value in zip(fields, values)]
+        except (TypeError, ValueError, InvalidOperation):
+            raise NotFound('Invalid cursor')
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """
+    ``LimitOffsetPagination`` that can also paginate from async views.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [obj async for obj in queryset[self.offset:self.offset + self.limit]]
+
+
+class QuerysetPaginationMixin:
+    """
+    Paginates a queryset before it is serialized so only the requested page
+    is loaded from the database.
+    """
+    pagination_class = AsyncLimitOffsetPagination
+    keyset_pagination_class = KeysetPagination
+
+    def get_paginator(self):
+        if self.keyset_pagination_class.is_requested(self.request):
+            return self.keyset_pagination_class()
+        return self.pagination_class()
+
+    def get_paginated_data(self, queryset, serializer_class, **serializer_kwargs):
+        paginator = self.get_paginator()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        if page is None:
+            return None
+        serializer = serializer_class(page, many=True, **serializer_kwargs)
+        return paginator.get_paginated_response(serializer.data)
+
+    async def aget_paginated_data(self, queryset, serializer_class, **serializer_kwargs):
+        paginator = self.get_paginator()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        if page is None:
+            return None
+        serializer = serializer_class(page, many=True, **serializer_kwargs)
+        return paginator.get_paginated_response(await aserializer_data(serializer))
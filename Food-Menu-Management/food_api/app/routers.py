@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+REPLICA_DATABASE = 'replica'
+REPLICA_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Set on the responses of writes: until the time it holds, the client's
+# reads stay on the primary.
+REPLICA_PIN_COOKIE = 'primary_reads_until'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route the ORM reads made inside the block to the replica, when one is
+    configured.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Route the ORM reads made inside the block to the primary, even within
+    ``replica_reads()``.
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_from_replica():
+    return _replica_reads.get() and REPLICA_DATABASE in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads made within ``replica_reads()`` (GET requests, see
+    ``ReplicaReadsMiddleware``) to the ``replica`` alias and everything else
+    to ``default``. Writes, and reads of requests that write, stay on the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+
+def reads_from_replica(request):
+    """
+    Whether ``request`` is a GET, HEAD or OPTIONS request of a client that
+    has not written within the last ``REPLICA_PIN_SECONDS``.
+    """
+    if request.method not in REPLICA_METHODS:
+        return False
+    try:
+        pinned_until = int(request.COOKIES.get(REPLICA_PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    return pinned_until <= time.time()
+
+
+def pin_to_primary(request, response):
+    """
+    Keep the reads of the client that sent the write ``request`` on the
+    primary for ``REPLICA_PIN_SECONDS``, so it reads its own writes while
+    the replica catches up.
+    """
+    if request.method in REPLICA_METHODS:
+        return response
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    response.set_cookie(
+        REPLICA_PIN_COOKIE, str(int(time.time()) + seconds), max_age=seconds, httponly=True, samesite='Lax',
+    )
+    return response
+
+
+class ReplicaReadsMiddleware:
+    """
+    Serve GET, HEAD and OPTIONS requests from the replica. A client that
+    keeps cookies reads from the primary for ``REPLICA_PIN_SECONDS`` after
+    each of its writes; cached catalog responses only come from the replica
+    once it has caught up with the catalog version (see ``app.cache``). The
+    body of a streaming response is produced after the middleware returns,
+    so it is read from the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not reads_from_replica(request):
+            return pin_to_primary(request, self.get_response(request))
+        with replica_reads():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not reads_from_replica(request):
+            return pin_to_primary(request, await self.get_response(request))
+        with replica_reads():
+            return await self.get_response(request)
@@ -0,0 +1,248 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection, connections
+from django.db.models import F, Q, Value
+
+from .cache import get_catalog_version
+from .filters import PRODUCT_FILTER_PARAMS, filter_products
+from .models import Customization, FoodProduct
+
+BACKEND_POSTGRES = 'postgres'
+BACKEND_MEMORY = 'memory'
+
+# Relative weight of a match per field, the Postgres defaults for the A/B/C
+# labels the search vector gives these fields.
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'category': 0.4,
+    'toppings': 0.4,
+    'description': 0.2,
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def get_search_backend():
+    return getattr(settings, 'SEARCH_BACKEND', None) or (
+        BACKEND_POSTGRES if connection.vendor == 'postgresql' else BACKEND_MEMORY
+    )
+
+
+def update_search_vectors(food_ids=None):
+    """
+    Recompute the stored search vector of ``food_ids`` (all products when
+    None) from name, category, customization toppings and description. A
+    no-op outside Postgres.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    food_table = quote(FoodProduct._meta.db_table)
+    customization_table = quote(Customization._meta.db_table)
+    food_column = quote(Customization._meta.get_field('food_product').column)
+    sql = f"""
+        UPDATE {food_table} AS food SET search_vector =
+            setweight(to_tsvector(%s::regconfig, coalesce(food.name, '')), 'A')
+            || setweight(to_tsvector(%s::regconfig, coalesce(food.category, '')), 'B')
+            || setweight(to_tsvector(%s::regconfig, coalesce((
+                SELECT string_agg(customization.toppings, ' ')
+                FROM {customization_table} AS customization
+                WHERE customization.{food_column} = food.id
+            ), '')), 'B')
+            || setweight(to_tsvector(%s::regconfig, coalesce(food.description, '')), 'C')
+    """
+    params = [settings.SEARCH_CONFIG] * 4
+    if food_ids is not None:
+        food_ids = list(food_ids)
+        if not food_ids:
+            return
+        sql += ' WHERE food.id = ANY(%s)'
+        params.append(food_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def background_rebuilds():
+    return getattr(settings, 'SEARCH_INDEX_BACKGROUND_REBUILD', True)
+
+
+def postgres_search(queryset, text):
+    """
+    Full-text match on the search vector, or a close trigram match on the
+    name for typos ("margarita" finds "Margherita"), best matches first.
+    """
+    query = SearchQuery(text, search_type='websearch', config=settings.SEARCH_CONFIG)
+    return queryset.annotate(
+        rank=SearchRank(F('search_vector'), query),
+        similarity=TrigramWordSimilarity(text, 'name'),
+    ).filter(
+        Q(search_vector=query) | Q(TrigramWordSimilar(F('name'), Value(text)))
+    ).order_by((F('rank') + F('similarity')).desc(), 'id')
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if len(token) > 1]
+
+
+def trigrams(term):
+    # Padded like pg_trgm, so word starts weigh more than word ends.
+    padded = f'  {term} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class InMemorySearchIndex:
+    """
+    Inverted index of the catalog for databases without full-text search.
+    Terms are matched exactly or by trigram similarity, every query word
+    has to match, and products are ranked by the summed field weights.
+    """
+
+    def __init__(self, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.postings = defaultdict(dict)
+        self.term_trigrams = {}
+        self.trigram_terms = defaultdict(set)
+
+    @classmethod
+    def build(cls, chunk_size=2000, **kwargs):
+        index = cls(**kwargs)
+        products = FoodProduct.objects.values_list('id', 'name', 'category', 'description')
+        for food_id, name, category, description in products.iterator(chunk_size=chunk_size):
+            index.add(food_id, 'name', name)
+            index.add(food_id, 'category', category)
+            index.add(food_id, 'description', description)
+        toppings = Customization.objects.values_list('food_product_id', 'toppings')
+        for food_id, text in toppings.iterator(chunk_size=chunk_size):
+            index.add(food_id, 'toppings', text)
+        return index
+
+    def add(self, food_id, field, text):
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            documents = self.postings[term]
+            if documents.get(food_id, 0) < weight:
+                documents[food_id] = weight
+            if term not in self.term_trigrams:
+                grams = self.term_trigrams[term] = trigrams(term)
+                for gram in grams:
+                    self.trigram_terms[gram].add(term)
+
+    def similar_terms(self, token):
+        grams = trigrams(token)
+        overlaps = defaultdict(int)
+        for gram in grams:
+            for term in self.trigram_terms.get(gram, ()):
+                overlaps[term] += 1
+        similar = {}
+        for term, overlap in overlaps.items():
+            similarity = overlap / (len(grams) + len(self.term_trigrams[term]) - overlap)
+            if similarity >= self.min_similarity:
+                similar[term] = similarity
+        return similar
+
+    def search(self, text):
+        """
+        Return ``[(food_id, score), ...]``, best match first.
+        """
+        scores = None
+        for token in tokenize(text):
+            token_scores = {}
+            for term, similarity in self.similar_terms(token).items():
+                for food_id, weight in self.postings[term].items():
+                    score = weight * similarity
+                    if score > token_scores.get(food_id, 0):
+                        token_scores[food_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {food_id: scores[food_id] + score for food_id, score in token_scores.items() if food_id in scores}
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+
+class SearchIndexCache:
+    """
+    One in-memory index per process, rebuilt when the catalog version moves.
+
+    Only the first search of a process builds the index inline. After that a
+    version change starts a rebuild on a background thread and searches keep
+    using the previous index until the new one replaces it, unless
+    ``SEARCH_INDEX_BACKGROUND_REBUILD`` is off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+        self._rebuild = None
+
+    def get(self):
+        version = get_catalog_version()
+        with self._lock:
+            if self._index is None or (self._version != version and not background_rebuilds()):
+                self._index = InMemorySearchIndex.build()
+                self._version = version
+            elif self._version != version and self._rebuild is None:
+                self._rebuild = threading.Thread(target=self._run_rebuild, args=(version,), name='search-index-rebuild', daemon=True)
+                self._rebuild.start()
+            return self._index
+
+    def _run_rebuild(self, version):
+        thread = threading.current_thread()
+        index = None
+        try:
+            index = InMemorySearchIndex.build()
+        finally:
+            connections.close_all()
+            with self._lock:
+                # A clear() while building discards the result.
+                if self._rebuild is thread:
+                    self._rebuild = None
+                    if index is not None:
+                        self._index = index
+                        self._version = version
+
+    @property
+    def stale(self):
+        """
+        Whether a background rebuild is running, i.e. searches are served
+        from an index older than the catalog.
+        """
+        return self._rebuild is not None
+
+    def wait(self, timeout=None):
+        """
+        Block until the running background rebuild, if any, is done.
+        """
+        rebuild = self._rebuild
+        if rebuild is not None:
+            rebuild.join(timeout)
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+            self._version = None
+            self._rebuild = None
+
+
+search_index = SearchIndexCache()
+
+
+def search_products(text, query_params, limit=20, offset=0):
+    """
+    Return ``(food_ids, count)``: one page of ranked matches for ``text``
+    that also pass the product list filters in ``query_params``.
+    """
+    if get_search_backend() == BACKEND_POSTGRES:
+        foods = postgres_search(filter_products(FoodProduct.objects.all(), query_params), text)
+        return list(foods.values_list('id', flat=True)[offset:offset + limit]), foods.count()
+
+    ranked = [food_id for food_id, _ in search_index.get().search(text)]
+    if any(param in query_params for param in PRODUCT_FILTER_PARAMS):
+        allowed = set(filter_products(FoodProduct.objects.all(), query_params).values_list('id', flat=True))
+        ranked = [food_id for food_id in ranked if food_id in allowed]
+    return ranked[offset:offset + limit], len(ranked)
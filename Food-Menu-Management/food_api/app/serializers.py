@@ -1,5 +1,16 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import User, FoodProduct, Customization
+from .cache import bump_catalog_version
+from .hashers import hash_password
+from .instrumentation import InstrumentedSerializerMixin
+from .models import User, FoodProduct, Customization, Topping
+from .search import update_search_vectors
+from .snapshots import refresh_snapshots
+
+
+def without_id(data):
+    return {field: value for field, value in data.items() if field != 'id'}
 
 
 class UserSignupSerializer(serializers.ModelSerializer):
@@ -17,11 +28,10 @@ class UserSignupSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, data):
-        password = data.pop('password2', '')
-        user = User.objects.create(**data)
-        user.set_password(password)
-        user.save()
-        return user
+        # Hash first so the user is stored with a single INSERT.
+        data.pop('password2', '')
+        password = hash_password(data.pop('password'))
+        return User.objects.create(password=password, **data)
     
 class UserLoginSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(max_length = 255)
@@ -31,43 +41,135 @@ class UserLoginSerializer(serializers.ModelSerializer):
 
 
 
+class InstrumentedListSerializer(InstrumentedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
 class CustomizationSerializer(serializers.ModelSerializer):
+    # Writable so updates can match existing customizations; ignored on create.
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = Customization
         fields = ['id', 'name', 'group', 'toppings']
-        read_only_fields = ['id']
 
-class FoodProductSerializer(serializers.ModelSerializer):
+class FoodProductSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     customizations = CustomizationSerializer(many=True)
 
     class Meta:
         model = FoodProduct
         fields = ['id', 'name', 'description', 'price', 'average_rating', 'category', 'product_type','customizations']
         read_only_fields = ['id','fvrt']
-
+        list_serializer_class = InstrumentedListSerializer
+
+    def __init__(self, *args, fields=None, include_customizations=True, **kwargs):
+        # Sparse fieldsets of the read endpoints, see app.fieldsets.
+        super().__init__(*args, **kwargs)
+        for name in list(self.fields):
+            if name == 'customizations' and not include_customizations:
+                self.fields.pop(name)
+            elif name != 'customizations' and fields is not None and name not in fields:
+                self.fields.pop(name)
+
+    @classmethod
+    def read_queryset(cls, queryset, fields=None, include_customizations=True):
+        return queryset.with_menu_relations(fields=fields, customizations=include_customizations)
+
+    @transaction.atomic
     def create(self, validated_data):
         customization_data = validated_data.pop('customizations')
-        food_product = FoodProduct.objects.create(**validated_data)
+        food_product = FoodProduct.objects.create(change_version=bump_catalog_version(), **validated_data)
 
-        for customization_item in customization_data:
-            Customization.objects.create(food_product=food_product, **customization_item)
+        customizations = Customization.objects.bulk_create([
+            Customization(food_product=food_product, **without_id(customization_item))
+            for customization_item in customization_data
+        ])
+        Topping.objects.link(customizations)
+        update_search_vectors([food_product.pk])
+        refresh_snapshots([food_product.pk])
 
         return food_product
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         customizations_data = validated_data.pop('customizations', None)
+        changed = False
         if customizations_data is not None:
-            instance.customizations.all().delete()
-            for customization_data in customizations_data:
-                Customization.objects.create(food_product=instance, **customization_data)
-
-        instance.name = validated_data.get('name', instance.name)
-        instance.description = validated_data.get('description', instance.description)
-        instance.price = validated_data.get('price', instance.price)
-        instance.average_rating = validated_data.get('average_rating', instance.average_rating)
-        instance.category = validated_data.get('category', instance.category)
-        instance.product_type = validated_data.get('product_type', instance.product_type)
-        instance.save()
+            changed = self.sync_customizations(instance, customizations_data)
+
+        update_fields = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        if changed or update_fields:
+            for field in update_fields:
+                setattr(instance, field, validated_data[field])
+            instance.change_version = bump_catalog_version()
+            # updated_at and change_version also track customization changes.
+            instance.save(update_fields=[*update_fields, 'updated_at', 'change_version'])
+            update_search_vectors([instance.pk])
+            refresh_snapshots([instance.pk])
 
         return instance
-    
+
+    def sync_customizations(self, instance, customizations_data):
+        """
+        Apply the incoming customizations as a diff: rows are matched by id,
+        then by (name, group), and the difference is written with one
+        bulk_update, one bulk_create and one delete. Returns whether anything
+        changed.
+        """
+        existing = {customization.pk: customization for customization in instance.customizations.all()}
+        by_name = {(customization.name, customization.group): customization for customization in existing.values()}
+        matched = set()
+        to_update = []
+        to_create = []
+        retopped = []
+        update_fields = set()
+
+        for item in customizations_data:
+            item = dict(item)
+            current = existing.get(item.pop('id', None)) or by_name.get((item['name'], item['group']))
+            if current is None or current.pk in matched:
+                to_create.append(Customization(food_product=instance, **item))
+                continue
+
+            matched.add(current.pk)
+            fields = [field for field, value in item.items() if getattr(current, field) != value]
+            if fields:
+                for field in fields:
+                    setattr(current, field, item[field])
+                update_fields.update(fields)
+                to_update.append(current)
+                if 'toppings' in fields:
+                    retopped.append(current)
+
+        stale = set(existing) - matched
+        if stale:
+            Customization.objects.filter(pk__in=stale).delete()
+        if to_update:
+            # bulk_update() does not apply auto_now.
+            now = timezone.now()
+            for customization in to_update:
+                customization.updated_at = now
+            Customization.objects.bulk_update(to_update, fields=sorted(update_fields | {'updated_at'}))
+        if to_create:
+            to_create = Customization.objects.bulk_create(to_create)
+
+        Topping.objects.link(to_create + retopped)
+        return bool(stale or to_update or to_create)
+
+
+class TrendingFoodSerializer(FoodProductSerializer):
+
+    class Meta(FoodProductSerializer.Meta):
+        fields = FoodProductSerializer.Meta.fields + ['favourite_count']
+        read_only_fields = ['id', 'favourite_count']
+
+
+class FavouriteBatchSerializer(serializers.Serializer):
+    ADD = 'add'
+    REMOVE = 'remove'
+
+    food_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    action = serializers.ChoiceField(choices=[ADD, REMOVE])
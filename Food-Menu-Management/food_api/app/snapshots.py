@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+
+from .cache import bump_catalog_version
+from .fast_serializers import FastFoodProductSerializer
+from .filters import filter_products
+from .models import FoodProduct, MenuSnapshot
+from .renderers import ORJSONRenderer
+
+SNAPSHOT_COLUMNS = ['price', 'average_rating', 'category', 'product_type', 'updated_at', 'body']
+FULL_FIELDSET = {'fields': None, 'include_customizations': True}
+
+
+def render_body(data):
+    return ORJSONRenderer().render(data).decode()
+
+
+def build_snapshots(rows):
+    """
+    ``MenuSnapshot`` objects of the ``FastFoodProductSerializer.read_queryset``
+    rows, their bodies rendered exactly as the list endpoints render them.
+    """
+    rows = list(rows)
+    products = FastFoodProductSerializer(rows, many=True).data
+    return [
+        MenuSnapshot(
+            id=row['id'],
+            price=row['price'],
+            average_rating=row['average_rating'],
+            category=row['category'],
+            product_type=row['product_type'],
+            updated_at=row['updated_at'],
+            body=render_body(data),
+        )
+        for row, data in zip(rows, products)
+    ]
+
+
+def refresh_snapshots(food_ids):
+    """
+    Re-render the snapshots of ``food_ids`` from the products as they are
+    now, dropping those of deleted products. Call it inside the write's
+    transaction so the snapshot commits with it.
+    """
+    food_ids = set(food_ids)
+    if not food_ids:
+        return
+    foods = FastFoodProductSerializer.read_queryset(FoodProduct.objects.filter(pk__in=food_ids).order_by('id'))
+    snapshots = build_snapshots(foods)
+    gone = food_ids - {snapshot.id for snapshot in snapshots}
+    if gone:
+        MenuSnapshot.objects.filter(pk__in=gone).delete()
+    if snapshots:
+        MenuSnapshot.objects.bulk_create(
+            snapshots, update_conflicts=True, unique_fields=['id'], update_fields=SNAPSHOT_COLUMNS,
+        )
+
+
+def delete_snapshots(food_ids):
+    """
+    Drop the snapshots of deleted products, without reading them back.
+    """
+    MenuSnapshot.objects.filter(pk__in=food_ids).delete()
+
+
+@transaction.atomic
+def rebuild_snapshots(batch_size=1000):
+    """
+    Replace every snapshot, ``batch_size`` products at a time, in one
+    transaction: readers keep seeing the old snapshots until it commits.
+    Returns the number of products.
+    """
+    MenuSnapshot.objects.all().delete()
+    foods = FastFoodProductSerializer.read_queryset(FoodProduct.objects.order_by('id'))
+    total = 0
+    last_id = None
+    while True:
+        batch = foods if last_id is None else foods.filter(id__gt=last_id)
+        rows = list(batch[:batch_size])
+        if not rows:
+            break
+        MenuSnapshot.objects.bulk_create(build_snapshots(rows))
+        total += len(rows)
+        last_id = rows[-1]['id']
+    # Cached responses may have been built from outdated snapshots.
+    bump_catalog_version()
+    return total
+
+
+def serves_snapshots(request, fieldset):
+    """
+    Whether a product list can be answered from snapshots: enabled with
+    ``MENU_SNAPSHOT_READS``, all fields requested and rendered as JSON.
+    """
+    return (
+        getattr(settings, 'MENU_SNAPSHOT_READS', False)
+        and fieldset == FULL_FIELDSET
+        and request.accepted_renderer.format == 'json'
+    )
+
+
+def snapshot_queryset(query_params):
+    return filter_products(MenuSnapshot.objects.order_by('id'), query_params).values('body')
+
+
+def snapshot_response(bodies, paginator=None):
+    """
+    JSON response of the pre-rendered ``bodies``, inside the paginator's
+    envelope when there is one. Produces the bytes ``ORJSONRenderer`` would.
+    """
+    results = ','.join(bodies).encode()
+    if paginator is None:
+        return HttpResponse(b'[' + results + b']', content_type='application/json')
+    envelope = ORJSONRenderer().render(paginator.get_paginated_response([]).data)
+    # The empty results list closes both envelopes: fill it in place.
+    return HttpResponse(envelope[:-2] + results + b']}', content_type='application/json')
+
+
+def get_snapshot_response(view, query_params):
+    """
+    The products list of ``view`` (a ``QuerysetPaginationMixin`` view) in
+    one query on the snapshot table, plus the count of limit/offset pages.
+    """
+    snapshots = snapshot_queryset(query_params)
+    paginator = view.get_paginator()
+    page = paginator.paginate_queryset(snapshots, view.request, view=view)
+    if page is None:
+        return snapshot_response(row['body'] for row in snapshots)
+    return snapshot_response((row['body'] for row in page), paginator)
+
+
+async def aget_snapshot_response(view, query_params):
+    snapshots = snapshot_queryset(query_params)
+    paginator = view.get_paginator()
+    page = await paginator.apaginate_queryset(snapshots, view.request, view=view)
+    if page is None:
+        return snapshot_response([row['body'] async for row in snapshots])
+    return snapshot_response((row['body'] for row in page), paginator)
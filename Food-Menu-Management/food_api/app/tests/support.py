@@ -0,0 +1,166 @@
+import os
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from ..authentication import user_cache
+from ..cache import get_cache
+from ..fast_serializers import product_cache
+from ..search import search_index
+from .workloads import SCENARIOS, ClientDriver, Workload, headers_for, seed_catalog, seed_favourites, seed_users
+
+Budget = namedtuple('Budget', 'queries ms')
+CatalogSize = namedtuple('CatalogSize', 'products favourites')
+
+# Most queries and milliseconds a request to each endpoint may take, on a
+# small and a large catalog alike; keyed by the scenarios of app.tests.workloads,
+# which cover every route. Query budgets always apply. Time budgets are loose
+# ceilings for a cold request on the test database and only apply with
+# TIME_BUDGET_SCALE set (1 as written, more on slow machines), since wall
+# clock times vary too much between machines to fail every run on.
+# Authenticated requests include one read of the user, as the user cache
+# starts cold.
+ENDPOINT_BUDGETS = {
+    # Password hashing dominates.
+    'sign_up': Budget(queries=2, ms=2000),
+    'sign_in': Budget(queries=1, ms=2000),
+    'products': Budget(queries=4, ms=250),
+    'products_filtered': Budget(queries=2, ms=250),
+    # Writes also re-render the menu snapshot of the products they touch and
+    # read back the catalog version they stamp the change feed with.
+    'product_create': Budget(queries=15, ms=250),
+    'trending': Budget(queries=2, ms=250),
+    'import': Budget(queries=14, ms=500),
+    'export': Budget(queries=2, ms=500),
+    # Products, their customizations and tombstones.
+    'changes': Budget(queries=3, ms=250),
+    'search': Budget(queries=6, ms=250),
+    'facets': Budget(queries=2, ms=250),
+    'metrics': Budget(queries=0, ms=100),
+    'product_detail': Budget(queries=3, ms=250),
+    'product_update': Budget(queries=4, ms=250),
+    'product_delete': Budget(queries=13, ms=250),
+    'add_favourite': Budget(queries=5, ms=250),
+    'remove_favourite': Budget(queries=5, ms=250),
+    'batch_favourites': Budget(queries=5, ms=250),
+    'favourites': Budget(queries=4, ms=250),
+    'offers': Budget(queries=8, ms=250),
+    'async_products': Budget(queries=4, ms=250),
+    'async_product_detail': Budget(queries=3, ms=250),
+    'async_add_favourite': Budget(queries=5, ms=250),
+    'async_favourites': Budget(queries=4, ms=250),
+}
+
+CATALOG_SIZES = {
+    'small': CatalogSize(products=3, favourites=2),
+    'large': CatalogSize(products=40, favourites=25),
+}
+
+TIME_BUDGET_SCALE = float(os.environ.get('TIME_BUDGET_SCALE') or 0)
+
+
+class CatalogTestCase(APITestCase):
+    """
+    ``APITestCase`` starting every test with an empty catalog response
+    cache. Each test's rollback resets the catalog version the entries are
+    keyed on, while the locmem entries outlive it, so a later test could
+    otherwise be served an earlier one's responses.
+    """
+
+    def _pre_setup(self):
+        super()._pre_setup()
+        get_cache().clear()
+
+
+class QueryCountAssertionsMixin:
+    """
+    Test case mixin for catching N+1 queries on list endpoints.
+
+    ``request`` is a callable receiving a page size and performing the
+    request; the number of queries it issues must not depend on that size.
+    """
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries), context.captured_queries
+
+    def assertConstantQueryCount(self, request, page_sizes=(1, 10), msg=None):
+        counts = {}
+        captured = {}
+        for size in page_sizes:
+            counts[size], captured[size] = self.count_queries(request, size)
+
+        if len(set(counts.values())) > 1:
+            largest = max(page_sizes)
+            queries = '\n'.join(
+                f"{index}. {query['sql']}" for index, query in enumerate(captured[largest], start=1)
+            )
+            self.fail(self._formatMessage(
+                msg,
+                f"Query count grows with page size {counts}. Queries for page size {largest}:\n{queries}",
+            ))
+        return counts[page_sizes[0]]
+
+
+class EndpointBudgetMixin(QueryCountAssertionsMixin):
+    """
+    Test case mixin checking ``ENDPOINT_BUDGETS``: an endpoint must issue the
+    same number of queries on every catalog in ``catalog_sizes``, no more
+    than its budget and, with ``TIME_BUDGET_SCALE`` set, within its time
+    budget. Caches are cleared before each
+    request, so every request is measured cold.
+    """
+    catalog_sizes = CATALOG_SIZES
+
+    def for_each_catalog(self, func):
+        """
+        Call ``func(label, workload)`` once per catalog size, each in a
+        transaction rolled back afterwards.
+        """
+        for label, size in self.catalog_sizes.items():
+            with transaction.atomic():
+                foods = seed_catalog(size.products)
+                disposable = seed_catalog(1, customizations_per_product=1)
+                admin, *users = seed_users(3, admins=1)
+                seed_favourites(users, foods, size.favourites)
+                func(label, Workload(foods, disposable, users, admin))
+                transaction.set_rollback(True)
+
+    def measure_endpoint(self, work, name):
+        call = SCENARIOS[name](work, 0, 0)
+        headers = headers_for(work, call, 0)
+        for cache in (get_cache(), product_cache, search_index, user_cache):
+            cache.clear()
+        driver = ClientDriver()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            status, _ = driver.send(call, headers)
+            elapsed = (time.perf_counter() - start) * 1000
+        self.assertIn(status, call.ok, f'{name} answered {status}')
+        return context.captured_queries, elapsed
+
+    def assertWithinBudget(self, name, budget=None):
+        budget = budget or ENDPOINT_BUDGETS[name]
+        caches = {**settings.CACHES, settings.MENU_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        counts = {}
+
+        def check(label, work):
+            queries, elapsed = self.measure_endpoint(work, name)
+            counts[label] = len(queries)
+            listing = '\n'.join(f"{index}. {query['sql']}" for index, query in enumerate(queries, start=1))
+            if len(queries) > budget.queries:
+                self.fail(f'{name} issued {len(queries)} queries on the {label} catalog, budget {budget.queries}:\n{listing}')
+            if len(set(counts.values())) > 1:
+                self.fail(f'{name} query count changes with the catalog size {counts}. Queries on the {label} catalog:\n{listing}')
+            if TIME_BUDGET_SCALE and elapsed > budget.ms * TIME_BUDGET_SCALE:
+                self.fail(f'{name} took {elapsed:.1f} ms on the {label} catalog, budget {budget.ms * TIME_BUDGET_SCALE:.0f} ms')
+
+        with override_settings(CACHES=caches, METRICS_TOKEN='budget'):
+            self.for_each_catalog(check)
+        return counts
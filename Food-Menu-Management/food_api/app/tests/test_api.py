@@ -0,0 +1,2506 @@
+from rest_framework import status
+from django.urls import resolve, reverse
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.http import QueryDict
+from django.test import AsyncClient, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from unittest import mock, skipUnless
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from ..async_views import AsyncProductView
+from ..authentication import ClaimsJWTAuthentication, user_cache
+from ..cache import SingleFlight, bump_catalog_version, catalog_flights, get_cache, get_catalog_version
+from ..fast_serializers import FastFoodProductSerializer, SerializedProductCache, product_cache
+from ..filters import filter_products
+from ..hashers import HashingBusy, HashingLimiter, hashing_limiter
+from ..importers import iter_json_array
+from ..instrumentation import registry
+from ..offers import apply_discount, get_daily_offers
+from ..search import BACKEND_MEMORY, BACKEND_POSTGRES, InMemorySearchIndex, get_search_backend, search_index
+from ..management.commands.explain_filters import Command as ExplainFiltersCommand
+from ..models import CatalogVersion, Customization, Favourite, FoodProduct, FoodProductTombstone, MenuSnapshot, Topping, User
+from ..renderers import ORJSONRenderer
+from ..routers import REPLICA_DATABASE, REPLICA_PIN_COOKIE, PrimaryReplicaRouter, replica_reads
+from ..serializers import FoodProductSerializer
+from ..snapshots import rebuild_snapshots
+from ..throttling import take_token
+from ..urls import catalog_view, urlpatterns
+from ..views import ProductImportView, ProductView, get_token_for_user
+from .support import ENDPOINT_BUDGETS, Budget, CatalogTestCase, EndpointBudgetMixin, QueryCountAssertionsMixin
+from .workloads import SCENARIOS, ClientDriver, Workload, headers_for, query_count, seed_catalog, seed_favourites, seed_users
+from asgiref.sync import iscoroutinefunction
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.test import force_authenticate
+from rest_framework.renderers import JSONRenderer
+
+class UserSignupViewTestCase(CatalogTestCase):
+    """
+    Test case for the UserSignupView class.
+    """
+
+    def test_user_signup_success(self):
+        """
+        Test user signup with valid data.
+        """
+        url = 'http://127.0.0.1:8000/api/sign-up/'
+        data = {
+            "email": "test@example.com",
+            "full_name": "John Doe",
+            "password": "testpassword",
+            "password2": "testpassword",
+            "age": 30,
+            "city": "New York"
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('msg', response.data)
+        self.assertEqual(response.data['msg'], 'Register Successful')
+
+    def test_user_signup_failure(self):
+        """
+        Test user signup with invalid data.
+        """
+        url = 'http://127.0.0.1:8000/api/sign-up/'
+        data = {
+            # adding invalid email
+            "email": "",  
+            "full_name": "John Doe",
+            "password": "testpassword",
+            "password2": "testpassword",
+            "age": 30,
+            "city": "New York"
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)  
+
+
+class UserLoginViewTestCase(CatalogTestCase):
+    """
+    Test case for the UserLoginView class.
+    """
+
+    def setUp(self):
+        """
+        Create a test user for login testing.
+        """
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="testpassword",
+            full_name="John Doe",
+            city="New York",
+            age=30
+        )
+
+    def test_user_login_success(self):
+        """
+        Test user login with correct credentials.
+        """
+        url = 'http://127.0.0.1:8000/api/sign-in/'
+        data = {
+            "email": "test@example.com",
+            "password": "testpassword"
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+        self.assertIn('msg', response.data)
+        self.assertEqual(response.data['msg'], 'Login Successful')
+
+    def test_user_login_failure(self):
+        """
+        Test user login with incorrect credentials.
+        """
+        url = 'http://127.0.0.1:8000/api/sign-in/'
+
+        # giving wrong details
+        data = {
+            "email": "test@example.com",
+            "password": "wrongpassword"  
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn('errors', response.data)
+        self.assertIn('validation_erros', response.data['errors'])
+        self.assertIn('password and email is not valid', response.data['errors']['validation_erros'])
+
+
+class FoodProductTests(CatalogTestCase):
+
+    """
+    Test class for testing Food Product related activities.
+
+    Methods:
+        - test_get_food_product_list: Test case for retrieving a list of food products.
+        - test_get_food_product_detail: Test case for retrieving details of a specific food product.
+        - test_create_food_product: Test case for creating a new food product.
+        - test_update_food_product: Test case for updating an existing food product.
+        - test_partial_update_food_product: Test case for partially updating an existing food product.
+        - test_delete_food_product: Test case for deleting an existing food product.
+        - test_add_favorite_food: Test case for adding a food product to favorites.
+        - test_get_favorite_food: Test case for retrieving favorite food products.
+        - test_get_offers: Test case for retrieving special offers.
+    """
+
+    def setUp(self):
+        """
+        Create some initial data for testing
+        """
+        self.food_product_data = {
+            "name": "Test Food",
+            "description": "Test description",
+            "price": "10.00",
+            "average_rating": "4.5",
+            "category": "Test category",
+            "product_type": "Veg",
+        }
+        self.food_product = FoodProduct.objects.create(**self.food_product_data)
+        self.user = User.objects.create_user(
+            email="my@email.com",
+            password="password123",
+            full_name="akhtra",
+            city="mumbai",
+            age=21,
+            is_admin = True
+        )
+
+    def test_get_food_product_list(self):
+        """
+        Test retrieving a list of food products.
+        """
+
+        url = "http://127.0.0.1:8000/api/products/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_food_product_detail(self):
+        """
+        Test retrieving details of a specific food product.
+        """
+
+        url = f"http://127.0.0.1:8000/api/products/{self.food_product.pk}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_food_product(self):
+        """
+        Test creating a new food product.
+        """
+
+        url = reverse("products")
+        data = {
+            "id": 7,
+            "name": "Sushi",
+            "description": "Traditional Japanese sushi rolls",
+            "price": "15.99",
+            "average_rating": 4.7,
+            "category": "Japanese",
+            "product_type": "NonVeg",
+            "customizations": [
+                {
+                    "id": 11,
+                    "name": "Assorted Fish",
+                    "group": "Fillings",
+                    "toppings": "Salmon, Tuna, Shrimp",
+                },
+                {
+                    "id": 12,
+                    "name": "Wasabi",
+                    "group": "Condiments",
+                    "toppings": "Wasabi Paste",
+                },
+            ],
+        }
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('msg', response.data)
+        self.assertEqual(response.data['msg'], f'{data['name']} Is Added Successfully')
+
+    def test_update_food_product(self):
+        """
+        Test updating an existing food product.
+        """
+
+        url = f"http://127.0.0.1:8000/api/products/{self.food_product.pk}"
+        data = {
+            "name": "Updated Food",
+            "description": "Updated description",
+            "price": "12.00",
+            "average_rating": "4.7",
+            "category": "Updated category",
+            "product_type": "NonVeg",
+            "customizations": [
+                {
+                    "id": 11,
+                    "name": "Assorted Fish",
+                    "group": "Fillings",
+                    "toppings": "Salmon, Tuna, Shrimp",
+                },
+                {
+                    "id": 12,
+                    "name": "Wasabi",
+                    "group": "Condiments",
+                    "toppings": "Wasabi Paste",
+                },
+            ],
+        }
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('msg', response.data)
+        self.assertEqual(response.data['msg'], f'{data['name']} is updated')
+
+    def test_partial_update_food_product(self):
+        """
+        Test partially updating an existing food product.
+        """
+
+        url = f"http://127.0.0.1:8000/api/products/{self.food_product.pk}"
+        data = {
+            "name": "Updated Food",
+            "description": "Updated description",
+            "price": "12.00",
+            "average_rating": "4.7",
+            "product_type": "NonVeg",
+        }
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('msg', response.data)
+        self.assertEqual(response.data['msg'], f'{data['name']} is updated')
+
+    def test_delete_food_product(self):
+        """
+        Test deleting an existing food product.
+        """
+
+        url = f"http://127.0.0.1:8000/api/products/{self.food_product.pk}"
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('msg', response.data)
+
+    def test_add_favorite_food(self):
+        """
+        Test adding a food product to favorites.
+        """
+
+        url = f"http://127.0.0.1:8000/api/add-to-fvrt/{self.food_product.pk}"
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('msg', response.data)
+
+    def test_get_favorite_food(self):
+        """
+        Test retrieving favorite food products.
+        """
+
+        url = "http://127.0.0.1:8000/api/get-fvrt/"
+        self.client.force_authenticate(user=self.user)
+        self.test_add_favorite_food()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+
+    def test_get_offers(self):
+        """
+        Test retrieving special offers.
+        """
+
+        url = "http://127.0.0.1:8000/api/get-offers/"
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            self.test_create_food_product()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+
+
+
+class ProductPaginationTests(CatalogTestCase):
+    """
+    Test class for the query-level limit/offset and keyset pagination of product lists.
+    """
+
+    def setUp(self):
+        """
+        Create a small catalog with duplicated prices so keyset ties are exercised.
+        """
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Food {index}",
+                description="Test description",
+                price=f"{10 + index % 3}.00",
+                average_rating=4.0,
+                category="Pizza",
+                product_type="Veg",
+            )
+            for index in range(7)
+        ]
+        self.user = User.objects.create_user(
+            email="page@email.com",
+            password="password123",
+            full_name="pager",
+            city="mumbai",
+            age=21,
+        )
+
+    def test_limit_offset_page(self):
+        """
+        Test that limit/offset returns only the requested window and the total count.
+        """
+        response = self.client.get(reverse("products"), {"limit": 3, "offset": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual([food['id'] for food in response.data['results']], [food.id for food in self.foods[3:6]])
+
+    def test_limit_offset_queries_only_the_page(self):
+        """
+        Test that the page is sliced in SQL instead of loading the whole catalog.
+        """
+        with self.assertNumQueries(4):
+            # catalog version + count + page + customizations prefetch for the page rows
+            response = self.client.get(reverse("products"), {"limit": 2})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_keyset_walks_every_product_once(self):
+        """
+        Test that following keyset next links by (price, id) visits every product exactly once.
+        """
+        seen = []
+        response = self.client.get(reverse("products"), {"cursor": "", "ordering": "price", "limit": 3})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend((food['price'], food['id']) for food in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected = sorted((food.price, food.id) for food in FoodProduct.objects.all())
+        self.assertEqual([food_id for _, food_id in seen], [food_id for _, food_id in expected])
+
+    def test_keyset_invalid_cursor(self):
+        """
+        Test that a tampered cursor is rejected.
+        """
+        response = self.client.get(reverse("products"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_favourites_are_paginated(self):
+        """
+        Test that favourite foods use the same query-level pagination.
+        """
+        for food in self.foods:
+            food.fvrt_by.add(self.user)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("add-fvrt-food"), {"limit": 2, "offset": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class MenuQueryCountTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class guarding the read endpoints against N+1 customization queries.
+    """
+
+    def setUp(self):
+        """
+        Create products with several customizations each and a user who favourited all of them.
+        """
+        self.user = User.objects.create_user(
+            email="queries@email.com",
+            password="password123",
+            full_name="counter",
+            city="mumbai",
+            age=21,
+        )
+        for index in range(12):
+            food = FoodProduct.objects.create(
+                name=f"Food {index}",
+                description="Test description",
+                price="10.00",
+                average_rating=4.0,
+                category="Pizza",
+                product_type="Veg",
+            )
+            for option in range(3):
+                Customization.objects.create(food_product=food, name=f"Option {option}", group="Extras", toppings="Cheese")
+            food.fvrt_by.add(self.user)
+
+    def test_product_list_queries_do_not_grow(self):
+        """
+        Test that the product list issues the same number of queries for 1 and 10 items.
+        """
+        count = self.assertConstantQueryCount(lambda size: self.client.get(reverse("products"), {"limit": size}))
+        self.assertEqual(count, 4)
+
+    def test_favourite_list_queries_do_not_grow(self):
+        """
+        Test that the favourite list issues the same number of queries for 1 and 10 items.
+        """
+        self.client.force_authenticate(user=self.user)
+        self.assertConstantQueryCount(lambda size: self.client.get(reverse("add-fvrt-food"), {"limit": size}))
+
+    def test_product_detail_prefetches_customizations(self):
+        """
+        Test that a product detail is served with one product and one customization query.
+        """
+        food = FoodProduct.objects.first()
+        with self.assertNumQueries(3):
+            # catalog version + product + customizations
+            response = self.client.get(f"http://127.0.0.1:8000/api/products/{food.pk}")
+        self.assertEqual(len(response.data['customizations']), 3)
+
+    def test_offers_prefetch_customizations(self):
+        """
+        Test that offers do not query customizations once per offered food.
+        """
+        self.client.force_authenticate(user=self.user)
+        count, queries = self.count_queries(self.client.get, "http://127.0.0.1:8000/api/get-offers/")
+        customization_queries = [query for query in queries if 'app_customization' in query['sql']]
+        self.assertEqual(len(customization_queries), 1)
+
+
+class ExplainFiltersCommandTests(CatalogTestCase):
+    """
+    Test class for the explain_filters management command.
+    """
+
+    def test_reports_every_combination(self):
+        """
+        Test that the command explains each filter combination it is given.
+        """
+        out = StringIO()
+        call_command("explain_filters", "--params", "min_price", "category", "type", stdout=out)
+        lines = [line for line in out.getvalue().splitlines() if line.startswith(("INDEXED", "SEQ SCAN", "ERROR"))]
+        self.assertEqual(len(lines), 7)
+        self.assertNotIn("ERROR", out.getvalue())
+
+    def test_catalog_filter_uses_composite_index(self):
+        """
+        Test that a category + type + price filter is planned through the catalog index.
+        """
+        command = ExplainFiltersCommand()
+        # Postgres prefers a seq scan on tiny tables, so make it show whether an index is usable.
+        plan = command.explain(QueryDict("category=Pizza&type=Veg&min_price=10"), force_index=connection.vendor == "postgresql")
+        self.assertIn("food_catalog_idx", plan)
+
+
+class ToppingFilterTests(CatalogTestCase):
+    """
+    Test class for the normalized topping rows and the toppings filter.
+    """
+
+    def setUp(self):
+        """
+        Create products whose customizations share some toppings.
+        """
+        self.client.force_authenticate(user=User.objects.create_user(
+            email="toppings@email.com",
+            password="password123",
+            full_name="topper",
+            city="mumbai",
+            age=21,
+            is_admin=True,
+        ))
+        self.margherita = self.create_food("Margherita", ["Cheese, Basil", "Olives"])
+        self.veggie = self.create_food("Veggie", ["Olives, Onion"])
+        self.plain = self.create_food("Plain", ["Salt"])
+
+    def create_food(self, name, toppings):
+        data = {
+            "name": name,
+            "description": "Test description",
+            "price": "10.00",
+            "average_rating": 4.0,
+            "category": "Pizza",
+            "product_type": "Veg",
+            "customizations": [
+                {"name": f"Option {index}", "group": "Extras", "toppings": value}
+                for index, value in enumerate(toppings)
+            ],
+        }
+        response = self.client.post(reverse("products"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return FoodProduct.objects.get(name=name)
+
+    def filtered_ids(self, params):
+        response = self.client.get(reverse("products"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {food['id'] for food in response.data}
+
+    def test_toppings_are_normalized(self):
+        """
+        Test that the free-text toppings are split into shared topping rows.
+        """
+        self.assertEqual(Topping.objects.filter(name="olives").count(), 1)
+        self.assertEqual(set(Topping.objects.values_list("name", flat=True)), {"cheese", "basil", "olives", "onion", "salt"})
+
+    def test_single_topping_matches_one_of_many(self):
+        """
+        Test that one topping out of a comma separated list is matched, case-insensitively.
+        """
+        self.assertEqual(self.filtered_ids({"toppings": "Basil"}), {self.margherita.id})
+
+    def test_toppings_any(self):
+        """
+        Test that several toppings match products offering any of them, without duplicates.
+        """
+        response = self.client.get(reverse("products"), {"toppings": "olives,cheese"})
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual({food['id'] for food in response.data}, {self.margherita.id, self.veggie.id})
+
+    def test_toppings_all(self):
+        """
+        Test that toppings_match=all only keeps products offering every topping.
+        """
+        params = {"toppings": ["olives", "cheese"], "toppings_match": "all"}
+        self.assertEqual(self.filtered_ids(params), {self.margherita.id})
+
+    def test_update_relinks_toppings(self):
+        """
+        Test that replacing customizations replaces the normalized toppings.
+        """
+        url = f"http://127.0.0.1:8000/api/products/{self.plain.pk}"
+        data = {"customizations": [{"name": "Option", "group": "Extras", "toppings": "Pepper"}]}
+        response = self.client.patch(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.filtered_ids({"toppings": "pepper"}), {self.plain.id})
+        self.assertEqual(self.filtered_ids({"toppings": "salt"}), set())
+
+
+class CatalogCacheTests(CatalogTestCase):
+    """
+    Test class for the versioned catalog response cache.
+    """
+
+    def setUp(self):
+        """
+        Start from an empty cache with one product and an admin user.
+        """
+        self.food = FoodProduct.objects.create(
+            name="Cached Food",
+            description="Test description",
+            price="10.00",
+            average_rating=4.0,
+            category="Pizza",
+            product_type="Veg",
+        )
+        self.admin = User.objects.create_user(
+            email="cache@email.com",
+            password="password123",
+            full_name="cacher",
+            city="mumbai",
+            age=21,
+            is_admin=True,
+        )
+        self.detail_url = f"http://127.0.0.1:8000/api/products/{self.food.pk}"
+
+    def test_second_request_is_served_from_cache(self):
+        """
+        Test that a repeated listing only reads the catalog version.
+        """
+        first = self.client.get(reverse("products"), {"category": "pizza"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse("products"), {"category": "Pizza"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+
+    def test_equivalent_parameters_share_an_entry(self):
+        """
+        Test that parameter order, case and unknown parameters do not split the cache.
+        """
+        self.client.get(reverse("products"), {"category": ["Pizza", "Burger"], "limit": 5})
+        response = self.client.get(reverse("products"), {"limit": 5, "category": ["burger", "pizza"], "utm": "x"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_if_none_match_returns_not_modified(self):
+        """
+        Test that a matching ETag is answered with 304.
+        """
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_invalidates_immediately(self):
+        """
+        Test that an update through the API changes the cached detail and the ETag.
+        """
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.client.force_authenticate(user=self.admin)
+        self.client.patch(self.detail_url, {"name": "Renamed"}, format="json")
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Renamed")
+
+    def test_create_and_delete_invalidate_listing(self):
+        """
+        Test that creating and deleting products invalidates the cached listing.
+        """
+        self.assertEqual(len(self.client.get(reverse("products")).json()), 1)
+        self.client.force_authenticate(user=self.admin)
+        data = {
+            "name": "New Food",
+            "description": "Test description",
+            "price": "12.00",
+            "average_rating": 4.0,
+            "category": "Pizza",
+            "product_type": "Veg",
+            "customizations": [],
+        }
+        self.client.post(reverse("products"), data, format="json")
+        self.assertEqual(len(self.client.get(reverse("products")).json()), 2)
+        self.client.delete(self.detail_url)
+        self.assertEqual(len(self.client.get(reverse("products")).json()), 1)
+
+    @override_settings(ALLOWED_HOSTS=["a.example", "b.example"])
+    def test_pagination_links_follow_the_request_host(self):
+        """
+        Test that a cached page never hands out links to another host.
+        """
+        FoodProduct.objects.create(name="Second", description="Test", price="11.00", average_rating=4.0, category="Pizza", product_type="Veg")
+        first = self.client.get(reverse("products"), {"limit": 1}, HTTP_HOST="a.example")
+        second = self.client.get(reverse("products"), {"limit": 1}, HTTP_HOST="b.example")
+        third = self.client.get(reverse("products"), {"limit": 1}, HTTP_HOST="b.example", secure=True)
+        self.assertTrue(first.json()["next"].startswith("http://a.example/"))
+        self.assertTrue(second.json()["next"].startswith("http://b.example/"))
+        self.assertTrue(third.json()["next"].startswith("https://b.example/"))
+        self.assertEqual([first["X-Cache"], second["X-Cache"], third["X-Cache"]], ["MISS", "MISS", "MISS"])
+
+    def test_errors_are_not_cached(self):
+        """
+        Test that error responses are neither cached nor tagged with an ETag.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/products/999999")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("ETag", response)
+
+
+class MenuImportTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for the bulk import endpoint and the import_menu command.
+    """
+
+    def setUp(self):
+        """
+        Create an admin user and a valid product row.
+        """
+        self.admin = User.objects.create_user(
+            email="import@email.com",
+            password="password123",
+            full_name="importer",
+            city="mumbai",
+            age=21,
+            is_admin=True,
+        )
+        self.row = {
+            "name": "Imported",
+            "description": "Test description",
+            "price": "10.00",
+            "average_rating": 4.0,
+            "category": "Pizza",
+            "product_type": "Veg",
+            "customizations": [{"name": "Extra", "group": "Extras", "toppings": "Cheese, Olives"}],
+        }
+
+    def post_import(self, body, content_type):
+        self.client.force_authenticate(user=self.admin)
+        return self.client.generic("POST", reverse("products-import"), body, content_type=content_type)
+
+    def test_import_json_array(self):
+        """
+        Test that a JSON array is imported with customizations and normalized toppings.
+        """
+        rows = [dict(self.row, name=f"Imported {index}") for index in range(5)]
+        response = self.post_import(json.dumps(rows), "application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(Customization.objects.filter(food_product__name__startswith="Imported").count(), 5)
+        self.assertEqual(FoodProduct.objects.filter(customizations__topping_items__name="olives").count(), 5)
+
+    def test_import_reports_row_errors_without_aborting(self):
+        """
+        Test that invalid NDJSON rows are reported by position while valid rows are imported.
+        """
+        lines = [json.dumps(self.row), json.dumps(dict(self.row, price="not a price")), "{broken", json.dumps(self.row)]
+        response = self.post_import("\n".join(lines), "application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3])
+        self.assertIn("price", response.data["errors"][0]["errors"])
+
+    def test_import_reports_truncated_body_after_imported_rows(self):
+        """
+        Test that a JSON array cut off mid-stream keeps the rows before it and reports where it broke.
+        """
+        body = json.dumps([self.row, self.row])[:-1] + ', {"name": "Cut'
+        with mock.patch.object(ProductImportView, "chunk_size", 1):
+            response = self.post_import(body, "application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(FoodProduct.objects.filter(name="Imported").count(), 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3])
+        self.assertIn("Truncated", response.data["errors"][0]["errors"]["non_field_errors"][0])
+
+    def test_import_csv(self):
+        """
+        Test that CSV rows with a JSON customizations column are imported.
+        """
+        body = StringIO()
+        writer = csv.DictWriter(body, fieldnames=list(self.row))
+        writer.writeheader()
+        writer.writerow(dict(self.row, customizations=json.dumps(self.row["customizations"])))
+        writer.writerow(dict(self.row, name="No Options", customizations=""))
+        response = self.post_import(body.getvalue(), "text/csv")
+        self.assertEqual(response.data["created"], 2)
+
+    def test_import_uses_batched_inserts(self):
+        """
+        Test that the number of queries does not grow with the number of rows in a chunk.
+        """
+        small, _ = self.count_queries(self.post_import, json.dumps([self.row] * 2), "application/json")
+        large, _ = self.count_queries(self.post_import, json.dumps([self.row] * 20), "application/json")
+        self.assertEqual(small, large)
+
+    def test_import_requires_admin(self):
+        """
+        Test that non-admin users cannot import products.
+        """
+        self.admin.is_admin = False
+        self.admin.save()
+        response = self.post_import(json.dumps([self.row]), "application/json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_menu_command(self):
+        """
+        Test that the management command imports an NDJSON file.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as handle:
+            handle.write("\n".join(json.dumps(dict(self.row, name=f"File {index}")) for index in range(3)))
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command("import_menu", handle.name, "--chunk-size", "2", stdout=out)
+        self.assertIn("3 products imported", out.getvalue())
+        self.assertEqual(FoodProduct.objects.filter(name__startswith="File").count(), 3)
+
+    def test_streaming_json_parser(self):
+        """
+        Test that the incremental JSON array parser handles items split across reads.
+        """
+        rows = [{"price": 10.5, "name": "a" * 50}, {"price": 3}, [1, 2]]
+        items = list(iter_json_array(StringIO(json.dumps(rows)), buffer_size=7))
+        self.assertEqual(items, rows)
+
+
+class CustomizationDiffUpdateTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for diff-based customization updates.
+    """
+
+    def setUp(self):
+        """
+        Create a product with two customizations and an admin user.
+        """
+        self.food = FoodProduct.objects.create(
+            name="Diff Food",
+            description="Test description",
+            price="10.00",
+            average_rating=4.0,
+            category="Pizza",
+            product_type="Veg",
+        )
+        self.cheese = Customization.objects.create(food_product=self.food, name="Cheese", group="Extras", toppings="Cheese")
+        self.sauce = Customization.objects.create(food_product=self.food, name="Sauce", group="Base", toppings="Tomato")
+        Topping.objects.link([self.cheese, self.sauce])
+        self.url = f"http://127.0.0.1:8000/api/products/{self.food.pk}"
+        self.client.force_authenticate(user=User.objects.create_user(
+            email="diff@email.com",
+            password="password123",
+            full_name="differ",
+            city="mumbai",
+            age=21,
+            is_admin=True,
+        ))
+
+    def patch(self, data):
+        response = self.client.patch(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_unchanged_update_writes_nothing(self):
+        """
+        Test that resubmitting the same data issues no write queries and keeps ids.
+        """
+        data = {
+            "price": "10.00",
+            "customizations": [
+                {"id": self.cheese.id, "name": "Cheese", "group": "Extras", "toppings": "Cheese"},
+                {"name": "Sauce", "group": "Base", "toppings": "Tomato"},
+            ],
+        }
+        _, queries = self.count_queries(self.patch, data)
+        writes = [query["sql"] for query in queries if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))]
+        self.assertEqual(writes, [])
+        self.assertEqual(set(self.food.customizations.values_list("id", flat=True)), {self.cheese.id, self.sauce.id})
+
+    def test_diff_update_keeps_matched_ids(self):
+        """
+        Test that matched rows are updated in place, new rows created and missing rows deleted.
+        """
+        self.patch({
+            "customizations": [
+                {"id": self.cheese.id, "name": "Cheese", "group": "Extras", "toppings": "Cheese, Olives"},
+                {"name": "Dip", "group": "Sides", "toppings": "Mayo"},
+            ],
+        })
+        customizations = {customization.name: customization for customization in self.food.customizations.all()}
+        self.assertEqual(set(customizations), {"Cheese", "Dip"})
+        self.assertEqual(customizations["Cheese"].id, self.cheese.id)
+        self.assertEqual(customizations["Cheese"].toppings, "Cheese, Olives")
+        self.assertFalse(Customization.objects.filter(pk=self.sauce.pk).exists())
+        self.assertEqual(
+            set(customizations["Cheese"].topping_items.values_list("name", flat=True)),
+            {"cheese", "olives"},
+        )
+
+    def test_only_changed_product_fields_are_saved(self):
+        """
+        Test that the product row update only sets the changed columns.
+        """
+        _, queries = self.count_queries(self.patch, {"name": "Renamed", "price": "10.00"})
+        updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "app_foodproduct"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"name"', updates[0])
+        self.assertNotIn('"price"', updates[0])
+
+    def test_foreign_customization_id_is_not_stolen(self):
+        """
+        Test that an id belonging to another product creates a new row instead of moving it.
+        """
+        other = FoodProduct.objects.create(
+            name="Other", description="Test description", price="5.00", average_rating=3.0, category="Pizza", product_type="Veg",
+        )
+        foreign = Customization.objects.create(food_product=other, name="Foreign", group="Extras", toppings="Salt")
+        self.patch({"customizations": [{"id": foreign.id, "name": "Foreign", "group": "Extras", "toppings": "Salt"}]})
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.food_product_id, other.id)
+        self.assertEqual(self.food.customizations.get().name, "Foreign")
+
+
+class SpecialOfferTests(CatalogTestCase):
+    """
+    Test class for the deterministic daily offer engine.
+    """
+
+    def setUp(self):
+        """
+        Create a catalog with gaps in the id range and two users.
+        """
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Offer {index}",
+                description="Test description",
+                price="19.99",
+                average_rating=4.0,
+                category="Pizza",
+                product_type="Veg",
+            )
+            for index in range(10)
+        ]
+        FoodProduct.objects.filter(pk__in=[food.pk for food in self.foods[2:6]]).delete()
+        self.user = User.objects.create_user(email="offer@email.com", password="password123", full_name="offer", city="mumbai", age=21)
+        self.other = User.objects.create_user(email="other@email.com", password="password123", full_name="other", city="mumbai", age=21)
+
+    def test_offers_are_stable_per_user_and_day(self):
+        """
+        Test that repeated calls return the same offers and prices.
+        """
+        self.client.force_authenticate(user=self.user)
+        first = self.client.get("http://127.0.0.1:8000/api/get-offers/").data
+        get_cache().clear()
+        second = self.client.get("http://127.0.0.1:8000/api/get-offers/").data
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first, second)
+        self.assertEqual(len({food["id"] for food in first}), 3)
+
+    def test_offers_differ_across_days(self):
+        """
+        Test that the seed changes with the day.
+        """
+        picks = {tuple(get_daily_offers(self.user, date(2024, 3, day))) for day in range(1, 8)}
+        self.assertGreater(len(picks), 1)
+
+    def test_discount_is_exact_decimal(self):
+        """
+        Test that discounts are computed in Decimal and rounded to cents.
+        """
+        self.assertEqual(apply_discount("19.99", 15), (Decimal("16.99"), Decimal("3.00")))
+        self.assertEqual(apply_discount("0.10", 30), (Decimal("0.07"), Decimal("0.03")))
+
+    def test_offer_prices_match_discount_note(self):
+        """
+        Test that each offered price is the original price minus the advertised percent.
+        """
+        self.client.force_authenticate(user=self.other)
+        for food in self.client.get("http://127.0.0.1:8000/api/get-offers/").data:
+            percent = int(food["Note"].split("You Get ")[1].split("%")[0])
+            self.assertTrue(10 <= percent <= 30)
+            self.assertEqual(Decimal(food["price"]), apply_discount("19.99", percent)[0])
+
+    def test_small_catalog(self):
+        """
+        Test that a catalog smaller than the offer count returns every product once.
+        """
+        FoodProduct.objects.exclude(pk=self.foods[0].pk).delete()
+        self.assertEqual([food_id for food_id, _ in get_daily_offers(self.user)], [self.foods[0].pk])
+
+
+class FavouriteTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for single-statement favourite toggling and the batch endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create a few products and an authenticated user.
+        """
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Fav {index}",
+                description="Test description",
+                price="10.00",
+                average_rating=4.0,
+                category="Pizza",
+                product_type="Veg",
+            )
+            for index in range(3)
+        ]
+        self.user = User.objects.create_user(email="fav@email.com", password="password123", full_name="fav", city="mumbai", age=21)
+        self.client.force_authenticate(user=self.user)
+
+    def test_add_is_a_single_write(self):
+        """
+        Test that adding a favourite issues one name lookup, one insert and one counter update.
+        """
+        _, queries = self.count_queries(self.client.post, f"http://127.0.0.1:8000/api/add-to-fvrt/{self.foods[0].pk}")
+        statements = [query["sql"].split()[0] for query in queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(statements, ["SELECT", "INSERT", "UPDATE"])
+        favourite = Favourite.objects.get()
+        self.assertEqual((favourite.user_id, favourite.food_product_id), (self.user.id, self.foods[0].id))
+        self.assertIsNotNone(favourite.created_at)
+
+    def test_add_twice_is_idempotent(self):
+        """
+        Test that favouriting twice keeps one row and reports it.
+        """
+        self.client.post(f"http://127.0.0.1:8000/api/add-to-fvrt/{self.foods[0].pk}")
+        response = self.client.post(f"http://127.0.0.1:8000/api/add-to-fvrt/{self.foods[0].pk}")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Favourite.objects.count(), 1)
+
+    def test_add_unknown_food(self):
+        """
+        Test that favouriting a missing product fails without inserting.
+        """
+        response = self.client.post("http://127.0.0.1:8000/api/add-to-fvrt/999999")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Favourite.objects.exists())
+
+    def test_remove(self):
+        """
+        Test that removing a favourite is a single delete plus counter update and 404s when absent.
+        """
+        Favourite.objects.add(self.user, [self.foods[0].pk])
+        url = reverse("remove-fvrt-food", args=[self.foods[0].pk])
+        _, queries = self.count_queries(self.client.delete, url)
+        statements = [query["sql"].split()[0] for query in queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(statements, ["DELETE", "UPDATE"])
+        self.foods[0].refresh_from_db()
+        self.assertEqual(self.foods[0].favourite_count, 0)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_add_and_remove(self):
+        """
+        Test that the batch endpoint favourites and unfavourites many foods in one request.
+        """
+        ids = [food.pk for food in self.foods] + [999999]
+        response = self.client.post(reverse("batch-fvrt-food"), {"food_ids": ids, "action": "add"}, format="json")
+        self.assertEqual(response.data["changed"], 3)
+        response = self.client.post(reverse("batch-fvrt-food"), {"food_ids": ids, "action": "add"}, format="json")
+        self.assertEqual(response.data["changed"], 0)
+        response = self.client.post(reverse("batch-fvrt-food"), {"food_ids": ids[:2], "action": "remove"}, format="json")
+        self.assertEqual(response.data["changed"], 2)
+        self.assertEqual(list(Favourite.objects.values_list("food_product_id", flat=True)), [self.foods[2].pk])
+
+    def test_batch_validation(self):
+        """
+        Test that an unknown action is rejected.
+        """
+        response = self.client.post(reverse("batch-fvrt-food"), {"food_ids": [1], "action": "toggle"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TrendingProductTests(CatalogTestCase):
+    """
+    Test class for maintained favourite counts and the trending endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create products in two categories and users who favourite them unevenly.
+        """
+        self.pizzas = [self.create_food(f"Pizza {index}", "Pizza", "Veg") for index in range(3)]
+        self.burger = self.create_food("Burger", "Burger", "NonVeg")
+        self.users = [
+            User.objects.create_user(email=f"trend{index}@email.com", password="password123", full_name="trend", city="mumbai", age=21)
+            for index in range(3)
+        ]
+        for index, user in enumerate(self.users):
+            Favourite.objects.add(user, [self.burger.pk] + [pizza.pk for pizza in self.pizzas[:index + 1]])
+
+    def create_food(self, name, category, product_type):
+        return FoodProduct.objects.create(
+            name=name,
+            description="Test description",
+            price="10.00",
+            average_rating=4.0,
+            category=category,
+            product_type=product_type,
+        )
+
+    def test_counts_are_maintained(self):
+        """
+        Test that add and remove keep favourite_count equal to the join table count.
+        """
+        Favourite.objects.remove(self.users[0], [self.burger.pk, self.pizzas[2].pk])
+        for food in FoodProduct.objects.all():
+            self.assertEqual(food.favourite_count, food.fvrt_by.count())
+
+    def test_trending_order_and_limit(self):
+        """
+        Test that trending returns the most favourited foods first.
+        """
+        response = self.client.get(reverse("products-trending"), {"limit": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([food["favourite_count"] for food in response.data], [3, 3, 2])
+        self.assertEqual(response.data[0]["id"], self.pizzas[0].id)
+
+    def test_trending_filters(self):
+        """
+        Test that trending can be narrowed by category and product type.
+        """
+        response = self.client.get(reverse("products-trending"), {"category": "pizza"})
+        self.assertEqual([food["id"] for food in response.data], [pizza.id for pizza in self.pizzas])
+        response = self.client.get(reverse("products-trending"), {"type": "Veg", "limit": 1})
+        self.assertEqual([food["id"] for food in response.data], [self.pizzas[0].id])
+
+    def test_deleting_a_user_releases_favourites(self):
+        """
+        Test that the favourites cascaded away with a user leave the counts right.
+        """
+        self.users[2].delete()
+        self.burger.refresh_from_db()
+        self.assertEqual(self.burger.favourite_count, 2)
+
+    def test_refresh_recomputes_counts(self):
+        """
+        Test that the refresh_favourite_counts command repairs drifted counts.
+        """
+        FoodProduct.objects.update(favourite_count=7)
+        call_command("refresh_favourite_counts", stdout=StringIO())
+        self.burger.refresh_from_db()
+        self.assertEqual(self.burger.favourite_count, 3)
+
+
+class ClaimsAuthenticationTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for the claims-only JWT authentication fast path.
+    """
+
+    def setUp(self):
+        """
+        Create an admin and a regular user with real access tokens.
+        """
+        user_cache.clear()
+        self.admin = User.objects.create_user(email="claims-admin@email.com", password="password123", full_name="admin", city="mumbai", age=21, is_admin=True)
+        self.user = User.objects.create_user(email="claims@email.com", password="password123", full_name="claims", city="pune", age=21)
+        self.food = FoodProduct.objects.create(
+            name="Claims Food", description="Test description", price="10.00", average_rating=4.0, category="Pizza", product_type="Veg",
+        )
+
+    def authorize(self, user):
+        token = get_token_for_user(user)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return token
+
+    def test_token_carries_admin_claim(self):
+        """
+        Test that issued tokens embed is_admin.
+        """
+        self.assertTrue(AccessToken(get_token_for_user(self.admin)["access"])["is_admin"])
+        self.assertFalse(AccessToken(get_token_for_user(self.user)["access"])["is_admin"])
+
+    def test_authenticated_request_skips_user_lookup(self):
+        """
+        Test that a non-admin token reads the user once per cache lifetime.
+        """
+        self.authorize(self.user)
+        user_queries = []
+        for _ in range(2):
+            _, queries = self.count_queries(self.client.post, f"http://127.0.0.1:8000/api/add-to-fvrt/{self.food.pk}")
+            user_queries.append(len([query for query in queries if 'FROM "app_user"' in query["sql"]]))
+        self.assertEqual(user_queries, [1, 0])
+        self.assertEqual(Favourite.objects.get().user_id, self.user.id)
+
+    def test_admin_claim_authorizes_writes(self):
+        """
+        Test that admin-only endpoints rely on the claim.
+        """
+        self.authorize(self.user)
+        url = f"http://127.0.0.1:8000/api/products/{self.food.pk}"
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.authorize(self.admin)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_200_OK)
+
+    def test_full_user_is_fetched_once_and_cached(self):
+        """
+        Test that other User attributes come from the user read while authenticating.
+        """
+        token = AccessToken(get_token_for_user(self.user)["access"])
+        with self.assertNumQueries(1):
+            claims_user = ClaimsJWTAuthentication().get_user(token)
+        with self.assertNumQueries(0):
+            self.assertEqual((claims_user.pk, claims_user.is_admin), (self.user.pk, False))
+            self.assertEqual(claims_user.city, "pune")
+            self.assertEqual(ClaimsJWTAuthentication().get_user(token).email, "claims@email.com")
+
+    def test_admin_is_confirmed_from_the_database(self):
+        """
+        Test that a demotion made by another worker is honoured at once for admin tokens.
+        """
+        token = AccessToken(self.authorize(self.admin))
+        ClaimsJWTAuthentication().get_user(token)
+        # Another worker demotes the admin: no signal reaches this process's user cache.
+        User.objects.filter(pk=self.admin.pk).update(is_admin=False)
+        response = self.client.delete(f"http://127.0.0.1:8000/api/products/{self.food.pk}")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revocation_is_shared_through_the_database(self):
+        """
+        Test that a revocation stored by another worker applies once the cached user expires.
+        """
+        self.authorize(self.user)
+        url = "http://127.0.0.1:8000/api/get-fvrt/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        User.objects.filter(pk=self.user.pk).update(token_revocation=time.time_ns())
+        user_cache.clear()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.authorize(User.objects.get(pk=self.user.pk))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_revocation(self):
+        """
+        Test that demoting or deleting a user rejects the tokens issued before.
+        """
+        self.authorize(self.admin)
+        self.admin.is_admin = False
+        self.admin.save(update_fields=["is_admin"])
+        response = self.client.get("http://127.0.0.1:8000/api/get-fvrt/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.authorize(self.user)
+        self.user.delete()
+        response = self.client.get("http://127.0.0.1:8000/api/get-fvrt/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrelated_update_keeps_tokens(self):
+        """
+        Test that saving unrelated fields only drops the cached user.
+        """
+        self.authorize(self.user)
+        self.user.city = "delhi"
+        self.user.save(update_fields=["city"])
+        response = self.client.post(f"http://127.0.0.1:8000/api/add-to-fvrt/{self.food.pk}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+    def test_full_save_without_credential_changes_keeps_tokens(self):
+        """
+        Test that a plain save() revokes nothing unless is_admin or the password changed.
+        """
+        self.authorize(self.user)
+        self.user.city = "delhi"
+        self.user.save()
+        response = self.client.post(f"http://127.0.0.1:8000/api/add-to-fvrt/{self.food.pk}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.set_password("changed123")
+        self.user.save()
+        response = self.client.get("http://127.0.0.1:8000/api/get-fvrt/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class PasswordHashingTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for the sign-up and sign-in password hashing pipeline.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="hash@email.com", password="password123", full_name="hash", city="pune", age=21)
+
+    def login(self, password="password123"):
+        return self.client.post("http://127.0.0.1:8000/api/sign-in/", {"email": "hash@email.com", "password": password}, format="json")
+
+    def test_signup_inserts_once(self):
+        """
+        Test that sign-up stores the hashed user with a single INSERT.
+        """
+        data = {"email": "new@email.com", "full_name": "New", "password": "password123", "password2": "password123", "age": 30, "city": "pune"}
+        _, queries = self.count_queries(self.client.post, "http://127.0.0.1:8000/api/sign-up/", data, format="json")
+        writes = [query["sql"].split()[0] for query in queries if '"app_user"' in query["sql"] and not query["sql"].startswith("SELECT")]
+        self.assertEqual(writes, ["INSERT"])
+        self.assertTrue(User.objects.get(email="new@email.com").check_password("password123"))
+
+    @override_settings(
+        PASSWORD_HASHERS=["app.hashers.TunableScryptPasswordHasher", "app.hashers.TunablePBKDF2PasswordHasher"],
+        PASSWORD_HASHER_OPTIONS={"scrypt": {"work_factor": 2 ** 10}},
+    )
+    def test_login_upgrades_outdated_hash(self):
+        """
+        Test that a login rehashes the password with the preferred hasher.
+        """
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$1024$"))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login("wrongpassword").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hash_upgrade_keeps_sessions(self):
+        """
+        Test that a login with an old-parameter hash leaves existing tokens valid.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_token_for_user(self.user)['access']}")
+        with override_settings(PASSWORD_HASHERS=["app.hashers.TunablePBKDF2PasswordHasher"], PASSWORD_HASHER_OPTIONS={"pbkdf2": {"iterations": 1000}}):
+            self.assertEqual(self.client.post("http://127.0.0.1:8000/api/sign-in/", {"email": "hash@email.com", "password": "password123"}, format="json").status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        user_cache.clear()
+        self.assertEqual(self.client.get("http://127.0.0.1:8000/api/get-fvrt/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unknown_email(self):
+        """
+        Test that an unknown email fails like a wrong password.
+        """
+        response = self.client.post("http://127.0.0.1:8000/api/sign-in/", {"email": "nobody@email.com", "password": "password123"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_busy_limiter_rejects(self):
+        """
+        Test that sign-ins beyond the hashing limit get 429 instead of queueing.
+        """
+        limiter = HashingLimiter(max_concurrent=1, queue_timeout=0.01)
+        self.assertEqual(limiter.run(sum, [1, 2]), 3)
+        limiter._slots.acquire()
+        with self.assertRaises(HashingBusy):
+            limiter.run(sum, [1, 2])
+
+        with mock.patch.object(hashing_limiter, "run", side_effect=HashingBusy(wait=1)):
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class AsyncViewTests(CatalogTestCase):
+    """
+    Test class for the async catalog and favourite views.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="async@email.com", password="password123", full_name="async", city="pune", age=21)
+        self.admin = User.objects.create_user(email="async-admin@email.com", password="password123", full_name="admin", city="pune", age=21, is_admin=True)
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Async Food {index}", description="Test description", price=f"{10 + index}.00",
+                average_rating=4.0, category="Pizza" if index % 2 else "Burger", product_type="Veg",
+            )
+            for index in range(5)
+        ]
+        for food in self.foods:
+            Customization.objects.create(food_product=food, name="Cheese", group="Extras", toppings="Cheese")
+
+    def authorize(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_token_for_user(user)['access']}")
+
+    def assertSameResponse(self, sync_url, async_url):
+        get_cache().clear()
+        expected = self.client.get(sync_url)
+        actual = self.client.get(async_url)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(json.loads(actual.content), json.loads(expected.content.replace(b"/api/", b"/api/async/")))
+        return actual
+
+    def test_product_list_matches_sync_view(self):
+        """
+        Test that listing, pagination and filters answer like the sync view.
+        """
+        for query in ["", "?limit=2&offset=2", "?cursor=&limit=2&ordering=price", "?category=pizza&toppings=cheese", "?cursor=bad"]:
+            self.assertSameResponse(f"/api/products/{query}", f"/api/async/products/{query}")
+
+    def test_product_detail_matches_sync_view(self):
+        """
+        Test that the detail view answers like the sync view, also when missing.
+        """
+        self.assertSameResponse(f"/api/products/{self.foods[0].pk}", f"/api/async/products/{self.foods[0].pk}")
+        self.assertSameResponse("/api/products/0", "/api/async/products/0")
+
+    def test_every_route_negotiates_like_sync_view(self):
+        """
+        Test that each async route answers every Accept header with the sync view's status, content type and body.
+        """
+        self.authorize(self.user)
+        Favourite.objects.add(self.user, [self.foods[0].pk])
+        for route in ["/api/products/", f"/api/products/{self.foods[0].pk}", "/api/get-fvrt/", f"/api/add-to-fvrt/{self.foods[1].pk}"]:
+            method = self.client.post if "add-to-fvrt" in route else self.client.get
+            for accept in ["*/*", "application/json", "text/html", "application/xml"]:
+                with self.subTest(route=route, accept=accept):
+                    get_cache().clear()
+                    Favourite.objects.remove(self.user, [self.foods[1].pk])
+                    expected = method(route, HTTP_ACCEPT=accept)
+                    Favourite.objects.remove(self.user, [self.foods[1].pk])
+                    actual = method(route.replace("/api/", "/api/async/"), HTTP_ACCEPT=accept)
+                    self.assertEqual(actual.status_code, expected.status_code)
+                    self.assertEqual(actual["Content-Type"], expected["Content-Type"])
+                    if expected["Content-Type"].startswith("text/html"):
+                        # The browsable API embeds a per-response CSRF token.
+                        self.assertContains(actual, "/api/async/", status_code=expected.status_code)
+                    else:
+                        self.assertEqual(actual.content, expected.content.replace(b"/api/", b"/api/async/"))
+
+    def test_responses_are_cached(self):
+        """
+        Test that async responses go through the catalog cache and ETags.
+        """
+        first = self.client.get("/api/async/products/")
+        second = self.client.get("/api/async/products/")
+        self.assertEqual((first["X-Cache"], second["X-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(first.content, second.content)
+        response = self.client.get("/api/async/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_favourites(self):
+        """
+        Test adding and listing favourites through the async views.
+        """
+        response = self.client.get("/api/async/get-fvrt/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+        self.authorize(self.user)
+        self.assertEqual(self.client.get("/api/async/get-fvrt/").status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f"/api/async/add-to-fvrt/{self.foods[1].pk}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(f"/api/async/add-to-fvrt/{self.foods[1].pk}")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Favourite.objects.get().food_product_id, self.foods[1].pk)
+        self.assertSameResponse("/api/get-fvrt/", "/api/async/get-fvrt/")
+
+    def test_sync_methods_are_delegated(self):
+        """
+        Test that writes on an async route are served by the sync view.
+        """
+        self.authorize(self.admin)
+        data = {"name": "Async Created", "description": "Test", "price": "5.00", "average_rating": 3.0, "category": "Pizza", "product_type": "Veg", "customizations": []}
+        response = self.client.post("/api/async/products/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(FoodProduct.objects.filter(name="Async Created").exists())
+
+    async def test_async_client(self):
+        """
+        Test the async views from an event loop.
+        """
+        response = await AsyncClient().get("/api/async/products/?limit=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_setting_selects_async_views(self):
+        """
+        Test that ASYNC_VIEWS swaps the main routes for the async views.
+        """
+        self.assertFalse(iscoroutinefunction(catalog_view(ProductView, AsyncProductView)))
+        with override_settings(ASYNC_VIEWS=True):
+            self.assertTrue(iscoroutinefunction(catalog_view(ProductView, AsyncProductView)))
+
+
+class ProductExportTests(CatalogTestCase):
+    """
+    Test class for the streaming menu export endpoint and command.
+    """
+
+    def setUp(self):
+        # The export bucket is small; start every test with a full one.
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.foods = []
+        for index in range(3):
+            food = FoodProduct.objects.create(
+                name=f"Export Food {index}", description="Test description", price=f"{10 + index}.50",
+                average_rating=4.0, category="Pizza", product_type="Veg",
+            )
+            Customization.objects.create(food_product=food, name="Cheese", group="Extras", toppings="Cheese, Olives")
+            self.foods.append(food)
+        self.url = "http://127.0.0.1:8000/api/products/export"
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        """
+        Test that every product is streamed as one JSON line with its customizations.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in self.read(response).decode().splitlines()]
+        self.assertEqual([line["id"] for line in lines], [food.pk for food in self.foods])
+        self.assertEqual(lines[0]["customizations"][0]["toppings"], "Cheese, Olives")
+        self.assertEqual(lines[0]["price"], "10.50")
+        self.assertIn("updated_at", lines[0])
+
+    def test_json_export_in_chunks(self):
+        """
+        Test that the JSON array stays valid across chunk boundaries.
+        """
+        with mock.patch("app.views.ProductExportView.chunk_size", 2):
+            response = self.client.get(self.url, {"export_format": "json"})
+        data = json.loads(self.read(response))
+        self.assertEqual([item["name"] for item in data], [food.name for food in self.foods])
+
+        FoodProduct.objects.all().delete()
+        self.assertEqual(json.loads(self.read(self.client.get(self.url, {"export_format": "json"}))), [])
+
+    def test_updated_since(self):
+        """
+        Test that updated_since only exports products changed since then.
+        """
+        old = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        FoodProduct.objects.update(updated_at=old)
+        self.client.force_authenticate(User.objects.create_user(email="export@email.com", password="password123", full_name="export", city="pune", age=21, is_admin=True))
+        self.client.patch(f"http://127.0.0.1:8000/api/products/{self.foods[1].pk}", {"customizations": [{"name": "Cheese", "group": "Extras", "toppings": "Cheese"}]}, format="json")
+
+        since = (old + timedelta(days=1)).isoformat()
+        lines = self.read(self.client.get(self.url, {"updated_since": since})).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [self.foods[1].pk])
+        response = self.client.get(self.url, {"updated_since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_gzip(self):
+        """
+        Test that the export is gzipped for clients that accept it.
+        """
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(self.read(response)).decode().splitlines()), 3)
+
+        for accept_encoding in ["gzip;q=0, deflate", "br, *;q=0", "identity"]:
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header("Content-Encoding"), accept_encoding)
+        self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING="br;q=1, *;q=0.5")["Content-Encoding"], "gzip")
+
+    def test_export_command(self):
+        """
+        Test the export_menu management command, plain and gzipped.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "menu.json")
+            call_command("export_menu", path, "--format", "json", stdout=StringIO())
+            with open(path, encoding="utf-8") as stream:
+                self.assertEqual(len(json.load(stream)), 3)
+
+            path = os.path.join(directory, "menu.ndjson.gz")
+            call_command("export_menu", path, "--gzip", stdout=StringIO())
+            with gzip.open(path, "rt", encoding="utf-8") as stream:
+                self.assertEqual([json.loads(line)["id"] for line in stream], [food.pk for food in self.foods])
+
+
+class ChangeFeedTests(CatalogTestCase):
+    """
+    Test class for the incremental catalog change feed.
+    """
+
+    def setUp(self):
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Feed Food {index}", description="Test description", price="10.00",
+                average_rating=4.0, category="Pizza", product_type="Veg",
+            )
+            for index in range(3)
+        ]
+        self.customization = Customization.objects.create(food_product=self.foods[0], name="Cheese", group="Extras", toppings="Cheese")
+        self.admin = User.objects.create_user(email="feed@email.com", password="password123", full_name="feed", city="pune", age=21, is_admin=True)
+        self.url = "http://127.0.0.1:8000/api/products/changes"
+
+    def changes(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_sync_in_pages(self):
+        """
+        Test that a feed without cursor pages through every product.
+        """
+        first = self.changes(limit=2)
+        self.assertTrue(first["has_more"])
+        second = self.changes(first["next"], limit=2)
+        self.assertFalse(second["has_more"])
+        ids = [change["id"] for change in first["changes"] + second["changes"]]
+        self.assertEqual(ids, [food.pk for food in self.foods])
+        self.assertEqual(first["changes"][0]["product"]["customizations"][0]["name"], "Cheese")
+
+        # Nothing new: the cursor stays put.
+        third = self.changes(second["next"])
+        self.assertEqual((third["changes"], third["next"]), ([], second["next"]))
+
+    def test_delta_after_writes(self):
+        """
+        Test that only updated, created and deleted products follow the cursor.
+        """
+        cursor = self.changes()["next"]
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f"http://127.0.0.1:8000/api/products/{self.foods[1].pk}", {"price": "12.00"}, format="json")
+        self.client.delete(f"http://127.0.0.1:8000/api/products/{self.foods[2].pk}")
+        self.client.post("http://127.0.0.1:8000/api/products/", {"name": "New Feed Food", "description": "Test", "price": "5.00", "average_rating": 3.0, "category": "Pizza", "product_type": "Veg", "customizations": []}, format="json")
+        new_id = FoodProduct.objects.get(name="New Feed Food").pk
+
+        changes = self.changes(cursor)["changes"]
+        self.assertEqual(
+            [(change["action"], change["id"]) for change in changes],
+            [("upsert", self.foods[1].pk), ("delete", self.foods[2].pk), ("upsert", new_id)],
+        )
+        self.assertEqual(changes[0]["product"]["price"], "12.00")
+        self.assertTrue(FoodProductTombstone.objects.filter(food_id=self.foods[2].pk).exists())
+
+    def test_customization_changes_touch_product(self):
+        """
+        Test that editing only a customization moves the product and the row.
+        """
+        cursor = self.changes()["next"]
+        before = self.customization.updated_at
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f"http://127.0.0.1:8000/api/products/{self.foods[0].pk}", {"customizations": [{"name": "Cheese", "group": "Extras", "toppings": "Cheese, Olives"}]}, format="json")
+        self.customization.refresh_from_db()
+        self.assertGreater(self.customization.updated_at, before)
+        self.assertEqual([change["id"] for change in self.changes(cursor)["changes"]], [self.foods[0].pk])
+
+    def test_late_commit_is_not_skipped(self):
+        """
+        Test that a write is served after the cursor even when its rows carry an older timestamp.
+        """
+        cursor = self.changes()["next"]
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f"http://127.0.0.1:8000/api/products/{self.foods[1].pk}", {"price": "12.00"}, format="json")
+        # As if the transaction had taken its timestamp long before it committed.
+        FoodProduct.objects.filter(pk=self.foods[1].pk).update(updated_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual([change["id"] for change in self.changes(cursor)["changes"]], [self.foods[1].pk])
+
+    def test_invalid_cursor(self):
+        """
+        Test that a malformed cursor is rejected.
+        """
+        response = self.client.get(self.url, {"since": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductSearchTests(CatalogTestCase):
+    """
+    Test class for product search with the in-process index used on SQLite.
+    """
+
+    def setUp(self):
+        search_index.clear()
+        self.margherita = self.create("Margherita Pizza", "Classic tomato and basil", "Pizza", "Veg", "200.00", "Cheese, Basil")
+        self.pepperoni = self.create("Pepperoni Pizza", "Spicy salami", "Pizza", "NonVeg", "300.00", "Cheese, Pepperoni")
+        self.burger = self.create("Veggie Burger", "Served with a side of pizza fries", "Burger", "Veg", "150.00", "Olives, Onion")
+        self.url = "http://127.0.0.1:8000/api/products/search"
+
+    def create(self, name, description, category, product_type, price, toppings):
+        food = FoodProduct.objects.create(name=name, description=description, price=price, average_rating=4.0, category=category, product_type=product_type)
+        Customization.objects.create(food_product=food, name="Extra", group="Extras", toppings=toppings)
+        return food
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_backend(self):
+        """
+        Test that SQLite falls back to the in-memory index unless configured.
+        """
+        self.assertEqual(get_search_backend(), BACKEND_MEMORY)
+        with override_settings(SEARCH_BACKEND=BACKEND_POSTGRES):
+            self.assertEqual(get_search_backend(), BACKEND_POSTGRES)
+
+    def test_ranking(self):
+        """
+        Test that name matches rank above description matches.
+        """
+        self.assertEqual(self.search(q="pizza"), [self.margherita.pk, self.pepperoni.pk, self.burger.pk])
+        self.assertEqual(self.search(q="olives"), [self.burger.pk])
+        self.assertEqual(self.search(q="spicy pizza"), [self.pepperoni.pk])
+
+    def test_typos(self):
+        """
+        Test that close misspellings still match.
+        """
+        self.assertEqual(self.search(q="margarita")[0], self.margherita.pk)
+        self.assertEqual(self.search(q="peperoni"), [self.pepperoni.pk])
+
+    def test_filters_and_paging(self):
+        """
+        Test that search combines with the product list filters and paging.
+        """
+        self.assertEqual(self.search(q="pizza", type="veg"), [self.margherita.pk, self.burger.pk])
+        self.assertEqual(self.search(q="pizza", max_price="250"), [self.margherita.pk, self.burger.pk])
+        response = self.client.get(self.url, {"q": "pizza", "limit": 1, "offset": 1})
+        self.assertEqual((response.data["count"], [item["id"] for item in response.data["results"]]), (3, [self.pepperoni.pk]))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SEARCH_INDEX_BACKGROUND_REBUILD=False)
+    def test_index_follows_catalog_changes(self):
+        """
+        Test that new products become searchable once the catalog changes.
+        """
+        self.assertEqual(self.search(q="sushi"), [])
+        sushi = self.create("Salmon Sushi", "Fresh salmon", "Japanese", "NonVeg", "400.00", "Wasabi")
+        bump_catalog_version()
+        self.assertEqual(self.search(q="sushi"), [sushi.pk])
+
+    def test_background_rebuild_serves_previous_index(self):
+        """
+        Test that a catalog change is indexed off the request path while
+        searches keep using the previous index.
+        """
+        self.assertEqual(self.search(q="sushi"), [])
+        sushi = self.create("Salmon Sushi", "Fresh salmon", "Japanese", "NonVeg", "400.00", "Wasabi")
+        bump_catalog_version()
+        # The rebuild thread has its own connection and cannot see this
+        # test's transaction: hand it the index it would build.
+        rebuilt = InMemorySearchIndex()
+        rebuilt.add(sushi.pk, "name", sushi.name)
+        release = threading.Event()
+        with mock.patch.object(InMemorySearchIndex, "build", side_effect=lambda: release.wait(5) and rebuilt) as build:
+            self.assertEqual(self.search(q="sushi"), [])
+            self.assertEqual(self.search(q="salmon"), [])
+            release.set()
+            search_index.wait(5)
+        self.assertEqual(build.call_count, 1)
+        self.assertFalse(search_index.stale)
+        self.assertEqual(self.search(q="sushi"), [sushi.pk])
+
+
+class ProductFacetsTests(CatalogTestCase):
+    """
+    Test class for facet counts of the product list filters.
+    """
+
+    def setUp(self):
+        self.url = "http://127.0.0.1:8000/api/products/facets"
+        for name, category, product_type, price, rating in [
+            ("Margherita", "Pizza", "Veg", "150.00", 4.5),
+            ("Pepperoni", "Pizza", "NonVeg", "250.00", 3.5),
+            ("Farmhouse", "Pizza", "Veg", "550.00", 2.5),
+            ("Veggie Burger", "Burger", "Veg", "90.00", 4.0),
+            ("Chicken Burger", "Burger", "NonVeg", "180.00", 1.5),
+        ]:
+            FoodProduct.objects.create(name=name, description=name, price=price, average_rating=rating, category=category, product_type=product_type)
+
+    def facets(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["count"], {
+            dimension: {item["value"]: item["count"] for item in items}
+            for dimension, items in response.data["facets"].items()
+        }
+
+    def test_unfiltered_counts(self):
+        """
+        Test that every bucket is listed with its product count.
+        """
+        count, facets = self.facets()
+        self.assertEqual(count, 5)
+        self.assertEqual(facets["category"], {"Pizza": 3, "Burger": 2})
+        self.assertEqual(facets["type"], {"Veg": 3, "NonVeg": 2})
+        self.assertEqual(facets["price"], {"0-100": 1, "100-200": 2, "200-300": 1, "300-500": 0, "500+": 1})
+        self.assertEqual(facets["rating"], {"0-2": 1, "2-3": 1, "3-4": 1, "4+": 2})
+
+    def test_each_dimension_ignores_its_own_filter(self):
+        """
+        Test that a dimension is counted under every filter but its own.
+        """
+        count, facets = self.facets(category="pizza", type="veg")
+        self.assertEqual(count, 2)
+        self.assertEqual(facets["category"], {"Pizza": 2, "Burger": 1})
+        self.assertEqual(facets["type"], {"Veg": 2, "NonVeg": 1})
+        self.assertEqual(facets["price"], {"0-100": 0, "100-200": 1, "200-300": 0, "300-500": 0, "500+": 1})
+
+        count, facets = self.facets(max_price="200", average_rating="4")
+        self.assertEqual(count, 2)
+        self.assertEqual(facets["price"], {"0-100": 1, "100-200": 1, "200-300": 0, "300-500": 0, "500+": 0})
+        self.assertEqual(facets["rating"], {"0-2": 1, "2-3": 0, "3-4": 0, "4+": 2})
+
+    def test_single_query_and_cache(self):
+        """
+        Test that facets take one grouped query and are cached until the catalog changes.
+        """
+        get_catalog_version()
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {"type": "veg"})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"type": "Veg"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        FoodProduct.objects.create(name="Tiramisu", description="Dessert", price="120.00", average_rating=4.8, category="Dessert", product_type="Veg")
+        bump_catalog_version()
+        count, facets = self.facets(type="veg")
+        self.assertEqual((count, facets["category"]["Dessert"]), (4, 1))
+
+
+class FastSerializerTests(CatalogTestCase):
+    """
+    Test class for the values()-based read serializer and the orjson renderer.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        self.pizza = FoodProduct.objects.create(name="Pizza", description="Cheesy", price="199.5", average_rating=4.25, category="Pizza", product_type="Veg")
+        Customization.objects.create(food_product=self.pizza, name="Crust", group="Base", toppings="Thin")
+        Customization.objects.create(food_product=self.pizza, name="Extra", group="Extras", toppings="Cheese, Olives")
+        self.salad = FoodProduct.objects.create(name="Salad", description="Green", price="80.00", average_rating=3.0, category="Salad", product_type="Veg")
+
+    def test_same_output_as_model_serializer(self):
+        """
+        Test that the fast serializer renders exactly what FoodProductSerializer does.
+        """
+        foods = FoodProduct.objects.order_by('id')
+        expected = json.loads(json.dumps(FoodProductSerializer(FoodProductSerializer.read_queryset(foods), many=True).data))
+        rows = FastFoodProductSerializer.read_queryset(foods)
+        self.assertEqual(FastFoodProductSerializer(rows, many=True).data, expected)
+        self.assertEqual(FastFoodProductSerializer(rows.get(pk=self.salad.pk)).data, expected[1])
+
+    def test_memoized_until_product_changes(self):
+        """
+        Test that serialized products are reused per (id, updated_at) and rebuilt after an update.
+        """
+        rows = list(FastFoodProductSerializer.read_queryset(FoodProduct.objects.order_by('id')))
+        with self.assertNumQueries(1):
+            FastFoodProductSerializer(rows, many=True).data
+        with self.assertNumQueries(0):
+            FastFoodProductSerializer(rows, many=True).data
+
+        serializer = FoodProductSerializer(self.pizza, data={"price": "150.00", "customizations": [{"name": "Crust", "group": "Base", "toppings": "Thick"}]}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        response = self.client.get(f"http://127.0.0.1:8000/api/products/{self.pizza.pk}")
+        self.assertEqual(response.data["price"], "150.00")
+        self.assertEqual([item["toppings"] for item in response.data["customizations"]], ["Thick"])
+
+    def test_lru_bound(self):
+        """
+        Test that the memo evicts the least recently used product.
+        """
+        cache = SerializedProductCache(max_size=2)
+        cache.set(1, "v1", {"id": 1})
+        cache.set(2, "v1", {"id": 2})
+        cache.get(1, "v1")
+        cache.set(3, "v1", {"id": 3})
+        self.assertEqual([cache.get(food_id, "v1") for food_id in (1, 2, 3)], [{"id": 1}, None, {"id": 3}])
+        self.assertIsNone(cache.get(1, "v2"))
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        """
+        Test that the orjson renderer produces the same JSON as DRF's renderer.
+        """
+        data = {"price": Decimal("1.50"), "at": datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc), 1: "line\u2028break", "items": [1.5, None, True]}
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(rendered, JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class SparseFieldsetTests(QueryCountAssertionsMixin, CatalogTestCase):
+    """
+    Test class for ?fields= and ?include= on the product read endpoints.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        self.user = User.objects.create_user(email="sparse@email.com", password="password123", full_name="sparse", city="pune", age=21)
+        self.foods = []
+        for index in range(3):
+            food = FoodProduct.objects.create(name=f"Food {index}", description="Long description", price=f"{100 + index}.00", average_rating=4.0, category="Pizza", product_type="Veg")
+            Customization.objects.create(food_product=food, name="Extra", group="Extras", toppings="Cheese")
+            Favourite.objects.add(self.user, [food.pk])
+            self.foods.append(food)
+        self.url = "http://127.0.0.1:8000/api/products/"
+
+    def test_minimal_list(self):
+        """
+        Test that only the requested columns are selected and customizations are not queried.
+        """
+        get_catalog_version()
+        _, queries = self.count_queries(self.client.get, self.url, {"fields": "name,price,average_rating", "limit": 10})
+        response = self.client.get(self.url, {"fields": "name,price,average_rating", "limit": 10})
+        self.assertEqual(list(response.json()["results"][0]), ["id", "name", "price", "average_rating"])
+        sql = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("description", sql)
+        self.assertNotIn("app_customization", sql)
+
+        response = self.client.get(self.url, {"fields": "name", "include": "customizations", "limit": 10})
+        self.assertEqual(list(response.data["results"][0]), ["id", "name", "customizations"])
+        self.assertEqual(response.data["results"][0]["customizations"][0]["toppings"], "Cheese")
+
+    def test_default_and_errors(self):
+        """
+        Test that responses without fields are unchanged and unknown names are rejected.
+        """
+        response = self.client.get(f"{self.url}{self.foods[0].pk}")
+        self.assertIn("description", response.data)
+        self.assertIn("customizations", response.data)
+        response = self.client.get(f"{self.url}{self.foods[0].pk}", {"fields": "name"})
+        self.assertEqual(response.data, {"id": self.foods[0].pk, "name": "Food 0"})
+
+        response = self.client.get(self.url, {"fields": "name,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+        self.assertEqual(self.client.get(self.url, {"include": "favourites"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_keyset_and_favourites(self):
+        """
+        Test that sparse rows still page by price and work for favourites.
+        """
+        response = self.client.get(self.url, {"fields": "name", "ordering": "price", "cursor": "", "limit": 2})
+        self.assertEqual([item["name"] for item in response.data["results"]], ["Food 0", "Food 1"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"], [{"id": self.foods[2].pk, "name": "Food 2"}])
+
+        token = get_token_for_user(self.user)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("http://127.0.0.1:8000/api/get-fvrt/", {"fields": "price"})
+        self.assertEqual(response.data, [{"id": food.pk, "price": food.price} for food in self.foods])
+
+    def test_model_serializer_fieldset(self):
+        """
+        Test that FoodProductSerializer reads and renders the same sparse fieldset.
+        """
+        fieldset = {"fields": ["id", "name", "price"], "include_customizations": False}
+        foods = FoodProductSerializer.read_queryset(FoodProduct.objects.order_by("id"), **fieldset)
+        with self.assertNumQueries(1):
+            data = FoodProductSerializer(foods, many=True, **fieldset).data
+        fast = FastFoodProductSerializer(FastFoodProductSerializer.read_queryset(FoodProduct.objects.order_by("id"), **fieldset), many=True, **fieldset).data
+        self.assertEqual(json.loads(json.dumps(data)), fast)
+
+
+@skipUnless(REPLICA_DATABASE in settings.DATABASES, "needs the replica alias of food_api.test_settings")
+@modify_settings(MIDDLEWARE={"append": "app.routers.ReplicaReadsMiddleware"})
+class ReplicaRoutingTests(CatalogTestCase):
+    """
+    Test class for routing GET requests to the read replica. The two test
+    databases are separate, so rows only written to the replica show where
+    a read went.
+    """
+    databases = {"default", REPLICA_DATABASE}
+
+    def setUp(self):
+        product_cache.clear()
+        self.admin = User.objects.create_user(email="replica-admin@email.com", password="password123", full_name="admin", city="pune", age=21, is_admin=True)
+        self.replica_food = FoodProduct.objects.using(REPLICA_DATABASE).create(
+            name="Replica Pizza", description="Only on the replica", price="10.00", average_rating=4.0, category="Pizza", product_type="Veg",
+        )
+        self.sync_replica_version()
+
+    def sync_replica_version(self):
+        CatalogVersion.objects.using(REPLICA_DATABASE).update_or_create(pk=1, defaults={"version": get_catalog_version()})
+
+    def test_get_reads_from_replica(self):
+        """
+        Test that product reads of GET requests are served by the replica.
+        """
+        with CaptureQueriesContext(connections[REPLICA_DATABASE]) as replica, CaptureQueriesContext(connection) as primary:
+            response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertEqual([item["name"] for item in response.json()], ["Replica Pizza"])
+        self.assertTrue(any("app_foodproduct" in query["sql"] for query in replica.captured_queries))
+        self.assertFalse(any("app_foodproduct" in query["sql"] for query in primary.captured_queries))
+
+        response = self.client.get(f"http://127.0.0.1:8000/api/products/{self.replica_food.pk}")
+        self.assertEqual(response.json()["name"], "Replica Pizza")
+
+    async def test_async_get_reads_from_replica(self):
+        """
+        Test that the async views read from the replica too.
+        """
+        response = await AsyncClient().get("/api/async/products/")
+        self.assertEqual([item["name"] for item in response.json()], ["Replica Pizza"])
+
+    def test_writes_go_to_primary(self):
+        """
+        Test that non-GET requests read and write on the primary.
+        """
+        token = get_token_for_user(self.admin)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        data = {"name": "Primary Pasta", "description": "New", "price": "12.00", "average_rating": 4.0, "category": "Pasta", "product_type": "Veg", "customizations": []}
+        response = self.client.post("http://127.0.0.1:8000/api/products/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(FoodProduct.objects.filter(name="Primary Pasta").exists())
+        self.assertFalse(FoodProduct.objects.using(REPLICA_DATABASE).filter(name="Primary Pasta").exists())
+
+    @override_settings(REPLICA_PIN_SECONDS=30)
+    def test_reads_after_write_stay_on_primary(self):
+        """
+        Test that a client reads from the primary for a while after it writes.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_token_for_user(self.admin)['access']}")
+        data = {"name": "Primary Pasta", "description": "New", "price": "12.00", "average_rating": 4.0, "category": "Pasta", "product_type": "Veg", "customizations": []}
+        response = self.client.post("http://127.0.0.1:8000/api/products/", data, format="json")
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]["max-age"], 30)
+        self.sync_replica_version()
+        response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertEqual([item["name"] for item in response.json()], ["Primary Pasta"])
+
+        # The replica database of these tests holds no users: read anonymously.
+        self.client.credentials()
+        self.client.cookies.pop(REPLICA_PIN_COOKIE)
+        response = self.client.get("http://127.0.0.1:8000/api/products/", {"category": "pizza"})
+        self.assertEqual([item["name"] for item in response.json()], ["Replica Pizza"])
+
+    def test_lagging_replica_not_cached(self):
+        """
+        Test that a replica behind the primary's catalog version does not
+        fill the cache of the new version.
+        """
+        bump_catalog_version()
+        with CaptureQueriesContext(connections[REPLICA_DATABASE]) as replica:
+            response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertEqual(response.json(), [])
+        self.assertFalse(any("app_foodproduct" in query["sql"] for query in replica.captured_queries))
+        self.sync_replica_version()
+        response = self.client.get("http://127.0.0.1:8000/api/products/", {"category": "pizza"})
+        self.assertEqual([item["name"] for item in response.json()], ["Replica Pizza"])
+
+    def test_router_outside_requests(self):
+        """
+        Test that reads only go to the replica inside replica_reads().
+        """
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(FoodProduct))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(FoodProduct), REPLICA_DATABASE)
+        self.assertEqual(router.db_for_write(FoodProduct), "default")
+
+
+class InstrumentationTests(CatalogTestCase):
+    """
+    Tests for the per-request performance metrics.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        registry.clear()
+        FoodProduct.objects.create(name="Timed Pizza", description="Cheese", price="10.00", average_rating=4.0, category="Pizza", product_type="Veg")
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION={"SERVER_TIMING": True})
+    def test_server_timing_header(self):
+        """
+        Test that responses report their DB, serializer and render time.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        for name in ("db;dur=", "serialize;dur=", "render;dur=", "total;dur="):
+            self.assertIn(name, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+
+    def test_server_timing_off_by_default(self):
+        """
+        Test that the timing breakdown is not sent unless enabled.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn('route="api/products/"', registry.expose())
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_per_route(self):
+        """
+        Test that the histograms are labelled by method and URL pattern.
+        """
+        food = FoodProduct.objects.get()
+        self.client.get("http://127.0.0.1:8000/api/products/")
+        self.client.get(f"http://127.0.0.1:8000/api/products/{food.pk}")
+        self.client.get("http://127.0.0.1:8000/api/no-such-page")
+        response = self.client.get("http://127.0.0.1:8000/api/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="api/products/",le="+Inf"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="api/products/<int:pk>"} 1', text)
+        self.assertIn('route="unmatched"', text)
+        self.assertIn('http_response_size_bytes_count{method="GET",route="api/products/"} 1', text)
+
+        labels = (("method", "GET"), ("route", "api/products/"))
+        self.assertGreater(registry.db_queries._series[labels][1], 0)
+        self.assertGreater(registry.serialize_duration._series[labels][1], 0)
+        self.assertGreater(registry.render_duration._series[labels][1], 0)
+
+    def test_unknown_methods_share_one_label(self):
+        """
+        Test that made-up HTTP methods are recorded as "other" instead of as new series.
+        """
+        for method in ("FOO", "BAR"):
+            self.client.generic(method, "http://127.0.0.1:8000/api/products/")
+        text = registry.expose()
+        self.assertIn('http_request_duration_seconds_count{method="other",route="api/products/"} 2', text)
+        self.assertNotIn('method="FOO"', text)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """
+        Test that METRICS_TOKEN protects the metrics endpoint.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/metrics")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get("http://127.0.0.1:8000/api/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token(self):
+        """
+        Test that the metrics endpoint is hidden without METRICS_TOKEN outside DEBUG.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/metrics")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(DEBUG=True):
+            response = self.client.get("http://127.0.0.1:8000/api/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION={"SLOW_QUERY_MS": 0, "SLOW_QUERY_SAMPLE_RATE": 1})
+    def test_slow_query_logging(self):
+        """
+        Test that sampled slow queries are logged.
+        """
+        with self.assertLogs("app.performance", level="WARNING") as logs:
+            self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertTrue(any("app_foodproduct" in line for line in logs.output))
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION={"ENABLED": False})
+    def test_disabled(self):
+        """
+        Test that nothing is recorded when instrumentation is disabled.
+        """
+        response = self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(registry.expose().count("_count{"), 0)
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION={"SERVER_TIMING": True})
+    async def test_async_view(self):
+        """
+        Test that async views are instrumented too.
+        """
+        response = await AsyncClient().get("/api/async/products/")
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        self.assertIn('route="api/async/products/"', registry.expose())
+
+
+@override_settings(METRICS_TOKEN="loadtest", PERFORMANCE_INSTRUMENTATION={"SERVER_TIMING": True})
+class LoadTestSuiteTests(CatalogTestCase):
+    """
+    Test class for the request scenarios of app/tests/workloads.py.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        search_index.clear()
+
+    def make_workload(self):
+        foods = seed_catalog(10)
+        disposable = seed_catalog(3, customizations_per_product=1)
+        admin, *users = seed_users(3, admins=1)
+        seed_favourites(users, foods, 3)
+        return Workload(foods, disposable, users, admin)
+
+    def test_scenarios_cover_every_route(self):
+        """
+        Test that every route of app/urls.py has a scenario.
+        """
+        work = self.make_workload()
+        covered = {resolve(scenario(work, 0, 0).path.split("?")[0]).route for scenario in SCENARIOS.values()}
+        self.assertEqual({f"api/{pattern.pattern}" for pattern in urlpatterns} - covered, set())
+
+    def test_client_driver_runs_every_scenario(self):
+        """
+        Test that every scenario is answered as expected, with its queries counted.
+        """
+        work = self.make_workload()
+        driver = ClientDriver()
+        for name, scenario in SCENARIOS.items():
+            call = scenario(work, 0, 0)
+            status_code, server_timing = driver.send(call, headers_for(work, call, 0))
+            self.assertIn(status_code, call.ok, name)
+            self.assertIsNotNone(query_count(server_timing), name)
+
+
+class EndpointBudgetTests(EndpointBudgetMixin, CatalogTestCase):
+    """
+    Test class holding every endpoint to its query and time budget in
+    app/tests/support.py, on a small and a large catalog.
+    """
+
+    def test_every_endpoint_has_a_budget(self):
+        """
+        Test that every load test scenario, hence every route, has a budget.
+        """
+        self.assertEqual(set(SCENARIOS) - set(ENDPOINT_BUDGETS), set())
+
+    def test_endpoints_within_budget(self):
+        """
+        Test that no endpoint exceeds its budget or queries more on a larger catalog.
+        """
+        for name, budget in ENDPOINT_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                self.assertWithinBudget(name, budget)
+
+    def test_growing_query_count_fails(self):
+        """
+        Test that a query count depending on the catalog size is reported.
+        """
+        # The model serializer without its prefetches queries customizations per product.
+        with mock.patch.object(ProductView, "read_serializer_class", FoodProductSerializer), \
+                mock.patch.object(FoodProductSerializer, "read_queryset", side_effect=lambda queryset, **kwargs: queryset):
+            with self.assertRaisesRegex(AssertionError, "changes with the catalog size"):
+                self.assertWithinBudget("products", Budget(queries=100, ms=10_000))
+
+    def test_time_budgets_opt_in(self):
+        """
+        Test that time budgets only apply with TIME_BUDGET_SCALE set.
+        """
+        with mock.patch("app.tests.support.TIME_BUDGET_SCALE", 0):
+            self.assertWithinBudget("metrics", Budget(queries=0, ms=0))
+        with mock.patch("app.tests.support.TIME_BUDGET_SCALE", 1):
+            with self.assertRaisesRegex(AssertionError, "took"):
+                self.assertWithinBudget("metrics", Budget(queries=0, ms=0))
+
+
+THROTTLED = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"catalog_anon": "3/min", "catalog_user": "5/min", "export_anon": "1/min"}}
+
+
+@override_settings(REST_FRAMEWORK=THROTTLED)
+class ThrottlingTests(CatalogTestCase):
+    """
+    Test class for the token bucket throttles of the catalog views.
+    """
+
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(email="throttled@email.com", password="password123", full_name="throttled", city="pune", age=21)
+        self.food = FoodProduct.objects.create(name="Pizza", description="Cheese", price="10.00", average_rating=4.0, category="Pizza", product_type="Veg")
+
+    def test_anonymous_bucket(self):
+        """
+        Test that an anonymous client gets a burst of the rate, then 429 with Retry-After.
+        """
+        for _ in range(3):
+            self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/").status_code, status.HTTP_200_OK)
+        response = self.client.get(f"http://127.0.0.1:8000/api/products/{self.food.pk}")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "20")
+
+    def test_buckets_per_ip_and_user(self):
+        """
+        Test that other IPs and authenticated users have their own buckets.
+        """
+        for _ in range(3):
+            self.client.get("http://127.0.0.1:8000/api/products/")
+        self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/", REMOTE_ADDR="10.0.0.2").status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_token_for_user(self.user)['access']}")
+        statuses = [self.client.get("http://127.0.0.1:8000/api/products/").status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+
+    def test_export_throttled(self):
+        """
+        Test that the export has its own, smaller bucket.
+        """
+        self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/export").status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/export").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/").status_code, status.HTTP_200_OK)
+
+    def test_unscoped_views_not_throttled(self):
+        """
+        Test that views without a throttle_scope are not limited.
+        """
+        for _ in range(5):
+            self.assertEqual(self.client.get("http://127.0.0.1:8000/api/products/changes").status_code, status.HTTP_200_OK)
+
+    async def test_async_views_throttled(self):
+        """
+        Test that the async catalog views share the limits.
+        """
+        client = AsyncClient()
+        statuses = [(await client.get("/api/async/products/")).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    async def test_concurrent_async_requests_share_tokens(self):
+        """
+        Test that concurrent async requests cannot spend the same token.
+        """
+        client = AsyncClient()
+        responses = await asyncio.gather(*(client.get("/api/async/products/") for _ in range(10)))
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200] * 3 + [429] * 7)
+
+    def test_take_token_refills(self):
+        """
+        Test that a bucket refills at its rate, up to its capacity.
+        """
+        allowed, bucket, wait = take_token((0.5, 100.0), capacity=3, period=60, now=100.0)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 10)
+        allowed, bucket, wait = take_token(bucket, capacity=3, period=60, now=110.0)
+        self.assertTrue(allowed)
+        self.assertEqual(take_token(bucket, capacity=3, period=60, now=10_000.0)[1], (2, 10_000.0))
+
+
+class CoalescingTests(CatalogTestCase):
+    """
+    Test class for coalescing concurrent identical catalog cache misses.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        catalog_flights.clear()
+        FoodProduct.objects.create(name="Pizza", description="Cheese", price="10.00", average_rating=4.0, category="Pizza", product_type="Veg")
+
+    def run_concurrently(self, flights, func):
+        """
+        Run ``func`` in a leader thread and, while it runs, in a waiting one.
+        """
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], {}
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return func()
+
+        def run(name):
+            try:
+                results[name] = flights.do("key", compute)
+            except ValueError as e:
+                results[name] = e
+
+        leader = threading.Thread(target=run, args=("leader",))
+        leader.start()
+        started.wait(5)
+        waiter = threading.Thread(target=run, args=("waiter",))
+        waiter.start()
+        time.sleep(0.2)
+        release.set()
+        leader.join()
+        waiter.join()
+        return calls, results
+
+    def test_single_flight_shares_result(self):
+        """
+        Test that a concurrent call waits for the running one and shares its result.
+        """
+        calls, results = self.run_concurrently(SingleFlight(), lambda: "rendered")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, {"leader": ("rendered", False), "waiter": ("rendered", True)})
+
+    def test_single_flight_waiter_recomputes_on_failure(self):
+        """
+        Test that waiters compute themselves when the leader failed or had nothing to share.
+        """
+        calls, results = self.run_concurrently(SingleFlight(), lambda: None)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results["waiter"], (None, False))
+
+        def fail():
+            raise ValueError("boom")
+        calls, results = self.run_concurrently(SingleFlight(), fail)
+        self.assertEqual(len(calls), 2)
+        self.assertIsInstance(results["leader"], ValueError)
+
+    @override_settings(CATALOG_COALESCE_TIMEOUT=0)
+    def test_single_flight_disabled(self):
+        """
+        Test that a timeout of 0 turns coalescing off.
+        """
+        calls, results = self.run_concurrently(SingleFlight(), lambda: "rendered")
+        self.assertEqual(len(calls), 2)
+
+    async def test_async_misses_coalesce(self):
+        """
+        Test that concurrent identical async requests compute the response once.
+        """
+        client = AsyncClient()
+        with mock.patch("app.async_views.filter_products", side_effect=filter_products) as filtered:
+            responses = await asyncio.gather(*(client.get("/api/async/products/") for _ in range(3)))
+        self.assertEqual(filtered.call_count, 1)
+        self.assertEqual(sorted(response["X-Cache"] for response in responses), ["COALESCED", "COALESCED", "MISS"])
+        self.assertEqual(len({response.content for response in responses}), 1)
+
+
+
+class MenuSnapshotTests(CatalogTestCase):
+    """
+    Test class for the pre-rendered menu snapshots and the lists served from them.
+    """
+
+    def setUp(self):
+        product_cache.clear()
+        self.admin = User.objects.create_user(email="snapshot@email.com", password="password123", full_name="admin", city="pune", age=21, is_admin=True)
+        self.foods = [
+            FoodProduct.objects.create(
+                name=f"Snapshot Food {index}", description="Test description", price=f"{20 - index}.50",
+                average_rating=3.0 + index / 2, category="Pizza" if index % 2 else "Burger", product_type="Veg" if index < 3 else "NonVeg",
+            )
+            for index in range(6)
+        ]
+        for food in self.foods[::2]:
+            Customization.objects.create(food_product=food, name="Cheese", group="Extras", toppings="Cheese, Olives")
+        Topping.objects.link(Customization.objects.all())
+        self.product = {
+            "name": "Sushi",
+            "description": "Rolls",
+            "price": "15.99",
+            "average_rating": 4.7,
+            "category": "Japanese",
+            "product_type": "NonVeg",
+            "customizations": [{"name": "Wasabi", "group": "Condiments", "toppings": "Wasabi Paste"}],
+        }
+
+    def get_both(self, url, client=None):
+        """
+        Return the responses of ``url`` without and with snapshot reads.
+        """
+        client = client or self.client
+        responses = []
+        for enabled in [False, True]:
+            get_cache().clear()
+            with override_settings(MENU_SNAPSHOT_READS=enabled):
+                responses.append(client.get(url))
+        return responses
+
+    def assertSnapshotMatchesProducts(self):
+        expected = FastFoodProductSerializer(
+            FastFoodProductSerializer.read_queryset(FoodProduct.objects.order_by("id")), many=True, cache=SerializedProductCache(),
+        ).data
+        bodies = [json.loads(body) for body in MenuSnapshot.objects.order_by("id").values_list("body", flat=True)]
+        self.assertEqual(bodies, json.loads(ORJSONRenderer().render(expected)))
+
+    def test_rebuild_command(self):
+        """
+        Test that the command renders one snapshot per product, in batches.
+        """
+        MenuSnapshot.objects.create(id=0, price="1.00", average_rating=1.0, category="Gone", product_type="Veg", updated_at=self.foods[0].updated_at, body="{}")
+        out = StringIO()
+        call_command("rebuild_menu_snapshot", "--batch-size", "4", stdout=out)
+        self.assertIn("Rebuilt 6 menu snapshots", out.getvalue())
+        self.assertSnapshotMatchesProducts()
+
+    def test_snapshot_lists_match_live_lists(self):
+        """
+        Test that lists served from snapshots are byte for byte the live responses.
+        """
+        rebuild_snapshots()
+        first = self.client.get("/api/products/?cursor=&limit=2&ordering=price").json()
+        queries = [
+            "", "?limit=2&offset=1", "?limit=2&offset=10", "?cursor=&limit=2&ordering=price", first["next"],
+            "?category=pizza&category=burger&type=veg&min_price=16", "?toppings=olives,wasabi",
+            "?toppings=cheese,olives&toppings_match=all&average_rating=4", "?category=sushi",
+        ]
+        for query in queries:
+            url = query if query.startswith("http") else f"/api/products/{query}"
+            with self.subTest(url=url):
+                live, snapshot = self.get_both(url)
+                self.assertEqual(snapshot.status_code, status.HTTP_200_OK)
+                self.assertEqual(snapshot["Content-Type"], live["Content-Type"])
+                self.assertEqual(snapshot.content, live.content)
+
+    def test_async_snapshot_lists_match_live_lists(self):
+        """
+        Test that the async list view serves the same snapshot bytes.
+        """
+        rebuild_snapshots()
+        for query in ["", "?limit=2&offset=2", "?cursor=&limit=2&ordering=price", "?category=pizza&toppings=cheese"]:
+            with self.subTest(query=query):
+                live, snapshot = self.get_both(f"/api/async/products/{query}")
+                self.assertEqual(snapshot.content, live.content)
+
+    @override_settings(MENU_SNAPSHOT_READS=True)
+    def test_list_reads_only_snapshots(self):
+        """
+        Test that a list is a single query on the snapshot table.
+        """
+        rebuild_snapshots()
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/?category=burger&toppings=cheese")
+        self.assertEqual(len(response.json()), 3)
+        catalog = [query["sql"] for query in queries if "app_menusnapshot" in query["sql"] or "app_foodproduct" in query["sql"]]
+        self.assertEqual(len(catalog), 1)
+        self.assertNotIn("app_foodproduct", catalog[0])
+
+    @override_settings(MENU_SNAPSHOT_READS=True)
+    def test_sparse_and_browsable_lists_are_live(self):
+        """
+        Test that sparse fieldsets and the browsable API are not served from snapshots.
+        """
+        self.assertEqual(self.client.get("/api/products/").json(), [])
+        get_cache().clear()
+        self.assertEqual(len(self.client.get("/api/products/?fields=name").json()), 6)
+        response = self.client.get("/api/products/", HTTP_ACCEPT="text/html")
+        self.assertContains(response, "Snapshot Food 5")
+
+    def test_writes_refresh_snapshots(self):
+        """
+        Test that creating, updating, deleting and importing products keep the snapshots current.
+        """
+        rebuild_snapshots()
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse("products"), self.product, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertSnapshotMatchesProducts()
+
+        sushi = FoodProduct.objects.get(name="Sushi")
+        customization = sushi.customizations.get()
+        self.client.patch(f"/api/products/{sushi.pk}", {
+            "price": "12.00",
+            "customizations": [{"id": customization.pk, "name": "Wasabi", "group": "Condiments", "toppings": "Ginger"}],
+        }, format="json")
+        self.assertSnapshotMatchesProducts()
+        self.assertIn('"toppings":"Ginger"', MenuSnapshot.objects.get(pk=sushi.pk).body)
+
+        self.client.delete(f"/api/products/{self.foods[0].pk}")
+        self.assertFalse(MenuSnapshot.objects.filter(pk=self.foods[0].pk).exists())
+
+        response = self.client.generic("POST", reverse("products-import"), json.dumps([{**self.product, "name": "Maki"}]), content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        self.assertSnapshotMatchesProducts()
+
+        live, snapshot = self.get_both("/api/products/")
+        self.assertEqual(snapshot.content, live.content)
@@ -0,0 +1,250 @@
+import functools
+import itertools
+import json
+import re
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+
+from ..models import Customization, Favourite, FoodProduct, Topping, User
+from ..views import get_token_for_user
+
+# Synthetic catalogs and request scenarios shared by the tests (endpoint
+# budgets) and the benchmarks (benchmarks/loadtest.py).
+
+CATEGORIES = ['Pizza', 'Burger', 'Pasta', 'Salad', 'Dessert', 'Drinks', 'Japanese', 'Indian']
+PRODUCT_TYPES = ['Veg', 'NonVeg']
+TOPPINGS = ['Cheese', 'Olives', 'Onion', 'Tomato', 'Chicken', 'Paneer', 'Mushroom', 'Jalapeno']
+PASSWORD = 'benchmark-password'
+
+Call = namedtuple('Call', 'method path body auth ok')
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def seed_catalog(products, customizations_per_product=2, batch_size=2000, names=None):
+    """
+    Bulk insert a deterministic synthetic catalog of ``products`` items,
+    named by ``names(index)`` when given.
+    """
+    start = FoodProduct.objects.count()
+    foods = [
+        FoodProduct(
+            name=names(index) if names else f'Food {index}',
+            description=f'Synthetic food number {index}',
+            price=Decimal(50 + (index * 37) % 450),
+            average_rating=round(1 + (index * 7) % 40 / 10, 1),
+            category=CATEGORIES[index % len(CATEGORIES)],
+            product_type=PRODUCT_TYPES[index % len(PRODUCT_TYPES)],
+        )
+        for index in range(start, start + products)
+    ]
+    foods = FoodProduct.objects.bulk_create(foods, batch_size=batch_size)
+    if not all(food.pk for food in foods):
+        foods = list(FoodProduct.objects.order_by('-id')[:products])
+
+    customizations = [
+        Customization(
+            food_product=food,
+            name=f'Option {option}',
+            group='Extras',
+            toppings=', '.join(TOPPINGS[(food.pk + option + shift) % len(TOPPINGS)] for shift in range(2)),
+        )
+        for food in foods
+        for option in range(customizations_per_product)
+    ]
+    customizations = Customization.objects.bulk_create(customizations, batch_size=batch_size)
+    for start in range(0, len(customizations), batch_size):
+        Topping.objects.link(customizations[start:start + batch_size])
+    return foods
+
+
+@functools.lru_cache
+def hashed_password(password):
+    # Hashing is deliberately slow; synthetic users can share one hash.
+    return make_password(password)
+
+
+def seed_users(count, admins=0, password=PASSWORD, batch_size=2000):
+    """
+    Bulk insert ``count`` users named ``user<n>@bench.local``, the first
+    ``admins`` of them admins, all sharing one hashed ``password``.
+    """
+    start = User.objects.count()
+    hashed = hashed_password(password)
+    users = [
+        User(
+            email=f'user{index}@bench.local', full_name=f'User {index}', age=20 + index % 50,
+            city=['Pune', 'Mumbai', 'Delhi'][index % 3], is_admin=index - start < admins, password=hashed,
+        )
+        for index in range(start, start + count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    # SQLite does not return the ids of bulk inserted rows.
+    return list(User.objects.filter(email__in=[user.email for user in users]).order_by('id'))
+
+
+def seed_favourites(users, foods, per_user, batch_size=2000):
+    """
+    Give every user ``per_user`` distinct favourites spread over ``foods``
+    and refresh the favourite counts.
+    """
+    per_user = min(per_user, len(foods))
+    favourites = [
+        Favourite(user=user, food_product=foods[(position * 7919 + offset) % len(foods)])
+        for position, user in enumerate(users)
+        for offset in range(per_user)
+    ]
+    Favourite.objects.bulk_create(favourites, batch_size=batch_size, ignore_conflicts=True)
+    FoodProduct.objects.refresh_favourite_counts()
+
+
+def clear_catalog():
+    Topping.objects.all().delete()
+    Customization.objects.all().delete()
+    FoodProduct.objects.all().delete()
+
+
+class Workload:
+    """
+    Seeded ids and credentials the scenarios build their requests from.
+    """
+
+    def __init__(self, foods, disposable, users, admin):
+        self.food_ids = [food.pk for food in foods]
+        self.disposable_ids = iter([food.pk for food in disposable])
+        self.users = users
+        self.tokens = [get_token_for_user(user)['access'] for user in users]
+        self.admin_token = get_token_for_user(admin)['access']
+        self.counter = itertools.count()
+        self.nonce = int(time.time())
+        self.lock = threading.Lock()
+
+    def food(self, index):
+        return self.food_ids[(index * 7919) % len(self.food_ids)]
+
+    def foods(self, index, count):
+        return [self.food(index * count + offset) for offset in range(count)]
+
+    def disposable(self):
+        with self.lock:
+            return next(self.disposable_ids, 0)
+
+    def unique(self):
+        with self.lock:
+            return f'{self.nonce}-{next(self.counter)}'
+
+
+def product_row(name):
+    return {
+        'name': name, 'description': 'Load test product', 'price': '120.00', 'average_rating': 4.0,
+        'category': CATEGORIES[0], 'product_type': PRODUCT_TYPES[0],
+        'customizations': [{'name': 'Extra', 'group': 'Extras', 'toppings': 'Cheese, Olives'}],
+    }
+
+
+def sign_up(work, worker, index):
+    email = f'signup-{work.unique()}@bench.local'
+    body = {'email': email, 'full_name': 'Sign Up', 'password': PASSWORD, 'password2': PASSWORD, 'age': 30, 'city': 'Pune'}
+    return Call('POST', '/api/sign-up/', body, None, (201,))
+
+
+def sign_in(work, worker, index):
+    body = {'email': work.users[worker % len(work.users)].email, 'password': PASSWORD}
+    return Call('POST', '/api/sign-in/', body, None, (200,))
+
+
+def batch_favourites(work, worker, index):
+    body = {'action': 'add' if index % 2 == 0 else 'remove', 'food_ids': work.foods(index // 2, 10)}
+    return Call('POST', '/api/fvrt/batch', body, 'user', (200,))
+
+
+# Every route of app/urls.py, keyed by a name used in budgets, load test
+# reports and --routes.
+# Users work on their own favourites, so concurrent clients do not collide.
+SCENARIOS = {
+    'sign_up': sign_up,
+    'sign_in': sign_in,
+    'products': lambda work, worker, index: Call('GET', '/api/products/?limit=20', None, None, (200,)),
+    'products_filtered': lambda work, worker, index: Call(
+        'GET', f'/api/products/?category={CATEGORIES[index % len(CATEGORIES)]}&toppings=Cheese&ordering=price&limit=20', None, None, (200,),
+    ),
+    'product_create': lambda work, worker, index: Call(
+        'POST', '/api/products/', product_row(f'Created {work.unique()}'), 'admin', (201,),
+    ),
+    'trending': lambda work, worker, index: Call('GET', '/api/products/trending?limit=20', None, None, (200,)),
+    'import': lambda work, worker, index: Call(
+        'POST', '/api/products/import', [product_row(f'Imported {work.unique()}') for _ in range(20)], 'admin', (201,),
+    ),
+    'export': lambda work, worker, index: Call('GET', '/api/products/export', None, None, (200,)),
+    'changes': lambda work, worker, index: Call('GET', '/api/products/changes?limit=100', None, None, (200,)),
+    'search': lambda work, worker, index: Call('GET', f'/api/products/search?q=food+{index % 100}', None, None, (200,)),
+    'facets': lambda work, worker, index: Call(
+        'GET', f'/api/products/facets?category={CATEGORIES[index % len(CATEGORIES)]}', None, None, (200,),
+    ),
+    'metrics': lambda work, worker, index: Call('GET', '/api/metrics', None, 'metrics', (200,)),
+    'product_detail': lambda work, worker, index: Call('GET', f'/api/products/{work.food(index)}', None, None, (200,)),
+    'product_update': lambda work, worker, index: Call(
+        'PATCH', f'/api/products/{work.food(index)}', {'average_rating': 1 + index % 40 / 10}, 'admin', (200,),
+    ),
+    'product_delete': lambda work, worker, index: Call(
+        'DELETE', f'/api/products/{work.disposable()}', None, 'admin', (200,),
+    ),
+    'add_favourite': lambda work, worker, index: Call('POST', f'/api/add-to-fvrt/{work.food(index)}', None, 'user', (200, 400)),
+    'remove_favourite': lambda work, worker, index: Call(
+        'DELETE', f'/api/remove-from-fvrt/{work.food(index)}', None, 'user', (200, 404),
+    ),
+    'batch_favourites': batch_favourites,
+    'favourites': lambda work, worker, index: Call('GET', '/api/get-fvrt/?limit=20', None, 'user', (200,)),
+    'offers': lambda work, worker, index: Call('GET', '/api/get-offers/', None, 'user', (200,)),
+    'async_products': lambda work, worker, index: Call('GET', '/api/async/products/?limit=20', None, None, (200,)),
+    'async_product_detail': lambda work, worker, index: Call(
+        'GET', f'/api/async/products/{work.food(index)}', None, None, (200,),
+    ),
+    'async_add_favourite': lambda work, worker, index: Call(
+        'POST', f'/api/async/add-to-fvrt/{work.food(index)}', None, 'user', (200, 400),
+    ),
+    'async_favourites': lambda work, worker, index: Call('GET', '/api/async/get-fvrt/?limit=20', None, 'user', (200,)),
+}
+
+
+def headers_for(work, call, worker):
+    if call.auth == 'admin':
+        return {'Authorization': f'Bearer {work.admin_token}'}
+    if call.auth == 'user':
+        return {'Authorization': f'Bearer {work.tokens[worker % len(work.tokens)]}'}
+    if call.auth == 'metrics':
+        return {'Authorization': f'Bearer {settings.METRICS_TOKEN}'}
+    return {}
+
+
+def query_count(server_timing):
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class ClientDriver:
+    """
+    Requests through Django's test client, in this process.
+    """
+
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, call, headers):
+        body = json.dumps(call.body) if call.body is not None else ''
+        response = self.client.generic(call.method, call.path, body, content_type='application/json', headers=headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, response.get('Server-Timing')
+
+    def close(self):
+        # The requests ran on this thread's database connection. Closing an
+        # in-memory SQLite database is a no-op, so this keeps it alive.
+        connection.close()
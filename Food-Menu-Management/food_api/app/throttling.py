@@ -0,0 +1,123 @@
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """
+    Return ``(count, seconds)`` of a DRF-style rate such as ``'120/min'``.
+    """
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period[0]]
+
+
+def take_token(bucket, capacity, period, now):
+    """
+    Refill ``bucket`` (``(tokens, timestamp)`` or ``None`` for a full one)
+    at ``capacity`` tokens per ``period`` and take one token. Returns
+    ``(allowed, bucket, wait)``, ``wait`` being the seconds until a token
+    is available again.
+    """
+    tokens, updated = bucket if bucket is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0
+    return False, (tokens, now), (1 - tokens) * period / capacity
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client and view scope. A view opts in with
+    ``throttle_scope``; the rate comes from ``DEFAULT_THROTTLE_RATES`` under
+    ``<scope>_<kind>``, e.g. ``catalog_anon: '120/min'``: a bucket holds 120
+    tokens and refills at two per second, so clients may burst up to a
+    full period's worth. Scopes without a rate are not throttled.
+
+    Buckets live in the ``THROTTLE_CACHE_ALIAS`` cache. The default locmem
+    cache is per process, so each server process limits on its own; a
+    shared cache (e.g. Redis) makes the limits hold across processes. The
+    read-modify-write of a bucket is locked within a process, for sync and
+    async requests alike, so across processes sharing a cache a few extra
+    requests can get through.
+    """
+    kind = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def get_bucket(self, request, view):
+        """
+        Return ``(cache_key, capacity, period)``, or ``None`` when the request
+        is not throttled.
+        """
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{self.kind}') if scope else None
+        ident = self.get_ident_key(request) if rate else None
+        if ident is None:
+            return None
+        return (f'throttle:{scope}:{self.kind}:{ident}', *parse_rate(rate))
+
+    def get_cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def take(self, key, capacity, period):
+        cache = self.get_cache()
+        with _lock:
+            allowed, state, self.wait_seconds = take_token(cache.get(key), capacity, period, time.time())
+            cache.set(key, state, math.ceil(period) + 1)
+        return allowed
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        return self.take(*bucket)
+
+    async def aallow_request(self, request, view):
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        # Under the process lock like sync requests: awaiting the cache
+        # between the read and the write would let concurrent requests
+        # spend the same token.
+        return await sync_to_async(self.take)(*bucket)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Buckets per client IP (see ``NUM_PROXIES``) for anonymous requests.
+    """
+    kind = 'anon'
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Buckets per user for authenticated requests.
+    """
+    kind = 'user'
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
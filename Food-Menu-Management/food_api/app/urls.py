@@ -1,12 +1,33 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+
+def catalog_view(sync_view, async_view):
+    # ASYNC_VIEWS serves the main routes with the async views; they only pay off under ASGI.
+    return async_view.as_view() if settings.ASYNC_VIEWS else sync_view.as_view()
+
 
 urlpatterns = [
     path("sign-up/", views.UserSignupView.as_view(),name='sign-up'),
     path("sign-in/", views.UserLoginView.as_view(),name='sign-in'),
-    path("products/", views.ProductView.as_view(),name='products'),
-    path("products/<int:pk>", views.ProductDetailView.as_view()),
-    path('add-to-fvrt/<int:food_id>',views.AddFvrtFood.as_view()),
-    path('get-fvrt/',views.GetFvrtFood.as_view(),name='add-fvrt-food'),
+    path("products/", catalog_view(views.ProductView, async_views.AsyncProductView),name='products'),
+    path("products/trending", views.TrendingProductView.as_view(),name='products-trending'),
+    path("products/import", views.ProductImportView.as_view(),name='products-import'),
+    path("products/export", views.ProductExportView.as_view(),name='products-export'),
+    path("products/changes", views.ProductChangesView.as_view(),name='products-changes'),
+    path("products/search", views.ProductSearchView.as_view(),name='products-search'),
+    path("products/facets", views.ProductFacetsView.as_view(),name='products-facets'),
+    path("metrics", views.MetricsView.as_view(),name='metrics'),
+    path("products/<int:pk>", catalog_view(views.ProductDetailView, async_views.AsyncProductDetailView)),
+    path('add-to-fvrt/<int:food_id>',catalog_view(views.AddFvrtFood, async_views.AsyncAddFvrtFood)),
+    path('remove-from-fvrt/<int:food_id>',views.RemoveFvrtFood.as_view(),name='remove-fvrt-food'),
+    path('fvrt/batch',views.BatchFvrtFood.as_view(),name='batch-fvrt-food'),
+    path('get-fvrt/',catalog_view(views.GetFvrtFood, async_views.AsyncGetFvrtFood),name='add-fvrt-food'),
     path('get-offers/',views.GetSpecialOffer.as_view()),
+    # Always async, whatever ASYNC_VIEWS says.
+    path("async/products/", async_views.AsyncProductView.as_view(),name='async-products'),
+    path("async/products/<int:pk>", async_views.AsyncProductDetailView.as_view(),name='async-product-detail'),
+    path('async/add-to-fvrt/<int:food_id>',async_views.AsyncAddFvrtFood.as_view(),name='async-add-fvrt-food'),
+    path('async/get-fvrt/',async_views.AsyncGetFvrtFood.as_view(),name='async-get-fvrt-food'),
 ]
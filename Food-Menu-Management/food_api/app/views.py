@@ -1,25 +1,56 @@
 from rest_framework.views import APIView
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
-from .models import FoodProduct
-from .serializers import FoodProductSerializer, UserLoginSerializer, UserSignupSerializer
+from .models import Favourite, FoodProduct, FoodProductTombstone
+from .authentication import add_user_claims
+from .cache import bump_catalog_version, cached_catalog_response
+from .changes import get_changes
+from .facets import get_facets
+from .fast_serializers import FastFoodProductSerializer
+from .fieldsets import FIELDSET_PARAMS, parse_fieldset
+from .exporters import FORMAT_CONTENT_TYPES, FORMAT_NDJSON, ExportError, accepts_gzip, export_queryset, iter_export, parse_updated_since
+from .filters import PRODUCT_FILTER_PARAMS, build_product_filters, filter_products
+from .hashers import authenticate_user
+from .instrumentation import InstrumentedViewMixin, registry
+from .importers import CONTENT_TYPE_FORMATS, ImportFormatError, MenuImporter, iter_rows, text_stream
+from .offers import apply_discount, get_daily_offers
+from .pagination import QuerysetPaginationMixin
+from .renderers import PrometheusRenderer
+from .search import search_index, search_products
+from .snapshots import delete_snapshots, get_snapshot_response, serves_snapshots
+from .serializers import FavouriteBatchSerializer, FoodProductSerializer, TrendingFoodSerializer, UserLoginSerializer, UserSignupSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
+import hmac
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from drf_yasg.utils import swagger_auto_schema
-import random
 from drf_yasg import openapi
 
+PRODUCT_LIST_PARAMS = [*PRODUCT_FILTER_PARAMS, *FIELDSET_PARAMS, 'toppings_match', 'limit', 'offset', 'cursor', 'ordering']
+CASE_INSENSITIVE_PARAMS = ['category', 'type', 'toppings']
+TRENDING_FILTER_FIELDS = ['category__in', 'product_type']
+SEARCH_PARAMS = [*PRODUCT_FILTER_PARAMS, 'toppings_match', 'q', 'limit', 'offset']
+FACET_PARAMS = [*PRODUCT_FILTER_PARAMS, 'toppings_match']
+FIELDSET_OPENAPI_PARAMS = [
+    openapi.Parameter(name='fields', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma separated product fields, e.g. id,name,price,average_rating"),
+    openapi.Parameter(name='include', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['customizations'], description="Nested data to keep when fields is given"),
+]
+
 def get_token_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
     }
 
-class UserSignupView(APIView):
+class UserSignupView(InstrumentedViewMixin, APIView):
     @swagger_auto_schema(request_body=UserSignupSerializer)
     def post(self, request):
         serializer = UserSignupSerializer(data=request.data)
@@ -30,22 +61,23 @@ class UserSignupView(APIView):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserLoginView(APIView):
+class UserLoginView(InstrumentedViewMixin, APIView):
     @swagger_auto_schema(request_body=UserLoginSerializer)
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
             email = serializer.data.get('email')
             password = serializer.data.get('password')
-            user = authenticate(email=email, password=password)
+            user = authenticate_user(email, password)
             if user is not None:
                 token = get_token_for_user(user)
                 return Response({"token": token, "msg": "Login Successful"}, status=status.HTTP_200_OK)
             return Response({"errors": {"validation_errors": ['password and email is not valid']}}, status=status.HTTP_404_NOT_FOUND)
 
-class ProductView(APIView):
-    pagination_class = LimitOffsetPagination
+class ProductView(InstrumentedViewMixin, QuerysetPaginationMixin, APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'catalog'
+    read_serializer_class = FastFoodProductSerializer
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -57,33 +89,28 @@ class ProductView(APIView):
         openapi.Parameter(name='max_price', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
         openapi.Parameter(name='average_rating', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
         openapi.Parameter(name='category', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
-        openapi.Parameter(name='toppings', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
-        openapi.Parameter(name='type', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING)
+        openapi.Parameter(name='toppings', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma separated toppings"),
+        openapi.Parameter(name='toppings_match', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['any', 'all'], description="Match any (default) or all of the toppings"),
+        openapi.Parameter(name='type', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter(name='limit', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter(name='offset', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter(name='cursor', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Keyset pagination cursor, pass it empty for the first page"),
+        openapi.Parameter(name='ordering', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['id', 'price'], description="Keyset pagination ordering"),
+        *FIELDSET_OPENAPI_PARAMS,
     ])
+    @cached_catalog_response(params=PRODUCT_LIST_PARAMS, case_insensitive=CASE_INSENSITIVE_PARAMS)
     def get(self, request):
-        filters = {}
-        filter_mapping = {
-            'min_price': 'price__gte',
-            'max_price': 'price__lte',
-            'average_rating': 'average_rating__gte',
-            'category': 'category__in',
-            'toppings': 'customization__toppings__in',
-            'type': 'product_type',
-        }
-
-        for param, field in filter_mapping.items():
-            values = self.request.query_params.getlist(param) if param == 'category' else self.request.query_params.get(param)
-            if values:
-                values = values.capitalize() if isinstance(values, str) else [value.capitalize() for value in values]
-                filters[field] = values
-
+        fieldset = parse_fieldset(request.query_params)
         try:
-            foods = FoodProduct.objects.filter(**filters)
-            serializer = FoodProductSerializer(foods, many=True)
-            page = self.pagination_class().paginate_queryset(serializer.data, self.request)
-            if page is not None:
-                return self.get_paginated_response(page)
-            
+            if serves_snapshots(request, fieldset):
+                return get_snapshot_response(self, request.query_params)
+            foods = filter_products(FoodProduct.objects.all(), self.request.query_params).order_by('id')
+            foods = self.read_serializer_class.read_queryset(foods, **fieldset)
+            response = self.get_paginated_data(foods, self.read_serializer_class, **fieldset)
+            if response is not None:
+                return response
+
+            serializer = self.read_serializer_class(foods, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -105,18 +132,206 @@ class ProductView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class ProductDetailView(APIView):
+class TrendingProductView(InstrumentedViewMixin, APIView):
+    permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
+    default_limit = 10
+    max_limit = 50
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter(name='category', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter(name='type', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter(name='limit', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request):
+        try:
+            limit = max(0, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+            filters = {
+                field: value for field, value in build_product_filters(request.query_params).items()
+                if field in TRENDING_FILTER_FIELDS
+            }
+            foods = (
+                FoodProduct.objects.with_menu_relations('favourite_count')
+                .filter(**filters)
+                .order_by('-favourite_count', 'id')[:limit]
+            )
+            serializer = TrendingFoodSerializer(foods, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class ProductSearchView(InstrumentedViewMixin, APIView):
+    permission_classes = [AllowAny]
+    throttle_scope = 'search'
+    read_serializer_class = FastFoodProductSerializer
+    default_limit = 20
+    max_limit = 100
+
+    @swagger_auto_schema(
+        operation_description="Ranked search over name, description, category and toppings, tolerant to typos. Combines with the product list filters.",
+        manual_parameters=[
+            openapi.Parameter(name='q', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter(name='min_price', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='max_price', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='average_rating', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='category', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(name='type', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(name='toppings', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma separated toppings"),
+            openapi.Parameter(name='limit', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter(name='offset', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    @cached_catalog_response(params=SEARCH_PARAMS, case_insensitive=[*CASE_INSENSITIVE_PARAMS, 'q'])
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(0, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+            offset = max(0, int(request.query_params.get('offset', 0)))
+            food_ids, count = search_products(text, request.query_params, limit, offset)
+            ranking = Case(*(When(pk=food_id, then=position) for position, food_id in enumerate(food_ids)))
+            foods = FoodProduct.objects.filter(pk__in=food_ids).order_by(ranking)
+            serializer = self.read_serializer_class(self.read_serializer_class.read_queryset(foods), many=True)
+            response = Response({'count': count, 'results': serializer.data}, status=status.HTTP_200_OK)
+            # Matches of an index still being rebuilt are not cached under the new catalog version.
+            response.cacheable = not search_index.stale
+            return response
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class ProductFacetsView(InstrumentedViewMixin, APIView):
+    permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
+
+    @swagger_auto_schema(
+        operation_description="Product counts per category, type, price bucket and rating bucket for the product list filters. Each dimension ignores its own filter.",
+        manual_parameters=[
+            openapi.Parameter(name='min_price', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='max_price', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='average_rating', in_=openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(name='category', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(name='type', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(name='toppings', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma separated toppings"),
+            openapi.Parameter(name='toppings_match', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['any', 'all']),
+        ],
+    )
+    @cached_catalog_response(params=FACET_PARAMS, case_insensitive=CASE_INSENSITIVE_PARAMS)
+    def get(self, request):
+        try:
+            return Response(get_facets(request.query_params), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class ProductImportView(InstrumentedViewMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    chunk_size = 500
+
+    @swagger_auto_schema(
+        operation_description="Bulk import products from a JSON array, NDJSON or CSV request body, chosen by Content-Type.",
+        manual_parameters=[
+            openapi.Parameter(name = 'Authorization', in_=openapi.IN_HEADER, description="Please Provide Bearer JWT token", type=openapi.TYPE_STRING),
+        ],
+    )
+    def post(self, request):
+        if not request.user.is_admin:
+            raise PermissionDenied("You do not have permission to perform this action.")
+
+        content_type = (request.content_type or '').split(';')[0].strip()
+        file_format = CONTENT_TYPE_FORMATS.get(content_type)
+        if file_format is None or request.stream is None:
+            return Response({'error': f"Send a body with one of: {', '.join(CONTENT_TYPE_FORMATS)}"}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        try:
+            result = MenuImporter(chunk_size=self.chunk_size).run(iter_rows(text_stream(request.stream), file_format))
+        except ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {'msg': f'{result.created} products imported', **result.as_dict()}
+        return Response(data, status=status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST)
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Always answer with the first renderer, whatever the Accept header says.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+class ProductExportView(InstrumentedViewMixin, APIView):
+    permission_classes = [AllowAny]
+    # Each request streams the whole catalog.
+    throttle_scope = 'export'
+    # The body is streamed as is; only error responses go through DRF rendering.
+    content_negotiation_class = IgnoreClientContentNegotiation
+    chunk_size = 500
+
+    @swagger_auto_schema(
+        operation_description="Stream the whole menu with customizations as NDJSON (default) or a JSON array, gzipped when the client accepts it.",
+        manual_parameters=[
+            openapi.Parameter(name='export_format', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(FORMAT_CONTENT_TYPES)),
+            openapi.Parameter(name='updated_since', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description="Only products updated at or after this time"),
+        ],
+    )
+    def get(self, request):
+        export_format = request.query_params.get('export_format', FORMAT_NDJSON)
+        if export_format not in FORMAT_CONTENT_TYPES:
+            return Response({'error': f"export_format must be one of: {', '.join(FORMAT_CONTENT_TYPES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            updated_since = parse_updated_since(request.query_params.get('updated_since'))
+        except ExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content = (chunk.encode() for chunk in iter_export(export_queryset(updated_since), export_format, self.chunk_size))
+        gzipped = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+        if gzipped:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(content, content_type=FORMAT_CONTENT_TYPES[export_format])
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+class ProductChangesView(InstrumentedViewMixin, APIView):
+    permission_classes = [AllowAny]
+    default_limit = 100
+    max_limit = 1000
+
+    @swagger_auto_schema(
+        operation_description="Products upserted or deleted after the `since` cursor, oldest first. Start without `since` and pass back `next` to resume.",
+        manual_parameters=[
+            openapi.Parameter(name='since', in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Cursor returned as `next` by the previous call"),
+            openapi.Parameter(name='limit', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        changes, cursor, has_more = get_changes(request.query_params.get('since'), limit)
+        return Response({'next': cursor, 'has_more': has_more, 'changes': changes}, status=status.HTTP_200_OK)
+
+class ProductDetailView(InstrumentedViewMixin, APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'catalog'
+    read_serializer_class = FastFoodProductSerializer
 
     def get_permissions(self):
         if self.request.method == 'GET':
             return [AllowAny()]
         return super().get_permissions()
 
+    @swagger_auto_schema(manual_parameters=FIELDSET_OPENAPI_PARAMS)
+    @cached_catalog_response(params=FIELDSET_PARAMS)
     def get(self, request, pk):
+        fieldset = parse_fieldset(request.query_params)
         try:
-            food = FoodProduct.objects.get(pk=pk)
-            serializer = FoodProductSerializer(food)
+            food = self.read_serializer_class.read_queryset(FoodProduct.objects.all(), **fieldset).get(pk=pk)
+            serializer = self.read_serializer_class(food, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -158,12 +373,15 @@ class ProductDetailView(APIView):
 
         try:
             food = FoodProduct.objects.get(pk=pk)
-            food.delete()
+            with transaction.atomic():
+                food.delete()
+                FoodProductTombstone.objects.create(food_id=pk, change_version=bump_catalog_version())
+                delete_snapshots([pk])
             return Response({'msg': f'{food.name} deleted'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class AddFvrtFood(APIView):
+class AddFvrtFood(InstrumentedViewMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(manual_parameters=[
@@ -172,34 +390,66 @@ class AddFvrtFood(APIView):
     def post(self, request, food_id):
         user = request.user
         try:
-            food = FoodProduct.objects.get(pk=food_id)
-            if food.fvrt_by.filter(pk=user.id).exists():
-                return Response({'msg': f"{food.name} is already in favourite list"}, status=status.HTTP_400_BAD_REQUEST)
-            food.fvrt_by.add(user)
-            return Response({'msg': f"{food.name} added to favourite"})
+            name = FoodProduct.objects.values_list('name', flat=True).get(pk=food_id)
+            if not Favourite.objects.add(user, [food_id]):
+                return Response({'msg': f"{name} is already in favourite list"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'msg': f"{name} added to favourite"})
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class GetFvrtFood(APIView):
+class RemoveFvrtFood(InstrumentedViewMixin, APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = LimitOffsetPagination
 
     @swagger_auto_schema(manual_parameters=[
-        openapi.Parameter(name = 'Authorization', in_=openapi.IN_HEADER, description=" Please Provide Bearer JWT token", type=openapi.TYPE_STRING)
+        openapi.Parameter(name = 'Authorization', in_=openapi.IN_HEADER, description="Please Provide Bearer JWT token", type=openapi.TYPE_STRING)
+    ])
+    def delete(self, request, food_id):
+        if not Favourite.objects.remove(request.user, [food_id]):
+            return Response({'msg': 'This food is not in your favourite list'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'msg': 'Food removed from favourite'})
+
+class BatchFvrtFood(InstrumentedViewMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(request_body=FavouriteBatchSerializer,manual_parameters=[
+        openapi.Parameter(name = 'Authorization', in_=openapi.IN_HEADER, description="Please Provide Bearer JWT token", type=openapi.TYPE_STRING)
+    ])
+    def post(self, request):
+        serializer = FavouriteBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        food_ids = serializer.validated_data['food_ids']
+        if serializer.validated_data['action'] == FavouriteBatchSerializer.ADD:
+            changed = len(Favourite.objects.add(request.user, food_ids))
+            msg = f'{changed} foods added to favourite'
+        else:
+            changed = len(Favourite.objects.remove(request.user, food_ids))
+            msg = f'{changed} foods removed from favourite'
+        return Response({'msg': msg, 'changed': changed})
+
+class GetFvrtFood(InstrumentedViewMixin, QuerysetPaginationMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    read_serializer_class = FastFoodProductSerializer
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter(name = 'Authorization', in_=openapi.IN_HEADER, description=" Please Provide Bearer JWT token", type=openapi.TYPE_STRING),
+        *FIELDSET_OPENAPI_PARAMS,
     ])
     def get(self, request):
         user = request.user
-        favorite_foods = FoodProduct.objects.filter(fvrt_by=user)
-        serializer = FoodProductSerializer(favorite_foods, many=True)
-        page = self.pagination_class().paginate_queryset(serializer.data, self.request)
-        if page is not None:
-            return self.pagination_class().get_paginated_response(page)
-        if favorite_foods.exists():
+        fieldset = parse_fieldset(request.query_params)
+        favorite_foods = FoodProduct.objects.filter(fvrt_by=user.pk).order_by('id')
+        favorite_foods = self.read_serializer_class.read_queryset(favorite_foods, **fieldset)
+        response = self.get_paginated_data(favorite_foods, self.read_serializer_class, **fieldset)
+        if response is not None:
+            return response
+
+        serializer = self.read_serializer_class(favorite_foods, many=True, **fieldset)
+        if serializer.data:
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response({'msg': 'You dont have any fvrt food'}, status=status.HTTP_404_NOT_FOUND)
 
-class GetSpecialOffer(APIView):
+class GetSpecialOffer(InstrumentedViewMixin, APIView):
     permission_classes = [IsAuthenticated]
     
     @swagger_auto_schema(manual_parameters=[
@@ -207,14 +457,35 @@ class GetSpecialOffer(APIView):
     ])
     def get(self, request):
         try:
-            food_ids = [food.id for food in FoodProduct.objects.all()]
-            random_ids = random.sample(food_ids, min(3, len(food_ids)))
-            foods = FoodProduct.objects.filter(pk__in=random_ids)
+            offers = dict(get_daily_offers(request.user))
+            foods = FoodProduct.objects.with_menu_relations().filter(pk__in=offers).order_by('id')
             serializer = FoodProductSerializer(foods, many=True)
             for data in serializer.data:
-                off = round(float(data['price']) * random.randint(10, 30) / 100, 2)
-                data['price'] = f"{float(data['price']) - off}"
-                data['Note'] = f'You Get {off}% off On This Food'
+                percent = offers[data['id']]
+                price, _ = apply_discount(data['price'], percent)
+                data['price'] = str(price)
+                data['Note'] = f'You Get {percent}% off On This Food'
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class MetricsView(APIView):
+    """
+    Request histograms of this process in Prometheus text format, behind
+    ``Authorization: Bearer <METRICS_TOKEN>``. Without a METRICS_TOKEN the
+    endpoint only exists in DEBUG.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    renderer_classes = [PrometheusRenderer]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    @swagger_auto_schema(auto_schema=None)
+    def get(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        if not token:
+            if not settings.DEBUG:
+                raise NotFound()
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            raise PermissionDenied("Invalid metrics token.")
+        return Response(registry.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
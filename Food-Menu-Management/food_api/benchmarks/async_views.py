@@ -0,0 +1,136 @@
+"""
+Sync (WSGI) against async (ASGI) views under concurrent clients.
+
+The ``wsgi`` mode runs each client in its own thread with the sync request
+handler on ``/api/...``, the way a threaded WSGI server would. The ``asgi``
+mode runs every client as a coroutine on one event loop against the async
+views on ``/api/async/...``. Both report p50/p99 latency per route and the
+overall requests/sec, e.g.::
+
+    python -m benchmarks.async_views --products 2000 --clients 1 16 64
+
+SQLite's in-memory test database cannot take concurrent writes from
+several threads; leave out ``add_favourite`` there with ``--routes``.
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentile, print_table, test_database
+
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from app.models import Favourite, User
+from app.views import get_token_for_user
+from app.tests.workloads import seed_catalog
+
+
+ROUTES = {
+    'products': ('GET', 'products/?limit=20'),
+    'product_detail': ('GET', 'products/{food_id}'),
+    'favourites': ('GET', 'get-fvrt/?limit=20'),
+    'add_favourite': ('POST', 'add-to-fvrt/{food_id}'),
+}
+
+
+def routes(names, prefix, food_ids, index):
+    food_id = food_ids[index % len(food_ids)]
+    return [(ROUTES[name][0], name, prefix + ROUTES[name][1].format(food_id=food_id)) for name in names]
+
+
+def auth_headers(token):
+    # Per request: Django 5.0's AsyncClient drops headers given to its constructor.
+    return {'Authorization': f'Bearer {token}'}
+
+
+def check(response):
+    # Adding a food twice answers 400, which is still a served request.
+    assert response.status_code in (200, 400), response.content[:200]
+
+
+def wsgi_client(names, token, food_ids, requests, offset):
+    client = Client()
+    timings = defaultdict(list)
+    try:
+        for index in range(offset, offset + requests):
+            for method, name, url in routes(names, '/api/', food_ids, index):
+                start = time.perf_counter()
+                check(client.generic(method, url, headers=auth_headers(token)))
+                timings[name].append((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+    return timings
+
+
+async def asgi_client(names, token, food_ids, requests, offset):
+    client = AsyncClient()
+    timings = defaultdict(list)
+    for index in range(offset, offset + requests):
+        for method, name, url in routes(names, '/api/async/', food_ids, index):
+            start = time.perf_counter()
+            check(await client.generic(method, url, headers=auth_headers(token)))
+            timings[name].append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_wsgi(names, token, food_ids, clients, requests):
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        futures = [executor.submit(wsgi_client, names, token, food_ids, requests, client * requests) for client in range(clients)]
+        return [future.result() for future in futures]
+
+
+async def run_asgi(names, token, food_ids, clients, requests):
+    return await asyncio.gather(*(asgi_client(names, token, food_ids, requests, client * requests) for client in range(clients)))
+
+
+def merge(results):
+    merged = defaultdict(list)
+    for timings in results:
+        for name, values in timings.items():
+            merged[name].extend(values)
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--clients', nargs='+', type=int, default=[1, 16, 64])
+    parser.add_argument('--requests', type=int, default=10, help='Iterations over all routes per client')
+    parser.add_argument('--routes', nargs='+', default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'], choices=['wsgi', 'asgi'])
+    args = parser.parse_args()
+
+    results = []
+    with test_database():
+        food_ids = [food.pk for food in seed_catalog(args.products)]
+        user = User.objects.create_user(email='load@bench.local', password='benchmark-password', full_name='Load', age=30, city='Pune')
+        token = get_token_for_user(user)['access']
+
+        for clients in args.clients:
+            for mode in args.modes:
+                Favourite.objects.all().delete()
+                start = time.perf_counter()
+                if mode == 'wsgi':
+                    timings = merge(run_wsgi(args.routes, token, food_ids, clients, args.requests))
+                else:
+                    timings = merge(asyncio.run(run_asgi(args.routes, token, food_ids, clients, args.requests)))
+                elapsed = time.perf_counter() - start
+
+                total = sum(len(values) for values in timings.values())
+                for name, values in sorted(timings.items()):
+                    results.append({
+                        'mode': mode,
+                        'clients': clients,
+                        'route': name,
+                        'p50_ms': round(percentile(values, 50), 3),
+                        'p99_ms': round(percentile(values, 99), 3),
+                        'total_rps': round(total / elapsed, 1),
+                    })
+    print_table(results, ['mode', 'clients', 'route', 'p50_ms', 'p99_ms', 'total_rps'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Bursts of identical catalog requests on a cold response cache, with and
+without coalescing (``CATALOG_COALESCE_TIMEOUT``).
+
+``wsgi`` sends the burst from one thread per request to the sync views,
+``asgi`` from one task per request to the async views. Each burst starts
+on a new catalog version, so every request misses the cache; reported are
+the burst's wall time, how many requests computed the response and the
+database queries of the whole burst (from ``Server-Timing``).
+"""
+import argparse
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import print_table, summarize, test_database
+
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from app.cache import bump_catalog_version
+from app.tests.workloads import seed_catalog
+
+URL = '/api/products/?category=Pizza&toppings=Cheese&ordering=price&limit=100'
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def wsgi_get(_):
+    try:
+        return Client().get(URL)
+    finally:
+        connection.close()
+
+
+def wsgi_burst(size):
+    with ThreadPoolExecutor(max_workers=size) as executor:
+        return list(executor.map(wsgi_get, range(size)))
+
+
+async def asgi_burst(size):
+    client = AsyncClient()
+    return await asyncio.gather(*(client.get(URL.replace('/api/', '/api/async/')) for _ in range(size)))
+
+
+def run(bursts, repeat):
+    rows = []
+    for mode in ('wsgi', 'asgi'):
+        for size in bursts:
+            for coalescing, timeout in (('off', 0), ('on', 10)):
+                timings, computed, queries = [], [], []
+                with override_settings(CATALOG_COALESCE_TIMEOUT=timeout):
+                    for _ in range(repeat):
+                        bump_catalog_version()
+                        start = time.perf_counter()
+                        responses = wsgi_burst(size) if mode == 'wsgi' else asyncio.run(asgi_burst(size))
+                        timings.append((time.perf_counter() - start) * 1000)
+                        assert all(response.status_code == 200 for response in responses)
+                        computed.append(sum(response['X-Cache'] == 'MISS' for response in responses))
+                        queries.append(sum(int(QUERIES_RE.search(response['Server-Timing']).group(1)) for response in responses))
+                rows.append({
+                    'mode': mode, 'burst': size, 'coalescing': coalescing,
+                    'computed': round(sum(computed) / repeat, 1), 'queries': round(sum(queries) / repeat, 1),
+                    **summarize(timings),
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--bursts', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with test_database(response_cache=True):
+        seed_catalog(args.products)
+        rows = run(args.bursts, args.repeat)
+    print_table(rows, ['mode', 'burst', 'coalescing', 'computed', 'queries', 'mean_ms', 'p50_ms', 'p95_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark scripts. Importing this module sets up
+Django, so scripts import it before any ``app`` module; the synthetic
+catalogs and request scenarios they share with the tests live in
+``app.tests.workloads``.
+
+Every benchmark runs against a throwaway test database created from the
+configured ``DATABASES`` (``test_<NAME>`` on Postgres), so it never touches
+development data. Run them from the ``food_api`` directory, e.g.::
+
+    python -m benchmarks.pagination --sizes 1000 10000 50000
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food_api.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment  # noqa: E402
+
+METRICS_TOKEN = 'benchmark-metrics'
+
+
+@contextmanager
+def test_database(response_cache=False):
+    """
+    Run inside a fresh test database, without request throttling, with
+    ``Server-Timing`` headers on and ``/api/metrics`` behind
+    ``METRICS_TOKEN``. The catalog response cache is disabled unless
+    ``response_cache`` is set, so timings measure the database and
+    serialization path rather than cache hits.
+    """
+    caches = dict(settings.CACHES)
+    if not response_cache:
+        caches[settings.MENU_CACHE_ALIAS] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+    instrumentation = {**settings.PERFORMANCE_INSTRUMENTATION, 'SERVER_TIMING': True}
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(
+            CACHES=caches, REST_FRAMEWORK=rest_framework, PERFORMANCE_INSTRUMENTATION=instrumentation, METRICS_TOKEN=METRICS_TOKEN,
+        ):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=20, warmup=2):
+    """Return timings of ``func`` in milliseconds."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(timings):
+    return {
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def print_table(rows, columns):
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in columns))
@@ -0,0 +1,96 @@
+"""
+Compare two ``benchmarks.loadtest`` result files and flag regressions.
+
+Rows are matched on driver, concurrency and route. A route regresses when
+its p50 or p95 latency grows by more than ``--threshold`` percent (and at
+least ``--min-ms``), its throughput drops by more than ``--threshold``
+percent, it makes half a query or more per request more on average, or it
+has more errors. Exits with status 1 on any regression, so it can gate CI::
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+LATENCIES = ['p50_ms', 'p95_ms']
+
+
+def load(path):
+    with open(path) as file:
+        report = json.load(file)
+    return {(row['driver'], row['concurrency'], row['route']): row for row in report['results']}
+
+
+def change(base, head):
+    if not base:
+        return None
+    return round((head - base) / base * 100, 1)
+
+
+def regressions(base, head, threshold=10, min_ms=0.5):
+    """
+    Reasons ``head`` (a result row) regressed from ``base``.
+    """
+    reasons = []
+    for metric in LATENCIES:
+        delta = change(base[metric], head[metric])
+        if delta is not None and delta > threshold and head[metric] - base[metric] >= min_ms:
+            reasons.append(f'{metric} +{delta}%')
+    delta = change(base['throughput_rps'], head['throughput_rps'])
+    if delta is not None and delta < -threshold:
+        reasons.append(f'throughput {delta}%')
+    if (head['queries_per_request'] or 0) >= (base['queries_per_request'] or 0) + 0.5:
+        reasons.append(f"queries {base['queries_per_request']} -> {head['queries_per_request']}")
+    if head['errors'] > base['errors']:
+        reasons.append(f"errors {base['errors']} -> {head['errors']}")
+    return reasons
+
+
+def compare(base, head, threshold=10, min_ms=0.5):
+    rows = []
+    for key in sorted(base.keys() & head.keys(), key=str):
+        old, new = base[key], head[key]
+        driver, concurrency, route = key
+        rows.append({
+            'driver': driver,
+            'concurrency': concurrency,
+            'route': route,
+            'p50_ms': f"{old['p50_ms']} -> {new['p50_ms']}",
+            'p95_ms': f"{old['p95_ms']} -> {new['p95_ms']}",
+            'rps_change': f"{change(old['throughput_rps'], new['throughput_rps'])}%",
+            'queries': f"{old['queries_per_request']} -> {new['queries_per_request']}",
+            'regression': ', '.join(regressions(old, new, threshold, min_ms)),
+        })
+    return rows
+
+
+# Not imported from benchmarks.common, which sets up Django on import.
+def print_table(rows, columns):
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10, help='Allowed change in percent')
+    parser.add_argument('--min-ms', type=float, default=0.5, help='Ignore latency changes smaller than this')
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    rows = compare(base, head, args.threshold, args.min_ms)
+    if rows:
+        print_table(rows, ['driver', 'concurrency', 'route', 'p50_ms', 'p95_ms', 'rps_change', 'queries', 'regression'])
+    for key in sorted(base.keys() ^ head.keys(), key=str):
+        print(f"Only in {'base' if key in base else 'head'}: {' '.join(map(str, key))}")
+    regressed = [row for row in rows if row['regression']]
+    print(f'\n{len(regressed)} of {len(rows)} routes regressed')
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Cost of the facet counts behind ``GET /api/products/facets``.
+
+``naive`` runs one filtered GROUP BY per dimension, the way the counts
+would be computed without ``app.facets``; ``grouped`` is the single query
+the endpoint uses; ``cached`` is the endpoint answering from the catalog
+response cache.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.db.models import Count
+from django.http import QueryDict
+from django.test import Client
+
+from app.facets import FACET_DIMENSIONS, PRICE_BUCKETS, RATING_BUCKETS, bucket_case, get_facets
+from app.filters import build_product_filters
+from app.models import FoodProduct
+from app.tests.workloads import seed_catalog
+
+PARAMS = 'category=Pizza&category=Burger&type=Veg&max_price=300'
+
+
+def naive_facets(query_params):
+    filters = build_product_filters(query_params)
+    counts = {}
+    for dimension, (column, lookups) in FACET_DIMENSIONS.items():
+        others = {lookup: value for lookup, value in filters.items() if lookup not in lookups}
+        foods = FoodProduct.objects.filter(**others).annotate(
+            price_bucket=bucket_case('price', PRICE_BUCKETS),
+            rating_bucket=bucket_case('average_rating', RATING_BUCKETS),
+        )
+        counts[dimension] = list(foods.values(column).annotate(count=Count('id')).order_by())
+    return counts
+
+
+def run(sizes, repeat):
+    client = Client()
+    query_params = QueryDict(PARAMS)
+    rows = []
+    seeded = 0
+    for size in sorted(sizes):
+        seed_catalog(size - seeded, customizations_per_product=0)
+        seeded = size
+        cases = {
+            'naive': lambda: naive_facets(query_params),
+            'grouped': lambda: get_facets(query_params),
+            'cached': lambda: client.get(f'/api/products/facets?{PARAMS}'),
+        }
+        for name, func in cases.items():
+            rows.append({'catalog': size, 'case': name, **summarize(measure(func, repeat=repeat))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database(response_cache=True):
+        rows = run(args.sizes, args.repeat)
+    print_table(rows, ['catalog', 'case', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Payload size and latency of ``GET /api/products/`` with and without a
+sparse fieldset.
+
+``full`` is the default response, ``minimal`` asks for the list-screen
+fields only (``fields=name,price,average_rating``) and ``minimal_nested``
+adds ``include=customizations``. The serialized-product memo is cleared
+before every request, so each timing includes the SQL and serialization.
+"""
+import argparse
+import gzip
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.test import Client
+
+from app.fast_serializers import product_cache
+from app.tests.workloads import seed_catalog
+
+MINIMAL_FIELDS = 'name,price,average_rating'
+
+VARIANTS = {
+    'full': {},
+    'minimal': {'fields': MINIMAL_FIELDS},
+    'minimal_nested': {'fields': MINIMAL_FIELDS, 'include': 'customizations'},
+}
+
+
+def run(catalog, limits, repeat):
+    client = Client()
+    seed_catalog(catalog)
+    rows = []
+    for limit in limits:
+        for name, params in VARIANTS.items():
+            params = {**params, 'limit': limit}
+
+            def request():
+                product_cache.clear()
+                return client.get('/api/products/', params)
+
+            content = request().content
+            rows.append({
+                'limit': limit, 'variant': name, 'bytes': len(content), 'gzip_bytes': len(gzip.compress(content)),
+                **summarize(measure(request, repeat=repeat)),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--catalog', type=int, default=10000)
+    parser.add_argument('--limits', type=int, nargs='+', default=[20, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        rows = run(args.catalog, args.limits, args.repeat)
+    print_table(rows, ['limit', 'variant', 'bytes', 'gzip_bytes', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Rows/sec of the bulk menu importer against the per-item serializer path
+used by ``POST /api/products/``.
+
+``per_item_original`` is that path as it was before the importer landed,
+with one INSERT per customization; ``per_item_serializer`` is today's
+``FoodProductSerializer.create``, which bulk-creates a product's
+customizations. Both do the same follow-up work (toppings, search vectors,
+snapshots, catalog version), so only the inserts differ.
+"""
+import argparse
+import time
+
+from benchmarks.common import print_table, test_database
+
+from django.db import transaction
+
+from app.cache import bump_catalog_version
+from app.importers import MenuImporter
+from app.models import Customization, FoodProduct, Topping
+from app.search import update_search_vectors
+from app.serializers import FoodProductSerializer, without_id
+from app.snapshots import refresh_snapshots
+from app.tests.workloads import CATEGORIES, PRODUCT_TYPES, TOPPINGS, clear_catalog
+
+
+def generate_rows(count, customizations_per_product):
+    for index in range(count):
+        yield {
+            'name': f'Food {index}',
+            'description': f'Synthetic food number {index}',
+            'price': f'{50 + (index * 37) % 450}.00',
+            'average_rating': round(1 + (index * 7) % 40 / 10, 1),
+            'category': CATEGORIES[index % len(CATEGORIES)],
+            'product_type': PRODUCT_TYPES[index % len(PRODUCT_TYPES)],
+            'customizations': [
+                {
+                    'name': f'Option {option}',
+                    'group': 'Extras',
+                    'toppings': ', '.join(TOPPINGS[(index + option + shift) % len(TOPPINGS)] for shift in range(2)),
+                }
+                for option in range(customizations_per_product)
+            ],
+        }
+
+
+@transaction.atomic
+def create_one_by_one(validated_data):
+    customization_data = validated_data.pop('customizations')
+    food_product = FoodProduct.objects.create(**validated_data)
+    customizations = [
+        Customization.objects.create(food_product=food_product, **without_id(customization_item))
+        for customization_item in customization_data
+    ]
+    Topping.objects.link(customizations)
+    update_search_vectors([food_product.pk])
+    refresh_snapshots([food_product.pk])
+    bump_catalog_version()
+
+
+def per_item_original(rows):
+    for row in rows:
+        serializer = FoodProductSerializer(data=row)
+        serializer.is_valid(raise_exception=True)
+        create_one_by_one(serializer.validated_data)
+
+
+def per_item(rows):
+    for row in rows:
+        serializer = FoodProductSerializer(data=row)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+def bulk(rows, chunk_size):
+    result = MenuImporter(chunk_size=chunk_size).run(rows)
+    assert not result.errors, result.errors[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--customizations', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    cases = {
+        'per_item_original': lambda rows: per_item_original(rows),
+        'per_item_serializer': lambda rows: per_item(rows),
+        'bulk_import': lambda rows: bulk(rows, args.chunk_size),
+    }
+    results = []
+    with test_database():
+        for name, func in cases.items():
+            clear_catalog()
+            start = time.perf_counter()
+            func(generate_rows(args.rows, args.customizations))
+            elapsed = time.perf_counter() - start
+            results.append({'case': name, 'rows': args.rows, 'seconds': round(elapsed, 3), 'rows_per_sec': round(args.rows / elapsed)})
+    print_table(results, ['case', 'rows', 'seconds', 'rows_per_sec'])
+
+
+if __name__ == '__main__':
+    main()
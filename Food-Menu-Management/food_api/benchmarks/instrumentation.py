@@ -0,0 +1,57 @@
+"""
+Overhead of ``app.instrumentation.PerformanceMiddleware``.
+
+Times ``GET /api/products/`` and a product detail with the middleware
+(and its query wrapper) enabled and disabled. The response cache is off
+and the serialized-product memo is cleared before every request, so each
+timing includes the SQL, serialization and rendering being measured.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.test import Client, override_settings
+
+from app.fast_serializers import product_cache
+from app.models import FoodProduct
+from app.tests.workloads import seed_catalog
+
+VARIANTS = {
+    'off': {'ENABLED': False},
+    'on': {'ENABLED': True, 'SERVER_TIMING': True, 'SLOW_QUERY_MS': 100},
+}
+
+
+def run(catalog, limits, repeat):
+    seed_catalog(catalog)
+    pk = FoodProduct.objects.values_list('pk', flat=True).first()
+    endpoints = [(f'list limit={limit}', '/api/products/', {'limit': limit}) for limit in limits]
+    endpoints.append(('detail', f'/api/products/{pk}', {}))
+    rows = []
+    for endpoint, path, params in endpoints:
+        for name, options in VARIANTS.items():
+            with override_settings(PERFORMANCE_INSTRUMENTATION=options):
+                client = Client()
+
+                def request():
+                    product_cache.clear()
+                    return client.get(path, params)
+
+                rows.append({'endpoint': endpoint, 'instrumentation': name, **summarize(measure(request, repeat=repeat))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--catalog', type=int, default=10000)
+    parser.add_argument('--limits', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with test_database():
+        rows = run(args.catalog, args.limits, args.repeat)
+    print_table(rows, ['endpoint', 'instrumentation', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+Load test of every API route, in process and against real servers.
+
+Seeds a synthetic catalog (products, customizations, users, favourites) in
+a throwaway test database, then sends ``--requests`` requests per route in
+``app.tests.workloads.SCENARIOS`` from ``--concurrency`` parallel clients through
+each driver:
+
+``client``     Django's test client, in this process
+``runserver``  ``manage.py runserver``: threaded WSGI, one process
+``wsgi``       gunicorn with ``--workers`` processes of ``--threads`` threads
+``asgi``       uvicorn with ``--workers`` processes, main routes async
+
+Per route it reports throughput, latency percentiles, errors and database
+queries per request (from the ``Server-Timing`` header; streamed bodies
+such as the export query after it is sent), prints a table and
+writes JSON to ``--output``; ``benchmarks.compare`` diffs two such files::
+
+    python -m benchmarks.loadtest --products 10000 --drivers client wsgi --concurrency 1 8 --output head.json
+    python -m benchmarks.compare base.json head.json
+
+The server drivers need a test database other processes can open: Postgres,
+or SQLite with ``'TEST': {'NAME': ...}`` set to a file. Routes that write
+(sign-up, imports, deletes, ...) grow the database as they run; leave them
+out with ``--routes`` for read-only runs.
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.common import percentile, print_table, test_database
+
+import django
+from django.conf import settings
+from django.db import connection
+
+from app.tests.workloads import (
+    SCENARIOS, ClientDriver, Workload, headers_for, query_count, seed_catalog, seed_favourites, seed_users,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'runserver': (None, [sys.executable, 'manage.py', 'runserver', '--noreload', '127.0.0.1:{port}']),
+    'wsgi': ('gunicorn', [
+        sys.executable, '-m', 'gunicorn', 'food_api.wsgi:application',
+        '--workers', '{workers}', '--threads', '{threads}', '--bind', '127.0.0.1:{port}',
+    ]),
+    'asgi': ('uvicorn', [
+        sys.executable, '-m', 'uvicorn', 'food_api.asgi:application',
+        '--workers', '{workers}', '--host', '127.0.0.1', '--port', '{port}', '--no-access-log',
+    ]),
+}
+DRIVERS = ['client', *SERVERS]
+
+
+class HTTPDriver:
+    """
+    Requests to a running server, on a new connection each or, with
+    ``keep_alive``, over one persistent connection. runserver answers
+    kept-alive requests ~40 ms late (Nagle against delayed ACKs), hence
+    the default.
+    """
+
+    def __init__(self, port, keep_alive=False):
+        self.port = port
+        self.keep_alive = keep_alive
+        self.connection = None
+
+    def send(self, call, headers):
+        body = json.dumps(call.body).encode() if call.body is not None else None
+        headers = {**headers, 'Content-Type': 'application/json'}
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try:
+                self.connection.request(call.method, call.path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed the kept-alive connection; reconnect once.
+                self.close()
+                if attempt:
+                    raise
+                continue
+            if not self.keep_alive or response.getheader('Connection', '').lower() == 'close':
+                self.close()
+            return response.status, response.getheader('Server-Timing')
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_client(make_driver, work, scenario, worker, indexes):
+    driver = make_driver()
+    timings, queries, errors = [], [], 0
+    try:
+        for index in indexes:
+            call = scenario(work, worker, index)
+            headers = headers_for(work, call, worker)
+            start = time.perf_counter()
+            try:
+                status, server_timing = driver.send(call, headers)
+            except Exception:
+                status, server_timing = None, None
+            timings.append((time.perf_counter() - start) * 1000)
+            if status not in call.ok:
+                errors += 1
+            count = query_count(server_timing)
+            if count is not None:
+                queries.append(count)
+    finally:
+        driver.close()
+    return timings, queries, errors
+
+
+def run_scenario(make_driver, work, scenario, concurrency, requests, warmup=2):
+    """
+    Send ``requests`` calls of ``scenario`` from ``concurrency`` clients and
+    return throughput, latency, error and query figures.
+    """
+    run_client(make_driver, work, scenario, 0, range(warmup))
+    shares = [range(warmup + worker, warmup + requests, concurrency) for worker in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        results = [run_client(make_driver, work, scenario, 0, shares[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(run_client, make_driver, work, scenario, worker, share) for worker, share in enumerate(shares)]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    timings = [value for result in results for value in result[0]]
+    queries = [value for result in results for value in result[1]]
+    return {
+        'requests': len(timings),
+        'errors': sum(result[2] for result in results),
+        'throughput_rps': round(len(timings) / elapsed, 1),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(driver, port, workers, threads, response_cache):
+    """
+    Start ``driver`` on ``port`` against the current test database and wait
+    until it answers.
+    """
+    name = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite' and connection.creation.is_in_memory_db(name):
+        raise SystemExit(f"The {driver} driver needs a file or server test database; set DATABASES['default']['TEST']['NAME'].")
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.server_settings',
+        'BENCHMARK_BASE_SETTINGS': os.environ['DJANGO_SETTINGS_MODULE'],
+        'BENCHMARK_DATABASE_NAME': str(name),
+        'BENCHMARK_RESPONSE_CACHE': '1' if response_cache else '',
+        'METRICS_TOKEN': settings.METRICS_TOKEN,
+    }
+    if driver == 'asgi':
+        env['ASYNC_VIEWS'] = '1'
+    command = [part.format(port=port, workers=workers, threads=threads) for part in SERVERS[driver][1]]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{driver} server exited: {process.stderr.read().decode()[-2000:]}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/metrics', headers={'Authorization': f'Bearer {settings.METRICS_TOKEN}'})
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+    stop_server(process)
+    raise SystemExit(f'{driver} server did not start on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_driver(driver, work, routes, concurrency_levels, requests, workers, threads, response_cache, keep_alive):
+    rows = []
+    process = None
+    if driver == 'client':
+        make_driver = ClientDriver
+    else:
+        port = free_port()
+        process = start_server(driver, port, workers, threads, response_cache)
+        make_driver = lambda: HTTPDriver(port, keep_alive)  # noqa: E731
+    try:
+        for concurrency in concurrency_levels:
+            for route in routes:
+                result = run_scenario(make_driver, work, SCENARIOS[route], concurrency, requests)
+                rows.append({'driver': driver, 'concurrency': concurrency, 'route': route, **result})
+    finally:
+        if process is not None:
+            stop_server(process)
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--customizations', type=int, default=2, help='Customizations per product')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--favourites', type=int, default=20, help='Favourites per user')
+    parser.add_argument('--drivers', nargs='+', default=['client'], choices=DRIVERS)
+    parser.add_argument('--routes', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8])
+    parser.add_argument('--requests', type=int, default=100, help='Requests per route and concurrency level')
+    parser.add_argument('--workers', type=int, default=4, help='Server processes (wsgi, asgi)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+    parser.add_argument('--response-cache', action='store_true', help='Keep the catalog response cache on')
+    parser.add_argument('--keep-alive', action='store_true', help='Reuse one connection per client (server drivers)')
+    parser.add_argument('--output', default='loadtest.json')
+    args = parser.parse_args()
+
+    for driver in args.drivers:
+        package = SERVERS.get(driver, (None,))[0]
+        if package and importlib.util.find_spec(package) is None:
+            parser.error(f'the {driver} driver needs {package} installed')
+
+    with test_database(response_cache=args.response_cache):
+        foods = seed_catalog(args.products, customizations_per_product=args.customizations)
+        deletes = args.requests + 2 if 'product_delete' in args.routes else 0
+        disposable = seed_catalog(deletes * len(args.concurrency) * len(args.drivers), customizations_per_product=1) if deletes else []
+        admin, *users = seed_users(max(args.users, *args.concurrency) + 1, admins=1)
+        seed_favourites(users, foods, args.favourites)
+        work = Workload(foods, disposable, users, admin)
+
+        rows = []
+        for driver in args.drivers:
+            rows.extend(run_driver(
+                driver, work, args.routes, args.concurrency, args.requests, args.workers, args.threads, args.response_cache, args.keep_alive,
+            ))
+        database = connection.vendor
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': database,
+            'products': args.products,
+            'customizations_per_product': args.customizations,
+            'users': len(users),
+            'favourites_per_user': args.favourites,
+            'workers': args.workers,
+            'threads': args.threads,
+            'response_cache': args.response_cache,
+            'keep_alive': args.keep_alive,
+        },
+        'results': rows,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + '\n')
+    print_table(rows, [
+        'driver', 'concurrency', 'route', 'requests', 'errors', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request',
+    ])
+    print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Sign-in throughput per hasher: logins/sec and latency percentiles through
+``POST /api/sign-in/`` with several concurrent clients, e.g.::
+
+    python -m benchmarks.logins --hashers pbkdf2 scrypt --threads 1 4 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from benchmarks.common import print_table, summarize, test_database
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from app import hashers as hashers_module
+from app.hashers import HashingLimiter
+from app.models import User
+
+PASSWORD = 'benchmark-password'
+
+
+def seed_users(count):
+    # Hash once; every user shares the same password.
+    password = make_password(PASSWORD)
+    User.objects.all().delete()
+    User.objects.bulk_create([
+        User(email=f'user{index}@bench.local', full_name=f'User {index}', age=30, city='Pune', password=password)
+        for index in range(count)
+    ])
+
+
+def login_worker(emails):
+    client = Client()
+    timings = []
+    try:
+        for email in emails:
+            start = time.perf_counter()
+            response = client.post('/api/sign-in/', {'email': email, 'password': PASSWORD}, content_type='application/json')
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.content
+    finally:
+        connection.close()
+    return timings
+
+
+def run(threads, logins):
+    emails = [f'user{index % logins}@bench.local' for index in range(logins)]
+    batches = [emails[index::threads] for index in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        timings = [timing for batch in executor.map(login_worker, batches) for timing in batch]
+    return timings, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hashers', nargs='+', default=['pbkdf2', 'scrypt', 'argon2'], choices=sorted(settings.PASSWORD_HASHER_CLASSES))
+    parser.add_argument('--threads', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--max-concurrent', type=int, default=settings.PASSWORD_HASHING_LIMIT['MAX_CONCURRENT'])
+    args = parser.parse_args()
+
+    results = []
+    with test_database():
+        for name in args.hashers:
+            path = settings.PASSWORD_HASHER_CLASSES[name]
+            hashers = [path] + [other for other in settings.PASSWORD_HASHER_CLASSES.values() if other != path]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                try:
+                    seed_users(args.logins)
+                except ValueError as e:
+                    # Argon2 without argon2-cffi installed.
+                    print(f'skipping {name}: {e}')
+                    continue
+                for threads in args.threads:
+                    limiter = HashingLimiter(max_concurrent=args.max_concurrent, queue_timeout=60)
+                    with mock.patch.object(hashers_module, 'hashing_limiter', limiter):
+                        timings, elapsed = run(threads, args.logins)
+                    results.append({
+                        'hasher': name,
+                        'threads': threads,
+                        'logins_per_sec': round(len(timings) / elapsed, 1),
+                        **summarize(timings),
+                    })
+    print_table(results, ['hasher', 'threads', 'logins_per_sec', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Page latency of ``GET /api/products/`` as the catalog grows.
+
+Compares a shallow and a deep LIMIT/OFFSET page with the keyset cursor
+mode. With query-level pagination every column should stay roughly flat
+as ``--sizes`` grows; only the deep offset page is expected to creep up
+because the database still has to walk past the skipped rows.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.test import Client
+
+from app.models import FoodProduct
+from app.pagination import KeysetPagination
+from app.tests.workloads import seed_catalog
+
+
+def run(sizes, limit, repeat):
+    client = Client()
+    rows = []
+    seeded = 0
+    for size in sorted(sizes):
+        seed_catalog(size - seeded)
+        seeded = size
+
+        # Position the keyset cursor at the same depth as the deep offset page.
+        middle = FoodProduct.objects.order_by('price', 'id')[size // 2]
+        deep_cursor = KeysetPagination().encode_cursor([middle.price, middle.id])
+
+        cases = {
+            'offset_first': lambda: client.get('/api/products/', {'limit': limit, 'offset': 0}),
+            'offset_deep': lambda: client.get('/api/products/', {'limit': limit, 'offset': size // 2}),
+            'keyset_deep': lambda: client.get('/api/products/', {'limit': limit, 'ordering': 'price', 'cursor': deep_cursor}),
+        }
+        for name, func in cases.items():
+            rows.append({'catalog': size, 'case': name, **summarize(measure(func, repeat=repeat))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        rows = run(args.sizes, args.limit, args.repeat)
+    print_table(rows, ['catalog', 'case', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
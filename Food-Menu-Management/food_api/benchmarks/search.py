@@ -0,0 +1,83 @@
+"""
+Latency of ``GET /api/products/search`` as the catalog grows.
+
+Products are named from a small dish vocabulary so queries hit realistic
+posting lists. Each size reports how long the in-memory index takes to
+build (0 on Postgres, where the GIN indexes are maintained on write) and
+the latency of an exact, a misspelled, a multi-word and a filtered query.
+"""
+import argparse
+import time
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.test import Client
+
+from app.search import BACKEND_MEMORY, InMemorySearchIndex, get_search_backend, search_index, update_search_vectors
+from app.tests.workloads import seed_catalog
+
+DISHES = [
+    'Margherita Pizza', 'Pepperoni Pizza', 'Farmhouse Pizza', 'Chicken Burger',
+    'Paneer Tikka', 'Butter Chicken', 'Veg Biryani', 'Penne Arrabbiata',
+    'Caesar Salad', 'Greek Salad', 'Chocolate Brownie', 'Mango Lassi',
+    'Salmon Sushi', 'Miso Ramen', 'Masala Dosa', 'Garlic Bread',
+]
+
+QUERIES = {
+    'exact': {'q': 'margherita'},
+    'typo': {'q': 'margarita'},
+    'multiword': {'q': 'chicken burger'},
+    'filtered': {'q': 'pizza', 'type': 'Veg'},
+}
+
+
+def dish_name(index):
+    return f'{DISHES[index % len(DISHES)]} {index}'
+
+
+def run(sizes, limit, repeat):
+    client = Client()
+    rows = []
+    seeded = 0
+    for size in sorted(sizes):
+        seed_catalog(size - seeded, names=dish_name)
+        seeded = size
+
+        build_ms = 0.0
+        if get_search_backend() == BACKEND_MEMORY:
+            start = time.perf_counter()
+            InMemorySearchIndex.build()
+            build_ms = round((time.perf_counter() - start) * 1000, 3)
+        else:
+            update_search_vectors()
+        search_index.clear()
+
+        unfiltered = client.get('/api/products/search', {'q': QUERIES['filtered']['q']}).json()['count']
+        for name, params in QUERIES.items():
+            func = lambda: client.get('/api/products/search', {**params, 'limit': limit})  # noqa: E731
+            count = func().json()['count']
+            if name == 'filtered' and count >= unfiltered:
+                # An unknown filter parameter is ignored, not rejected.
+                raise SystemExit(f'the filtered query matched {count} of {unfiltered} products: is its filter applied?')
+            rows.append({
+                'catalog': size, 'query': name, 'matches': count, 'build_ms': build_ms,
+                **summarize(measure(func, repeat=repeat)),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        rows = run(args.sizes, args.limit, args.repeat)
+    print(f'backend: {get_search_backend()}')
+    print_table(rows, ['catalog', 'query', 'matches', 'build_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Serialize and render N products with their customizations.
+
+``drf`` is ``FoodProductSerializer`` over prefetched instances, ``fast``
+is ``FastFoodProductSerializer`` over ``.values()`` rows with an empty
+memo and ``fast_memo`` the same with every product memoized. Each case
+includes its queries. The render cases time ``JSONRenderer`` against
+``ORJSONRenderer`` on the same serialized list.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from rest_framework.renderers import JSONRenderer
+
+from app.fast_serializers import FastFoodProductSerializer, SerializedProductCache
+from app.models import FoodProduct
+from app.renderers import ORJSONRenderer, orjson
+from app.serializers import FoodProductSerializer
+from app.tests.workloads import seed_catalog
+
+
+def run(sizes, repeat):
+    rows = []
+    seeded = 0
+    for size in sorted(sizes):
+        seed_catalog(size - seeded)
+        seeded = size
+        foods = FoodProduct.objects.order_by('id')[:size]
+        memo = SerializedProductCache(max_size=size)
+
+        def drf():
+            return FoodProductSerializer(FoodProductSerializer.read_queryset(foods), many=True).data
+
+        def fast():
+            return FastFoodProductSerializer(
+                FastFoodProductSerializer.read_queryset(foods), many=True, cache=SerializedProductCache(max_size=size),
+            ).data
+
+        def fast_memo():
+            return FastFoodProductSerializer(FastFoodProductSerializer.read_queryset(foods), many=True, cache=memo).data
+
+        data = fast_memo()
+        cases = {
+            'serialize_drf': drf,
+            'serialize_fast': fast,
+            'serialize_fast_memo': fast_memo,
+            'render_json': lambda: JSONRenderer().render(data),
+        }
+        if orjson is not None:
+            cases['render_orjson'] = lambda: ORJSONRenderer().render(data)
+        for name, func in cases.items():
+            rows.append({'items': size, 'case': name, **summarize(measure(func, repeat=repeat))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        rows = run(args.sizes, args.repeat)
+    print_table(rows, ['items', 'case', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
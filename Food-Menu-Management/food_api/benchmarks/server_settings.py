@@ -0,0 +1,28 @@
+"""
+Settings of the servers started by ``benchmarks.loadtest``: the settings
+module in ``BENCHMARK_BASE_SETTINGS``, pointed at the benchmark's test
+database (``BENCHMARK_DATABASE_NAME``), without debug overhead and
+request throttling, with ``Server-Timing`` headers on. ``METRICS_TOKEN``
+comes from the environment, as in the base settings.
+"""
+import importlib
+import os
+
+base = importlib.import_module(os.environ['BENCHMARK_BASE_SETTINGS'])
+globals().update({name: value for name, value in vars(base).items() if name.isupper()})
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+REST_FRAMEWORK = {**base.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+
+PERFORMANCE_INSTRUMENTATION = {**base.PERFORMANCE_INSTRUMENTATION, 'SERVER_TIMING': True}
+
+DATABASES = {
+    **base.DATABASES,
+    'default': {**base.DATABASES['default'], 'NAME': os.environ['BENCHMARK_DATABASE_NAME']},
+}
+
+if not os.environ.get('BENCHMARK_RESPONSE_CACHE'):
+    CACHES = {**base.CACHES, base.MENU_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
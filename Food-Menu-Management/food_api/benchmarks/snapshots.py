@@ -0,0 +1,72 @@
+"""
+``GET /api/products/`` served live and from the pre-rendered menu
+snapshots (``MENU_SNAPSHOT_READS``).
+
+``live_cold`` clears the serialized-product memo before every request,
+``live_warm`` keeps it, ``snapshot`` reads the snapshot table. Also
+reported is the time of a full ``rebuild_menu_snapshot``.
+"""
+import argparse
+import time
+
+from benchmarks.common import measure, print_table, summarize, test_database
+
+from django.test import Client, override_settings
+
+from app.fast_serializers import product_cache
+from app.snapshots import rebuild_snapshots
+from app.tests.workloads import seed_catalog
+
+QUERIES = {
+    'page_20': {'limit': 20, 'offset': 100},
+    'page_100': {'limit': 100},
+    'cursor_price_100': {'cursor': '', 'ordering': 'price', 'limit': 100},
+    'filtered_1000': {'category': 'Pizza', 'type': 'Veg', 'min_price': 100, 'limit': 1000},
+    'all': {},
+}
+
+MODES = {
+    'live_cold': (False, True),
+    'live_warm': (False, False),
+    'snapshot': (True, False),
+}
+
+
+def run(queries, repeat):
+    client = Client()
+    rows = []
+    for name in queries:
+        params = QUERIES[name]
+        contents = set()
+        for mode, (snapshot_reads, clear_memo) in MODES.items():
+
+            def request():
+                if clear_memo:
+                    product_cache.clear()
+                return client.get('/api/products/', params)
+
+            with override_settings(MENU_SNAPSHOT_READS=snapshot_reads):
+                contents.add(request().content)
+                rows.append({'query': name, 'mode': mode, **summarize(measure(request, repeat=repeat))})
+        assert len(contents) == 1, f'{name}: snapshot and live responses differ'
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--catalog', type=int, default=10000)
+    parser.add_argument('--queries', nargs='+', choices=list(QUERIES), default=list(QUERIES))
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        seed_catalog(args.catalog)
+        start = time.perf_counter()
+        rebuild_snapshots()
+        print(f'rebuild_menu_snapshot: {args.catalog} products in {time.perf_counter() - start:.2f}s\n')
+        rows = run(args.queries, args.repeat)
+    print_table(rows, ['query', 'mode', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from benchmarks.compare import regressions
+
+
+class CompareTests(SimpleTestCase):
+    """
+    Test class for flagging regressions between two load test runs.
+    """
+
+    def test_compare_regressions(self):
+        """
+        Test that slower, query-heavier or failing routes are flagged.
+        """
+        base = {"p50_ms": 10.0, "p95_ms": 20.0, "throughput_rps": 100.0, "queries_per_request": 3.0, "errors": 0}
+        self.assertEqual(regressions(base, dict(base, p50_ms=10.5)), [])
+        self.assertEqual(regressions(base, dict(base, p95_ms=30.0)), ["p95_ms +50.0%"])
+        self.assertEqual(regressions(base, dict(base, throughput_rps=80.0)), ["throughput -20.0%"])
+        self.assertEqual(regressions(base, dict(base, queries_per_request=4.0, errors=1)), ["queries 3.0 -> 4.0", "errors 0 -> 1"])
@@ -0,0 +1,99 @@
+"""
+Production settings, configured through environment variables.
+
+Run with ``DJANGO_SETTINGS_MODULE=food_api.production_settings``. Database
+connections are kept open between requests (``DB_CONN_MAX_AGE`` seconds)
+and health-checked before reuse; ``DB_POOL=1`` switches to the psycopg
+connection pool instead, which needs Django 5.1+, psycopg 3 and
+psycopg-pool. With ``DB_REPLICA_HOST`` set, GET requests read from that
+replica through ``app.routers``. ``THROTTLE_REDIS_URL`` keeps the throttle
+buckets in Redis, shared by every server process.
+"""
+
+import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, MIDDLEWARE
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = env_bool('DJANGO_DEBUG')
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+
+# Database
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_PORT', ''),
+        # Reuse connections across requests instead of connecting every time,
+        # checking a reused connection is still alive first.
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {
+            'connect_timeout': env_int('DB_CONNECT_TIMEOUT', 5),
+        },
+    },
+}
+
+if env_bool('DB_POOL'):
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured(
+            'DB_POOL needs Django 5.1+ with psycopg 3 and psycopg-pool; '
+            'use persistent connections (DB_CONN_MAX_AGE) or PgBouncer instead.'
+        )
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': env_int('DB_POOL_MIN_SIZE', 2),
+        'max_size': env_int('DB_POOL_MAX_SIZE', 10),
+        'timeout': env_int('DB_POOL_TIMEOUT', 10),
+    }
+    # Pooled connections are returned to the pool after each request.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+    }
+    DATABASE_ROUTERS = ['app.routers.PrimaryReplicaRouter']
+    MIDDLEWARE = [*MIDDLEWARE, 'app.routers.ReplicaReadsMiddleware']
+    # Seconds a client reads from the primary after each of its writes.
+    REPLICA_PIN_SECONDS = env_int('DB_REPLICA_PIN_SECONDS', 5)
+
+
+# Throttling
+
+if os.environ.get('THROTTLE_REDIS_URL'):
+    CACHES = {
+        **CACHES,
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['THROTTLE_REDIS_URL'],
+        },
+    }
+    THROTTLE_CACHE_ALIAS = 'throttle'
@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +53,8 @@ EXTERNAL_APPS = [
 INSTALLED_APPS += EXTERNAL_APPS
 
 MIDDLEWARE = [
+    # Outermost, so its wall time covers the whole request.
+    'app.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -94,6 +99,54 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Catalog responses are invalidated through a version counter, not a TTL.
+# The local-memory backend evicts least recently used entries past MAX_ENTRIES.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'menu': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'menu',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
+MENU_CACHE_ALIAS = 'menu'
+
+
+# Serve the catalog and favourite routes with the async views in app/async_views.py.
+# They are always reachable under /api/async/; enable this when running under ASGI.
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Answer full product lists from the pre-rendered app.models.MenuSnapshot rows.
+# Writes through the API and imports keep them current; run
+# `manage.py rebuild_menu_snapshot` once before enabling this, and after any
+# write that bypasses them.
+
+MENU_SNAPSHOT_READS = os.environ.get('MENU_SNAPSHOT_READS', '').lower() in ('1', 'true', 'yes')
+
+
+# Product search: 'postgres' (search vector + trigrams) or 'memory' (in-process
+# index, for SQLite); unset picks by database. SEARCH_CONFIG is the Postgres
+# text search configuration used for stemming. The in-process index is rebuilt
+# on a background thread after catalog writes, serving the previous one
+# meanwhile; with SEARCH_INDEX_BACKGROUND_REBUILD off the next search rebuilds it.
+
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND')
+
+SEARCH_INDEX_BACKGROUND_REBUILD = True
+
+SEARCH_CONFIG = 'english'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -113,6 +166,47 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# New passwords use PASSWORD_HASHER ('pbkdf2', 'scrypt' or 'argon2', which needs
+# argon2-cffi); the others stay listed so existing hashes keep working and are
+# upgraded on the next login, as are hashes made with different cost options.
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'app.hashers.TunablePBKDF2PasswordHasher',
+    'scrypt': 'app.hashers.TunableScryptPasswordHasher',
+    'argon2': 'app.hashers.TunableArgon2PasswordHasher',
+}
+
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(
+        f"Unknown PASSWORD_HASHER {PASSWORD_HASHER!r}; use one of: {', '.join(PASSWORD_HASHER_CLASSES)}."
+    )
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+# Cost parameters per hasher; unset ones keep Django's defaults.
+PASSWORD_HASHER_OPTIONS = {
+    'pbkdf2': {'iterations': int(os.environ.get('PBKDF2_ITERATIONS', 720000))},
+    'scrypt': {'work_factor': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14))},
+    'argon2': {
+        'time_cost': int(os.environ.get('ARGON2_TIME_COST', 2)),
+        'memory_cost': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),
+    },
+}
+
+# At most MAX_CONCURRENT sign-up and sign-in hashes run at once; requests
+# wait at most QUEUE_TIMEOUT seconds for a slot before getting 429.
+PASSWORD_HASHING_LIMIT = {
+    'MAX_CONCURRENT': int(os.environ.get('PASSWORD_HASHING_CONCURRENCY', 4)),
+    'QUEUE_TIMEOUT': 2,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -139,9 +233,66 @@ AUTH_USER_MODEL = 'app.User'
 
 
 REST_FRAMEWORK = {
+    # Serves requests from the token claims (user id, is_admin) without a User query.
+    # Use 'rest_framework_simplejwt.authentication.JWTAuthentication' to load the user every time.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'app.authentication.ClaimsJWTAuthentication',
+    ),
+    # Same JSON as DRF's JSONRenderer, encoded with orjson when it is installed.
+    'DEFAULT_RENDERER_CLASSES': (
+        'app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Token buckets per client IP and per user (app.throttling), for the views
+    # with a throttle_scope; a rate of 120/min allows bursts of 120 requests.
+    'DEFAULT_THROTTLE_CLASSES': (
+        'app.throttling.AnonTokenBucketThrottle',
+        'app.throttling.UserTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'catalog_anon': '120/min',
+        'catalog_user': '600/min',
+        'search_anon': '60/min',
+        'search_user': '300/min',
+        'export_anon': '10/hour',
+        'export_user': '60/hour',
+    },
+}
+
+# The cache holding the throttle buckets. The locmem default is per process,
+# so with several server processes each enforces the rates on its own; use a
+# shared cache (e.g. Redis, THROTTLE_REDIS_URL in production_settings) for
+# limits across processes.
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Concurrent misses of the same catalog response wait this many seconds for
+# the first one to compute it instead of querying themselves (0 disables).
+CATALOG_COALESCE_TIMEOUT = 10
+
+# Products serialized by app.fast_serializers, memoized per (id, updated_at).
+SERIALIZED_PRODUCT_CACHE = {
+    'MAX_SIZE': 5000,
+}
+
+# Per-request timing breakdown (app.instrumentation): histograms at /api/metrics,
+# and Server-Timing headers with SERVER_TIMING=1 (they expose query counts and
+# timings to every client). A SLOW_QUERY_SAMPLE_RATE share of the queries slower
+# than SLOW_QUERY_MS is logged to the app.performance logger.
+PERFORMANCE_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING': os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes'),
+    'SLOW_QUERY_MS': 100,
+    'SLOW_QUERY_SAMPLE_RATE': 0.1,
+}
+
+# /api/metrics requires "Authorization: Bearer <METRICS_TOKEN>"; unset, it is
+# only served with DEBUG on.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Users fetched lazily by claims-authenticated requests that need the full row.
+AUTH_USER_CACHE = {
+    'MAX_SIZE': 1000,
+    'TTL': 30,
 }
 
 
@@ -0,0 +1,25 @@
+"""
+Local test settings: SQLite instead of Postgres, with a second ``replica``
+database so the primary/replica routing can be tested without servers.
+
+    python manage.py test --settings=food_api.test_settings
+
+The replica is a separate database rather than a test mirror, so a test can
+tell which alias a query went to. Routing is only active where a test
+enables ``app.routers.ReplicaReadsMiddleware``.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_default.sqlite3',  # noqa: F405
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_replica.sqlite3',  # noqa: F405
+    },
+}
+
+DATABASE_ROUTERS = ['app.routers.PrimaryReplicaRouter']